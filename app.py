@@ -1,16 +1,25 @@
-from flask import Flask, session
+from flask import Flask
 from flask_cors import CORS
-import json
-import uuid
-from flask import render_template
+import atexit
+import os
+import time
+from flask import g, jsonify, render_template, request
 
 # -------------------------
 # Import Core Layers
 # -------------------------
 
+from models.event_log import EventLog
 from models.student_model import StudentModel
-from engine.adaptive_engine import AdaptiveEngine
-from ml.adaptive_ml import AdaptiveML
+from models.question_bank_file import load_question_index
+from models.student_store import StudentStore, SQLiteBackend, RedisBackend
+from monitoring.metrics import REGISTRY
+from services.container import ServiceContainer
+from services.responses import FastJSONProvider, compress_response
+from services.sharding import (
+    SHARD_HEADER, SHARDED_PATHS, STUDENT_HEADER, TOKEN_HEADER,
+    ShardUnavailableError
+)
 
 # -------------------------
 # Flask App Setup
@@ -18,53 +27,212 @@ from ml.adaptive_ml import AdaptiveML
 
 app = Flask(__name__)
 app.secret_key = "hackathon_super_secret_key"
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # -------------------------
 # Load Question Bank
 # -------------------------
 
-with open("data/question_bank.json", "r", encoding="utf-8") as f:
-    QUESTION_BANK = json.load(f)
+# Pre-partitioned (subject, topic, difficulty) buckets with stable IDs.
+# A compiled bank (python -m models.question_bank_file) is memory-mapped
+# and shared by every worker; otherwise the JSON is parsed at startup.
+# Subjects are partitioned on first use; NEXORA_MAX_SUBJECTS bounds how
+# many stay resident.
+QUESTION_INDEX = load_question_index(
+    os.environ.get("NEXORA_QUESTION_BANK", "data/question_bank.json"),
+    max_subjects=int(os.environ.get("NEXORA_MAX_SUBJECTS", 0)) or None
+)
 
-SUBJECT = "Mathematics"
-TOPICS = list(QUESTION_BANK[SUBJECT].keys())
+# Subject for requests that do not name one
+DEFAULT_SUBJECT = os.environ.get("NEXORA_DEFAULT_SUBJECT", "Mathematics")
 
 # -------------------------
-# Shared AI Engines
+# Session-Level Student Store
 # -------------------------
+# NOTE:
+# Flask sessions cannot store Python objects.
+# We store a session ID in cookies and map it to one StudentModel per
+# subject, created on the student's first visit to that subject.
+# Recently used student subjects stay in a bounded LRU tier; state is persisted
+# to SQLite (or Redis when NEXORA_REDIS_URL is set) so it survives
+# restarts and is shared by every worker.
+# With NEXORA_EVENT_LOG set to a directory, the full attempt history goes
+# to an append-only event log instead of staying in memory. Off by
+# default: a directory takes exactly one writer process (a second one
+# fails to start), so multi-worker deployments shard or give each
+# worker its own directory. The writer compacts the log into a
+# memory-mapped archive in the background as segments fill up.
+# With NEXORA_SHARD set, this worker is one shard of a consistent-hash
+# ring (shard map in the "sharding" tunables): it only keeps its own
+# students and forwards the others' requests to their owner.
+# -------------------------
+
+SHARD = os.environ.get("NEXORA_SHARD") or None
+
+# Recent-results window new students start with (the hint trigger's
+# error rate): NEXORA_RECENT_WINDOW attempts, NEXORA_RECENT_MODE
+# "window" or "decay" (exponentially decayed, NEXORA_RECENT_DECAY).
+# Stored students keep the window they were created with.
+RECENT_WINDOW = {
+    "recent_window": int(os.environ.get("NEXORA_RECENT_WINDOW", 0)) or None,
+    "recent_mode": os.environ.get("NEXORA_RECENT_MODE") or None,
+    "recent_decay": float(os.environ.get("NEXORA_RECENT_DECAY", 0)) or None
+}
+# Checked now rather than on the first new student
+StudentModel(DEFAULT_SUBJECT, (), **RECENT_WINDOW)
+
+def _student_backend():
+    redis_url = os.environ.get("NEXORA_REDIS_URL")
+
+    if redis_url:
+        import redis
+        return RedisBackend(redis.Redis.from_url(redis_url))
+
+    return SQLiteBackend(os.environ.get("NEXORA_STUDENT_DB", "data/students.db"))
+
 
-adaptive_engine = AdaptiveEngine()
-adaptive_ml = AdaptiveML()
+def _event_log():
+    directory = os.environ.get("NEXORA_EVENT_LOG")
+    if __name__ == "__main__" and not os.environ.get("WERKZEUG_RUN_MAIN"):
+        # Debug reloader parent: only the child it spawns serves (and
+        # writes), so leave the directory's lock to it
+        return None
+    if directory and SHARD:
+        # One writer per directory: each shard logs to its own
+        directory = os.path.join(directory, SHARD)
+    return EventLog(directory) if directory else None
+
+
+STUDENT_STORE = StudentStore(
+    backend=_student_backend(),
+    factory=lambda student_id, subject: StudentModel(
+        subject=subject,
+        topics=QUESTION_INDEX.topics(subject),
+        student_id=student_id,
+        **RECENT_WINDOW
+    ),
+    max_size=int(os.environ.get("NEXORA_STUDENT_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("NEXORA_STUDENT_CACHE_TTL", 3600)),
+    event_log=_event_log()
+)
+STUDENT_STORE.recover()
+atexit.register(STUDENT_STORE.close)
 
 # -------------------------
-# Session-Level Student Store
+# Shared Services
 # -------------------------
-# NOTE:
-# Flask sessions cannot store Python objects.
-# We store a session ID in cookies and map it to a StudentModel in memory.
+# Engines, ML and PracticeService are built once. Tunables come from
+# config/tunables.json and are hot-reloaded when the file changes.
 # -------------------------
 
-STUDENT_STORE = {}
+# Cohort reports (teacher dashboards) need "Authorization: Bearer
+# $NEXORA_TEACHER_TOKEN" and are refused when it is unset; students
+# appear in them under opaque refs, never their session IDs.
+CONTAINER = ServiceContainer(
+    question_index=QUESTION_INDEX,
+    student_store=STUDENT_STORE,
+    config_path=os.environ.get("NEXORA_CONFIG", "config/tunables.json"),
+    default_subject=DEFAULT_SUBJECT,
+    shard=SHARD,
+    shard_secret=app.secret_key,
+    teacher_token=os.environ.get("NEXORA_TEACHER_TOKEN") or None,
+    report_secret=app.secret_key
+)
+app.extensions["nexora"] = CONTAINER
 
-def get_student():
-    """
-    Returns a StudentModel tied to the current browser session.
-    Creates one if it does not exist.
-    """
+@app.before_request
+def reload_tunables():
+    CONTAINER.maybe_reload()
 
-    if "student_id" not in session:
-        session["student_id"] = str(uuid.uuid4())
+# -------------------------
+# Request Metrics
+# -------------------------
+# Per-endpoint latency, exposed with everything else at /metrics
+# -------------------------
 
-    student_id = session["student_id"]
+REQUEST_SECONDS = REGISTRY.histogram(
+    "nexora_http_request_seconds",
+    "HTTP request latency by route and status",
+    labels=("route", "status")
+)
 
-    if student_id not in STUDENT_STORE:
-        STUDENT_STORE[student_id] = StudentModel(
-            subject=SUBJECT,
-            topics=TOPICS
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, rule, response.status_code)
+    return response
+
+# -------------------------
+# Shard Routing
+# -------------------------
+# Student-scoped requests for a student another shard owns are
+# forwarded there; requests forwarded by a peer are served here for
+# the student named in the (signed) forwarding headers.
+# -------------------------
+
+@app.before_request
+def route_to_shard():
+    router = CONTAINER.router
+    if router is None or not request.path.startswith(SHARDED_PATHS):
+        return None
+
+    forwarded = request.headers.get(STUDENT_HEADER)
+    if forwarded is not None:
+        if not router.verify(forwarded, request.headers.get(TOKEN_HEADER)):
+            return jsonify({"error": "invalid shard token"}), 403
+        g.shard_student_id = forwarded
+        return None
+
+    student_id = CONTAINER.session_student_id()
+    owner = router.owner(student_id)
+    if owner == router.local:
+        return None
+
+    try:
+        status, headers, body = router.forward(
+            owner, student_id, request.method,
+            request.full_path.rstrip("?"), request.headers, request.get_data()
         )
+    except ShardUnavailableError as e:
+        return jsonify({"error": str(e)}), 503
+
+    return app.response_class(body, status=status, headers=headers)
 
-    return STUDENT_STORE[student_id]
+@app.after_request
+def label_shard(response):
+    if CONTAINER.router is not None:
+        response.headers.setdefault(SHARD_HEADER, CONTAINER.router.local)
+    return response
+
+# -------------------------
+# Response Compression
+# -------------------------
+# JSON bodies of at least NEXORA_COMPRESS_MIN_BYTES are gzipped for
+# clients that accept it (0 disables; e.g. when a proxy compresses)
+# -------------------------
+
+COMPRESS_MIN_BYTES = int(os.environ.get("NEXORA_COMPRESS_MIN_BYTES", 1024))
+COMPRESS_LEVEL = int(os.environ.get("NEXORA_COMPRESS_LEVEL", 5))
+
+@app.after_request
+def compress(response):
+    return compress_response(
+        response, request.headers.get("Accept-Encoding"),
+        COMPRESS_MIN_BYTES, COMPRESS_LEVEL
+    )
+
+def get_student(subject=None):
+    """
+    Returns the StudentModel for one subject of the current browser session.
+    """
+    return CONTAINER.get_student(subject)
 
 # -------------------------
 # Register API Routes
@@ -73,10 +241,14 @@ def get_student():
 from routes.subject_routes import subject_bp
 from routes.practice_routes import practice_bp
 from routes.submission_routes import submission_bp
+from routes.cohort_routes import cohort_bp
+from routes.metrics_routes import metrics_bp
 
 app.register_blueprint(subject_bp)
 app.register_blueprint(practice_bp)
 app.register_blueprint(submission_bp)
+app.register_blueprint(cohort_bp)
+app.register_blueprint(metrics_bp)
 
 # -------------------------
 # Health Check (Optional)
@@ -0,0 +1,362 @@
+# asgi.py
+
+"""
+ASGI serving mode for the practice and submission APIs.
+
+Reuses the same ServiceContainer (question index, student store,
+engines) as the Flask app, but serves the JSON APIs from an event loop
+so one process can hold many concurrent quiz sessions. Backend loads,
+contended student locks and store flushes run in worker threads; the
+adaptive logic itself runs inline.
+
+Run with:
+    uvicorn asgi:app --workers 1
+"""
+
+import asyncio
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from monitoring.metrics import REGISTRY
+from monitoring.profiler import PROFILER
+from services.container import UnknownSubjectError
+from services.responses import (
+    ResponseOptions, accepts_gzip, dumps, if_none_match_matches, weaken_etag
+)
+from services.sharding import (
+    SHARD_HEADER, SHARDED_PATHS, STUDENT_HEADER, TOKEN_HEADER,
+    ShardUnavailableError
+)
+from services.subject_service import SubjectService
+from services.submission_service import SubmissionError
+
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "nexora_http_request_seconds",
+    "HTTP request latency by route and status",
+    labels=("route", "status")
+)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with services.responses.dumps (orjson if installed)."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+class RequestMetrics:
+    """ASGI middleware recording per-route latency, like the Flask hooks."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                route.path if route is not None else "unmatched", status[0]
+            )
+
+
+class CompressionValidators:
+    """
+    ASGI middleware around GZipMiddleware, matching compress_response:
+    gzipped bodies get a weak ETag, and 304s vary on Accept-Encoding
+    and carry the ETag the 200 would have.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        gzip_client = accepts_gzip(Headers(scope=scope).get("accept-encoding"))
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if message["status"] == 304:
+                    headers.add_vary_header("Accept-Encoding")
+                    weaken = gzip_client
+                else:
+                    weaken = headers.get("content-encoding") == "gzip"
+                if weaken and "etag" in headers:
+                    headers["etag"] = weaken_etag(headers["etag"])
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
+
+
+class ShardRouting:
+    """
+    ASGI middleware forwarding student-scoped requests to the owning
+    shard, like the Flask route_to_shard hook. Sits inside the session
+    middleware; the student served is left in scope["nexora.student_id"].
+    Also picks up changed tunables (maybe_reload) once per HTTP request,
+    before routing, so handlers need not.
+    """
+
+    def __init__(self, app, container):
+        self.app = app
+        self.container = container
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.container.maybe_reload()
+
+        router = self.container.router
+        if scope["type"] != "http" or router is None \
+                or not scope["path"].startswith(SHARDED_PATHS):
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        forwarded = headers.get(STUDENT_HEADER)
+
+        if forwarded is not None:
+            if not router.verify(forwarded, headers.get(TOKEN_HEADER)):
+                response = FastJSONResponse({"error": "invalid shard token"}, status_code=403)
+                return await response(scope, receive, send)
+            scope["nexora.student_id"] = forwarded
+            return await self.app(scope, receive, self._labelled(send, router.local))
+
+        session = scope["session"]
+        if "student_id" not in session:
+            session["student_id"] = str(uuid.uuid4())
+        student_id = session["student_id"]
+
+        owner = router.owner(student_id)
+        if owner == router.local:
+            scope["nexora.student_id"] = student_id
+            return await self.app(scope, receive, self._labelled(send, router.local))
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        path = scope["path"]
+        if scope["query_string"]:
+            path += "?" + scope["query_string"].decode("latin-1")
+
+        try:
+            status, response_headers, payload = await asyncio.to_thread(
+                router.forward, owner, student_id, scope["method"], path, headers, body
+            )
+        except ShardUnavailableError as e:
+            response = FastJSONResponse({"error": str(e)}, status_code=503)
+            return await response(scope, receive, send)
+
+        response = Response(payload, status_code=status, headers=dict(response_headers))
+        await response(scope, receive, send)
+
+    @staticmethod
+    def _labelled(send, shard):
+        async def send_labelled(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).setdefault(SHARD_HEADER, shard)
+            await send(message)
+        return send_labelled
+
+
+def create_asgi_app(container, secret_key, compress_min_bytes=1024, compress_level=5):
+    """
+    Build the ASGI app over an existing ServiceContainer.
+    Endpoints and payloads match the Flask routes in routes/.
+    compress_min_bytes: gzip bodies at least this large for clients
+    that accept it (0 disables)
+    """
+
+    def student_id_for(request):
+        # Set by ShardRouting when sharded (possibly a peer's student)
+        if "nexora.student_id" in request.scope:
+            return request.scope["nexora.student_id"]
+
+        if "student_id" not in request.session:
+            request.session["student_id"] = str(uuid.uuid4())
+        return request.session["student_id"]
+
+    async def practice_topic(request):
+        options = ResponseOptions.from_args(request.query_params)
+
+        try:
+            response = await container.next_question_async(
+                student_id_for(request),
+                request.path_params["subject"],
+                forced_topic=request.path_params["topic"],
+                verbose=options.verbose
+            )
+        except UnknownSubjectError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=404)
+
+        return FastJSONResponse(options.shape(response))
+
+    async def submit_answer(request):
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict):
+            return FastJSONResponse(
+                {"error": "request body must be a JSON object"}, status_code=400
+            )
+
+        options = ResponseOptions.from_args(request.query_params)
+
+        try:
+            response = await container.submit_async(
+                student_id_for(request),
+                data.get("subject"),
+                data.get("topic"),
+                data.get("correct"),
+                question_id=data.get("question_id"),
+                verbose=options.verbose
+            )
+        except UnknownSubjectError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=404)
+        except SubmissionError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=400)
+
+        return FastJSONResponse(options.shape(response))
+
+    async def submit_batch(request):
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict):
+            return FastJSONResponse(
+                {"error": "request body must be a JSON object"}, status_code=400
+            )
+
+        try:
+            response = await container.submit_batch_async(
+                student_id_for(request),
+                data.get("subject"),
+                data.get("attempts")
+            )
+        except UnknownSubjectError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=404)
+        except SubmissionError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=400)
+
+        return FastJSONResponse(response)
+
+    async def subject_report(request):
+        if_none_match = request.headers.get("if-none-match", "")
+        options = ResponseOptions.from_args(request.query_params)
+
+        def build(student):
+            service = SubjectService(student)
+            etag = service.etag()
+            if if_none_match_matches(if_none_match, etag):
+                return etag, None
+            return etag, options.shape(
+                service.generate_subject_report(verbose=options.verbose)
+            )
+
+        try:
+            etag, report = await container.run_locked_async(
+                student_id_for(request), request.path_params["subject"], build
+            )
+        except UnknownSubjectError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=404)
+
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+        if report is None:
+            return Response(status_code=304, headers=headers)
+        return FastJSONResponse(report, headers=headers)
+
+    async def cohort_report(request):
+        if not container.is_teacher(request.headers.get("authorization")):
+            return FastJSONResponse(
+                {"error": "teacher authorization required"}, status_code=401
+            )
+
+        students = request.query_params.get("students")
+
+        try:
+            report = await container.cohort_report_async(
+                request.path_params["subject"],
+                students.split(",") if students else None
+            )
+        except UnknownSubjectError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=404)
+
+        return FastJSONResponse(report)
+
+    async def metrics(request):
+        return PlainTextResponse(
+            REGISTRY.render(), media_type="text/plain; version=0.0.4"
+        )
+
+    async def profile(request):
+        limit = request.query_params.get("limit")
+        body = PROFILER.folded(int(limit) if limit else None)
+        if request.query_params.get("reset"):
+            PROFILER.reset()
+        return PlainTextResponse(body)
+
+    routes = [
+        Route("/api/practice/{subject}/{topic}", practice_topic, methods=["GET"]),
+        Route("/api/submit", submit_answer, methods=["POST"]),
+        Route("/api/submit/batch", submit_batch, methods=["POST"]),
+        Route("/api/subject_report/{subject}", subject_report, methods=["GET"]),
+        Route("/api/cohort_report/{subject}", cohort_report, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/metrics/profile", profile, methods=["GET"]),
+    ]
+
+    middleware = [
+        Middleware(RequestMetrics),
+        Middleware(SessionMiddleware, secret_key=secret_key),
+        Middleware(ShardRouting, container=container)
+    ]
+    if compress_min_bytes:
+        middleware.append(Middleware(CompressionValidators))
+        middleware.append(Middleware(
+            GZipMiddleware, minimum_size=compress_min_bytes,
+            compresslevel=compress_level
+        ))
+
+    return Starlette(routes=routes, middleware=middleware)
+
+
+# -------------------------
+# Default App
+# -------------------------
+
+from app import COMPRESS_LEVEL, COMPRESS_MIN_BYTES, CONTAINER, app as flask_app
+
+app = create_asgi_app(
+    CONTAINER, flask_app.secret_key,
+    compress_min_bytes=COMPRESS_MIN_BYTES, compress_level=COMPRESS_LEVEL
+)
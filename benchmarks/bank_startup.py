@@ -0,0 +1,66 @@
+# benchmarks/bank_startup.py
+
+"""
+Startup time and resident memory of loading the question bank from
+JSON vs mapping the compiled bank, on a synthetic bank of that size.
+
+Usage:
+    python -m benchmarks.bank_startup --questions 200000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import synthetic_bank
+from models.question_bank_file import compile_question_bank
+
+
+LOADER = """
+import os, sys, time
+start = time.perf_counter()
+from models.question_bank_file import load_question_index
+index = load_question_index(sys.argv[1])
+bucket = index.bucket("Mathematics", "Topic 0", "medium")
+text = bucket[0]["text"]
+elapsed = time.perf_counter() - start
+with open("/proc/self/statm") as f:
+    rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+print(f"{elapsed:.3f} {rss:.1f}")
+"""
+
+
+def measure(path):
+    output = subprocess.run(
+        [sys.executable, "-c", LOADER, path],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout.split()
+    return float(output[0]), float(output[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    bank = synthetic_bank(args.questions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "bank.json")
+        compiled_path = os.path.join(tmp, "compiled.qbin")
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(bank, f)
+        compile_question_bank(bank, compiled_path)
+
+        for label, path in (("json", json_path), ("compiled", compiled_path)):
+            seconds, rss = measure(path)
+            print(f"{label:9s} startup {seconds * 1000:9.1f} ms   RSS {rss:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
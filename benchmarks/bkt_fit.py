@@ -0,0 +1,271 @@
+# benchmarks/bkt_fit.py
+
+"""
+BKT mastery model: fit speed, correctness and parameter recovery.
+
+- the vectorized forward-backward pass is checked against a scalar
+  reference on a sample of sequences
+- EM must never decrease the log likelihood
+- N synthetic attempts drawn from known per-topic parameters are
+  refitted; recovered parameters and time per EM iteration are reported
+- the same data written through StudentModels and an EventLog is
+  refitted with fit_event_logs (the nightly job's path)
+- the online update (integer mastery over full-precision P(known))
+  is compared with exact floating-point BKT, and timed against the
+  step model
+
+Usage:
+    python -m benchmarks.bkt_fit
+    python -m benchmarks.bkt_fit --attempts 20000000
+"""
+
+import argparse
+import math
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ml.knowledge_tracing import Sequences, fit_bkt, fit_event_logs, forward_backward
+from models.event_log import EventLog
+from models.mastery_model import BKTMasteryModel, BKTParams, StepMasteryModel
+from models.student_model import StudentModel
+
+
+SUBJECT = "Mathematics"
+
+
+def true_params(n_skills, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(0.1, 0.6, n_skills),   # prior
+        rng.uniform(0.05, 0.3, n_skills),  # learn
+        rng.uniform(0.05, 0.25, n_skills), # guess
+        rng.uniform(0.05, 0.2, n_skills)   # slip
+    )
+
+
+def synthetic_sequences(n_attempts, n_skills, params, mean_length=12, seed=0):
+    """Sequences of simulated attempts (geometric lengths) drawn from params."""
+    rng = np.random.default_rng(seed)
+    prior, learn, guess, slip = params
+
+    lengths = rng.geometric(1 / mean_length, size=n_attempts // mean_length * 2)
+    lengths = lengths[np.cumsum(lengths) <= n_attempts]
+    n_sequences = len(lengths)
+
+    sequence = np.repeat(np.arange(n_sequences), lengths)
+    order = np.arange(len(sequence)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    skill_of_sequence = rng.integers(0, n_skills, n_sequences)
+    skill = skill_of_sequence[sequence]
+
+    sequences = Sequences(skill, sequence, order, np.zeros(len(sequence), dtype=bool))
+
+    # Simulate position by position on the position-major layout
+    known = rng.random(n_sequences) < prior[sequences.skill[:n_sequences]]
+    correct = np.empty(sequences.n_attempts, dtype=bool)
+    for lo, hi, _ in sequences.slices():
+        k = known[:hi - lo]
+        s = sequences.skill[lo:hi]
+        u = rng.random(hi - lo)
+        correct[lo:hi] = np.where(k, u >= slip[s], u < guess[s])
+        known = k | (rng.random(hi - lo) < learn[s])
+
+    sequences.correct = correct
+    return sequences
+
+
+def reference_forward_backward(outcomes, prior, learn, guess, slip):
+    """Scalar two-state HMM smoother for one sequence: (ll, gamma, xi)."""
+    predicted, filtered, ll = [], [], 0.0
+    p = prior
+    for c in outcomes:
+        e1, e0 = (1 - slip, guess) if c else (slip, 1 - guess)
+        evidence = p * e1 + (1 - p) * e0
+        f = p * e1 / evidence
+        ll += math.log(evidence)
+        predicted.append(p)
+        filtered.append(f)
+        p = f + (1 - f) * learn
+
+    gamma = filtered[:]
+    xi = [0.0] * len(outcomes)
+    for t in range(len(outcomes) - 2, -1, -1):
+        ratio = gamma[t + 1] / predicted[t + 1]
+        xi[t] = (1 - filtered[t]) * learn * ratio
+        gamma[t] = filtered[t] * ratio
+
+    return ll, gamma, xi
+
+
+def check_reference(params, seed=1):
+    """Max abs difference of vectorized vs scalar smoothing on small data."""
+    sequences = synthetic_sequences(5000, 4, params, seed=seed)
+    test = tuple(np.asarray(p[:4]) for p in params)
+    ll, gamma, xi = forward_backward(sequences, *test)
+
+    # Rank r's rows: the r-th row of each position's slice
+    worst, ll_ref = 0.0, 0.0
+    rank_rows = [[] for _ in range(sequences.n_sequences)]
+    for lo, hi, _ in sequences.slices():
+        for r in range(hi - lo):
+            rank_rows[r].append(lo + r)
+
+    for rows in rank_rows:
+        s = sequences.skill[rows[0]]
+        ref_ll, ref_gamma, ref_xi = reference_forward_backward(
+            sequences.correct[rows].tolist(), *(float(p[s]) for p in test)
+        )
+        ll_ref += ref_ll
+        worst = max(
+            worst,
+            float(np.abs(gamma[rows] - ref_gamma).max()),
+            float(np.abs(xi[rows] - ref_xi).max())
+        )
+
+    return worst, abs(ll - ll_ref) / abs(ll_ref)
+
+
+def online_error(params, topics, n_students=2000, steps=40, seed=2):
+    """
+    |student mastery - exact BKT mastery| over simulated learners. The
+    exact update holds P(known) within 0.5%-99.5% like the model's.
+    """
+    rng = np.random.default_rng(seed)
+    prior, learn, guess, slip = params
+    model = BKTMasteryModel({SUBJECT: {
+        topic: BKTParams(prior[k], learn[k], guess[k], slip[k])
+        for k, topic in enumerate(topics)
+    }})
+
+    StudentModel.mastery_model = model
+    errors = []
+    try:
+        for n in range(n_students):
+            student = StudentModel(SUBJECT, topics, student_id=f"s{n}")
+            k = int(rng.integers(len(topics)))
+            p = prior[k]
+            known = rng.random() < prior[k]
+            for _ in range(steps):
+                correct = bool(rng.random() >= slip[k] if known else rng.random() < guess[k])
+                known |= rng.random() < learn[k]
+                student.record_attempt(topics[k], correct)
+
+                p = min(max(p, 0.005), 0.995)
+                e1, e0 = (1 - slip[k], guess[k]) if correct else (slip[k], 1 - guess[k])
+                f = p * e1 / (p * e1 + (1 - p) * e0)
+                p = f + (1 - f) * learn[k]
+                errors.append(abs(student._mastery[k] - 100 * p))
+    finally:
+        StudentModel.mastery_model = StepMasteryModel()
+
+    return float(np.mean(errors)), float(np.max(errors))
+
+
+def record_seconds(model, topics, attempts=200000):
+    StudentModel.mastery_model = model
+    try:
+        student = StudentModel(SUBJECT, topics, student_id="timing")
+        outcomes = [(topics[i % len(topics)], i % 3 != 0) for i in range(attempts)]
+        start = time.perf_counter()
+        for topic, correct in outcomes:
+            student._update_mastery(student._topic_index[topic], correct)
+        return (time.perf_counter() - start) / attempts
+    finally:
+        StudentModel.mastery_model = StepMasteryModel()
+
+
+def event_log_fit(params, topics, tmp, n_students=3000, steps=30, seed=3):
+    """Simulate BKT learners through StudentModels + EventLog, then refit."""
+    rng = np.random.default_rng(seed)
+    prior, learn, guess, slip = params
+    log = EventLog(tmp)
+
+    for n in range(n_students):
+        student = StudentModel(SUBJECT, topics, student_id=f"s{n}")
+        known = rng.random(len(topics)) < prior
+        for _ in range(steps):
+            k = int(rng.integers(len(topics)))
+            correct = bool(rng.random() >= slip[k] if known[k] else rng.random() < guess[k])
+            known[k] |= rng.random() < learn[k]
+            student.record_attempt(topics[k], correct)
+        log.append(f"s{n}:{SUBJECT}", student.pending_events())
+
+    log.commit()
+    fitted = fit_event_logs([log], {SUBJECT: topics}, min_attempts=1)
+    log.close()
+
+    return fitted.get(SUBJECT, {})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=2000000)
+    parser.add_argument("--skills", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    params = true_params(args.skills)
+    failures = []
+
+    worst, ll_gap = check_reference(params)
+    print(f"vectorized vs scalar smoothing: max |diff| {worst:.2e}, log-likelihood rel diff {ll_gap:.2e}")
+    if worst > 1e-3 or ll_gap > 1e-4:
+        failures.append("forward-backward differs from the scalar reference")
+
+    print(f"\nbuilding {args.attempts} attempts over {args.skills} topics ...")
+    start = time.perf_counter()
+    sequences = synthetic_sequences(args.attempts, args.skills, params)
+    layout = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fitted, history = fit_bkt(sequences, args.skills, prior_strength=1.0)
+    elapsed = time.perf_counter() - start
+
+    if any(b < a - 1e-3 * abs(a) for a, b in zip(history, history[1:])):
+        failures.append("EM decreased the log likelihood")
+
+    print(f"layout {layout:.2f}s, EM {len(history)} iterations in {elapsed:.2f}s "
+          f"({elapsed / len(history):.3f}s/iteration, "
+          f"{sequences.n_attempts * len(history) / elapsed / 1e6:.1f}M attempt-iterations/s)")
+    print(f"mean log likelihood per attempt: {history[0] / sequences.n_attempts:.4f} -> "
+          f"{history[-1] / sequences.n_attempts:.4f}")
+
+    print(f"\n{'param':8} {'mean |error|':>12}")
+    for name, true, estimate in zip(("prior", "learn", "guess", "slip"), params, fitted):
+        error = float(np.abs(true - estimate).mean())
+        print(f"{name:8} {error:12.4f}")
+        if error > 0.05:
+            failures.append(f"{name} not recovered (mean error {error:.3f})")
+
+    topics = [f"Topic {k}" for k in range(8)]
+    params = tuple(p[:len(topics)] for p in params)
+    tmp = tempfile.mkdtemp()
+    try:
+        recovered = event_log_fit(params, topics, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    learn_error = np.mean([abs(recovered[t]["learn"] - params[1][k]) for k, t in enumerate(topics)])
+    print(f"\nevent log refit ({len(recovered)} topics): mean |learn error| {learn_error:.4f}")
+    if len(recovered) != len(topics) or learn_error > 0.08:
+        failures.append("event log refit did not recover the parameters")
+
+    mean_error, max_error = online_error(params, topics)
+    print(f"online update vs exact BKT: mean |mastery diff| {mean_error:.2f}, max {max_error:.2f} points")
+    if max_error > 0.5 + 1e-9:
+        failures.append("online update drifts from exact BKT beyond rounding")
+
+    bkt = BKTMasteryModel(default=BKTParams())
+    print(f"per-attempt mastery update: step {record_seconds(StepMasteryModel(), topics) * 1e9:.0f} ns, "
+          f"bkt {record_seconds(bkt, topics) * 1e9:.0f} ns")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
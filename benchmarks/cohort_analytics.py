@@ -0,0 +1,178 @@
+# benchmarks/cohort_analytics.py
+
+"""
+Cohort analytics at district scale: columnar CohortService vs a
+per-student Python loop over StudentModels.
+
+Stores N synthetic students (SQLite backend + compacted event log),
+then times the cold matrix build (one backend scan), the full cohort
+report, a class-sized report, and the per-student loop computing the
+same per-topic means. The two results are checked against each other.
+Error trends are also read from the same events left uncompacted in
+segments (first and repeated reports) and must match.
+
+Usage:
+    python -m benchmarks.cohort_analytics
+    python -m benchmarks.cohort_analytics --students 50000 --topics 20
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from models.event_log import EventLog
+from models.student_model import StudentModel
+from models.student_store import SQLiteBackend, StudentStore, student_key
+from services.cohort_service import CohortService
+
+
+SUBJECT = "Mathematics"
+
+
+def synthetic_states(n_students, topics, events_per_student, seed=0):
+    """(student_id, state, events) with varied mastery and recent results."""
+    rng = random.Random(seed)
+    day = 86400
+    start = time.time() - 30 * day
+
+    for n in range(n_students):
+        student = StudentModel(SUBJECT, topics, student_id=f"s{n}")
+        skill = rng.gauss(0, 1)
+
+        for k in range(events_per_student):
+            topic = rng.choice(topics)
+            correct = rng.random() < 1 / (1 + 2.718 ** -(skill + k / events_per_student))
+            student.record_attempt(
+                topic, correct, question_id=rng.randrange(1000),
+                timestamp=start + rng.random() * 30 * day
+            )
+
+        events = student.pending_events()
+        student.mark_logged(student.history.total)
+        student.trim_history(0)
+        yield student.student_id, student.to_dict(), events
+
+
+def per_student_means(students, topics):
+    """The pre-cohort approach: loop over StudentModels in Python."""
+    totals = {t: 0 for t in topics}
+    counts = {t: 0 for t in topics}
+
+    for student in students:
+        for topic, mastery in student.get_mastery_overview().items():
+            if student.attempts[topic]:
+                totals[topic] += mastery
+                counts[topic] += 1
+            student.get_recent_error_rate(topic)
+
+    return {t: totals[t] / counts[t] for t in topics if counts[t]}
+
+
+def timed(fn, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--events", type=int, default=20,
+                        help="logged attempts per student")
+    parser.add_argument("--class-size", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    topics = [f"Topic {t}" for t in range(args.topics)]
+    tmp = tempfile.mkdtemp()
+
+    try:
+        backend = SQLiteBackend(f"{tmp}/students.db")
+        event_log = EventLog(f"{tmp}/events")
+        uncompacted = EventLog(f"{tmp}/segments", compact_after=0)
+        models, states = [], {}
+
+        print(f"generating {args.students} students x {args.events} attempts ...")
+        for student_id, state, events in synthetic_states(args.students, topics, args.events):
+            states[student_key(student_id, SUBJECT)] = state
+            event_log.append(student_key(student_id, SUBJECT), events)
+            uncompacted.append(student_key(student_id, SUBJECT), events)
+            models.append(StudentModel.from_dict(state))
+            if len(states) == 5000:
+                backend.save_many(states)
+                states = {}
+        backend.save_many(states)
+        event_log.commit()
+        event_log.checkpoint()
+        event_log.compact()
+        uncompacted.commit()
+
+        store = StudentStore(
+            backend, lambda student_id, subject: StudentModel(subject, topics, student_id),
+            event_log=event_log
+        )
+
+        start = time.perf_counter()
+        matrix = store.cohort(SUBJECT, topics)
+        build = time.perf_counter() - start
+
+        report_time, report = timed(
+            lambda: CohortService(matrix, event_log).generate_cohort_report()
+        )
+        roster = [f"s{n}" for n in random.Random(1).sample(range(args.students), args.class_size)]
+        class_time, _ = timed(
+            lambda: CohortService(matrix, event_log, roster).generate_cohort_report()
+        )
+        aggregates_time, _ = timed(lambda: CohortService(matrix).generate_cohort_report())
+        first_segments_time, _ = timed(
+            lambda: CohortService(matrix, uncompacted).error_trends(), repeat=1
+        )
+        segments_time, segment_trends = timed(
+            lambda: CohortService(matrix, uncompacted).error_trends()
+        )
+        loop_time, loop_means = timed(lambda: per_student_means(models, topics), repeat=1)
+
+        print(f"\n{'operation':40} {'seconds':>9}")
+        print(f"{'cold matrix build (backend scan)':40} {build:9.3f}")
+        print(f"{'cohort report (aggregates only)':40} {aggregates_time:9.3f}")
+        print(f"{'cohort report (+ error trends)':40} {report_time:9.3f}")
+        print(f"{'class report (' + str(args.class_size) + ' students)':40} {class_time:9.3f}")
+        print(f"{'error trends, uncompacted (first)':40} {first_segments_time:9.3f}")
+        print(f"{'error trends, uncompacted (repeated)':40} {segments_time:9.3f}")
+        print(f"{'per-student loop (topic means only)':40} {loop_time:9.3f}")
+
+        means = {
+            topic: stats["mean"]
+            for topic, stats in report["mastery_distribution"].items() if stats["students"]
+        }
+        mismatched = [t for t in loop_means if abs(round(loop_means[t], 1) - means.get(t, -1)) > 0.05]
+        trend_attempts = sum(
+            bucket["attempts"] for buckets in report["error_trends"].values() for bucket in buckets
+        )
+
+        print(f"\nstudents {report['students']}, "
+              f"needing intervention {report['needs_intervention']['count']}, "
+              f"weakest {[t['topic'] for t in report['weakest_topics']]}")
+
+        if mismatched or report["students"] != args.students \
+                or trend_attempts != args.students * args.events:
+            print(f"MISMATCH: topics {mismatched}, trend attempts {trend_attempts}")
+            raise SystemExit(1)
+        if segment_trends != report["error_trends"]:
+            print("MISMATCH: error trends differ between archive and segments")
+            raise SystemExit(1)
+        print("OK: cohort aggregates match the per-student loop")
+
+        store.close()
+        uncompacted.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
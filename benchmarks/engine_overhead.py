@@ -0,0 +1,65 @@
+# benchmarks/engine_overhead.py
+
+"""
+Per-request overhead of building engines per request (the old routes)
+vs reusing the shared ServiceContainer services.
+
+Usage:
+    python -m benchmarks.engine_overhead --requests 20000
+"""
+
+import argparse
+import json
+import time
+
+from engine.adaptive_engine import AdaptiveEngine
+from ml.adaptive_ml import AdaptiveML
+from models.question_index import QuestionIndex
+from models.student_model import StudentModel
+from services.practice_service import PracticeService
+
+
+def per_request(question_index, student, topic):
+    engine = AdaptiveEngine()
+    ml = AdaptiveML()
+    service = PracticeService(engine, ml, question_index)
+    return service.get_next_question(student, "Mathematics", forced_topic=topic)
+
+
+def shared(service, student, topic):
+    return service.get_next_question(student, "Mathematics", forced_topic=topic)
+
+
+def time_per_call(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--bank", default="data/question_bank.json")
+    args = parser.parse_args(argv)
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        question_index = QuestionIndex(json.load(f))
+
+    topics = list(question_index.topics("Mathematics"))
+    student = StudentModel("Mathematics", topics)
+    service = PracticeService(AdaptiveEngine(), AdaptiveML(), question_index)
+    topic = topics[0]
+
+    construct = time_per_call(lambda: (AdaptiveEngine(), AdaptiveML()), args.requests)
+    before = time_per_call(lambda: per_request(question_index, student, topic), args.requests)
+    after = time_per_call(lambda: shared(service, student, topic), args.requests)
+
+    print(f"engine construction only   {construct:8.2f} us/request")
+    print(f"per-request engines        {before:8.2f} us/request")
+    print(f"shared container services  {after:8.2f} us/request")
+    print(f"saved                      {before - after:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/event_replay.py
+
+"""
+Students rebuilt per second from the event log: latest snapshot plus
+the log tail vs replaying each student's full history.
+
+Usage:
+    python -m benchmarks.event_replay --students 2000 --attempts 200
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from models.event_log import EventLog
+from models.student_model import StudentModel
+from models.student_store import SQLiteBackend, StudentStore, student_key
+
+
+SUBJECT = "Mathematics"
+TOPICS = ("Fractions", "Decimals", "Arithmetic")
+
+
+def populate(store, n_students, n_attempts, tail, seed=0):
+    """Record attempts; the last `tail` per student are logged but not snapshotted."""
+    rng = random.Random(seed)
+    students = [
+        store.get_or_create(f"student-{i}", SUBJECT) for i in range(n_students)
+    ]
+
+    for n in range(n_attempts):
+        for student in students:
+            student.record_attempt(
+                rng.choice(TOPICS), rng.random() < 0.6,
+                question_id=rng.randrange(150)
+            )
+            store.mark_dirty(student, flush=False)
+
+        if n == n_attempts - tail - 1:
+            store.flush(block=True)
+
+    # Commit the tail to the log only, as if the process died before
+    # the snapshots were saved
+    for student in students:
+        store.event_log.append(
+            student_key(student.student_id, SUBJECT), student.pending_events()
+        )
+    store.event_log.commit()
+
+    return [student.get_mastery_overview() for student in students]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--tail", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        def open_store():
+            return StudentStore(
+                SQLiteBackend(os.path.join(tmp, "students.db")),
+                factory=lambda student_id, subject: StudentModel(
+                    subject, TOPICS, student_id=student_id
+                ),
+                max_size=args.students * 2,
+                event_log=EventLog(os.path.join(tmp, "events"), segment_bytes=2**20)
+            )
+
+        store = open_store()
+        expected = populate(store, args.students, args.attempts, args.tail)
+        store.backend.close()
+        store.event_log.close()
+
+        event_log = EventLog(os.path.join(tmp, "events"), segment_bytes=2**20)
+        start = time.perf_counter()
+        folded = event_log.compact()
+        print(f"compaction: {folded} segments in {time.perf_counter() - start:.2f}s")
+        event_log.close()
+
+        # Snapshot + tail
+        store = open_store()
+        start = time.perf_counter()
+        rebuilt = store.recover()
+        snapshot_rate = args.students / (time.perf_counter() - start)
+
+        mismatches = sum(
+            store.get(f"student-{i}", SUBJECT).get_mastery_overview() != expected[i]
+            for i in range(args.students)
+        )
+
+        # Full history replay
+        start = time.perf_counter()
+        for i in range(args.students):
+            student = StudentModel(SUBJECT, TOPICS, student_id=f"student-{i}")
+            student.replay(store.event_log.events(student_key(f"student-{i}", SUBJECT)))
+            mismatches += student.get_mastery_overview() != expected[i]
+        full_rate = args.students / (time.perf_counter() - start)
+        store.close()
+
+        print(f"snapshot + tail   {snapshot_rate:10.0f} students/s  ({rebuilt} had a tail)")
+        print(f"full replay       {full_rate:10.0f} students/s  ({args.attempts} attempts each)")
+        print("OK" if not mismatches else f"FAILED: {mismatches} students diverge")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/explain_cohort.py
+
+"""
+Batch focus explanations for a large cohort (weekly parent emails).
+
+Builds a CohortMatrix of N synthetic students and compares
+AIExplanationEngine.explain_cohort against explaining each student in
+a Python loop. A sample of real StudentModels is also checked: the
+batch must pick the same focus topic and text as explain_student_focus.
+
+Usage:
+    python -m benchmarks.explain_cohort
+    python -m benchmarks.explain_cohort --students 300000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from models.cohort_matrix import CohortMatrix
+from models.student_model import StudentModel
+from services.ai_explanation import AIExplanationEngine
+
+
+SUBJECT = "Mathematics"
+
+
+def random_students(n, topics, seed=0):
+    rng = random.Random(seed)
+    students = []
+
+    for s in range(n):
+        student = StudentModel(SUBJECT, topics, student_id=f"s{s}")
+        for _ in range(rng.randint(0, 40)):
+            student.record_attempt(rng.choice(topics), rng.random() < 0.55)
+        students.append(student)
+
+    return students
+
+
+def synthetic_matrix(n, topics, seed=0):
+    """CohortMatrix filled through update() with compact synthetic states."""
+    rng = np.random.default_rng(seed)
+    t = len(topics)
+
+    mastery = rng.integers(0, 101, size=(n, t))
+    attempts = rng.integers(0, 30, size=(n, t))
+    correct = (attempts * rng.random((n, t))).astype(int)
+    recent = rng.integers(0, 2, size=(n, t, 5))
+
+    matrix = CohortMatrix(SUBJECT, topics, capacity=n)
+    for s in range(n):
+        matrix.update(f"s{s}", {
+            "topics": topics,
+            "mastery": mastery[s].tolist(),
+            "attempts": attempts[s].tolist(),
+            "correct_attempts": correct[s].tolist(),
+            "recent_window": {"size": 5, "mode": "window"},
+            "recent_results": {
+                topic: recent[s, k, :min(5, attempts[s, k])].tolist()
+                for k, topic in enumerate(topics)
+            }
+        })
+
+    return matrix
+
+
+def per_student(engine, matrix, locale):
+    """Reference: explain each row with scalar Python."""
+    results = []
+    mastery = matrix.mastery.tolist()
+    errors = matrix.recent_error_rates.tolist()
+    attempts = matrix.attempts.tolist()
+
+    for s, student_id in enumerate(matrix.student_ids):
+        focus = min(
+            range(len(matrix.topics)),
+            key=lambda t: (mastery[s][t], -errors[s][t], t)
+        )
+        results.append((
+            student_id, matrix.topics[focus],
+            engine.explain_focus(
+                matrix.topics[focus], mastery[s][focus],
+                np.float32(errors[s][focus]), attempts[s][focus], locale
+            )
+        ))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=300000)
+    parser.add_argument("--topics", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    topics = [f"Topic {t}" for t in range(args.topics)]
+    engine = AIExplanationEngine()
+    failures = []
+
+    # Real students: batch == per-student explanations
+    students = random_students(2000, topics)
+    matrix = CohortMatrix(SUBJECT, topics)
+    for student in students:
+        matrix.update(student.student_id, student.to_dict())
+
+    locales = {s.student_id: random.Random(s.student_id).choice(["en", "es"]) for s in students}
+    for (student_id, topic, text), student in zip(engine.explain_cohort(matrix, locales), students):
+        expected = engine.explain_student_focus(student, locales[student_id])
+        if topic != student.get_focus_topic() or text != expected:
+            failures.append(f"{student_id}: {topic!r} {text!r} != {expected!r}")
+
+    print(f"building a {args.students}-student matrix ...")
+    matrix = synthetic_matrix(args.students, topics)
+
+    start = time.perf_counter()
+    batch = engine.explain_cohort(matrix, "en")
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loop = per_student(engine, matrix, "en")
+    loop_time = time.perf_counter() - start
+
+    if batch != loop:
+        failures.append("batch differs from the per-student loop")
+
+    distinct = len({text for _, _, text in batch})
+    print(f"\n{'mode':28} {'seconds':>8} {'students/s':>12}")
+    print(f"{'explain_cohort (batch)':28} {batch_time:8.3f} {args.students / batch_time:12.0f}")
+    print(f"{'per-student loop':28} {loop_time:8.3f} {args.students / loop_time:12.0f}")
+    print(f"{distinct} distinct explanations rendered, cache {engine._render.cache_info()}")
+
+    if failures:
+        print(f"MISMATCH ({len(failures)}): {failures[0]}")
+        sys.exit(1)
+    print("OK: batch explanations match per-student explanations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/load_test.py
+
+"""
+Local load test comparing the WSGI (Flask) and ASGI (Starlette) modes.
+
+Each simulated learner keeps one keep-alive connection and session
+cookie and loops practice → submit. Reports requests/sec and latency
+percentiles per mode.
+
+Usage:
+    python -m benchmarks.load_test                       # spawn both modes
+    python -m benchmarks.load_test --mode asgi --sessions 200
+    python -m benchmarks.load_test --url http://127.0.0.1:8000   # existing server
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+SERVERS = {
+    "wsgi": [
+        sys.executable, "-c",
+        "import sys; from werkzeug.serving import run_simple; from app import app; "
+        "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)"
+    ],
+    "asgi": [
+        sys.executable, "-m", "uvicorn", "asgi:app",
+        "--host", "127.0.0.1", "--log-level", "warning", "--port"
+    ],
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def start_server(mode, port):
+    env = dict(os.environ)
+    tmp = tempfile.mkdtemp()
+    env["NEXORA_STUDENT_DB"] = os.path.join(tmp, "students.db")
+    env["NEXORA_EVENT_LOG"] = os.path.join(tmp, "events")
+
+    process = subprocess.Popen(
+        SERVERS[mode] + [str(port)], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/practice/Mathematics/Fractions")
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+def learner(url, duration, topics, latencies, errors, seed):
+    rng = random.Random(seed)
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    cookie = None
+    deadline = time.monotonic() + duration
+
+    def call(method, path, body=None):
+        nonlocal cookie
+        headers = {"Content-Type": "application/json"}
+        if cookie:
+            headers["Cookie"] = cookie
+
+        start = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+
+        if response.status != 200:
+            errors.append(response.status)
+        set_cookie = response.getheader("Set-Cookie")
+        if set_cookie:
+            cookie = set_cookie.split(";", 1)[0]
+
+    while time.monotonic() < deadline:
+        topic = rng.choice(topics)
+        try:
+            call("GET", f"/api/practice/Mathematics/{topic}")
+            call("POST", "/api/submit", json.dumps({
+                "topic": topic, "correct": rng.random() < 0.6
+            }))
+        except (OSError, http.client.HTTPException):
+            errors.append("connection")
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+
+
+def run_load(url, sessions, duration, topics):
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=learner, args=(url, duration, topics, latencies, errors, n))
+        for n in range(sessions)
+    ]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=["wsgi", "asgi", "both"], default="both")
+    parser.add_argument("--url", help="target an already running server instead")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    topics = ["Fractions", "Decimals", "Arithmetic"]
+    targets = [("url", args.url)] if args.url else [
+        (mode, None) for mode in (["wsgi", "asgi"] if args.mode == "both" else [args.mode])
+    ]
+
+    print(f"{'mode':6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for offset, (mode, url) in enumerate(targets):
+        process = None
+        if url is None:
+            port = args.port + offset
+            process = start_server(mode, port)
+            url = f"http://127.0.0.1:{port}"
+        try:
+            result = run_load(url, args.sessions, args.duration, topics)
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+        print(f"{mode:6} {result['requests']:9d} {result['errors']:7d} "
+              f"{result['rps']:9.0f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
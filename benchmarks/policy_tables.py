@@ -0,0 +1,158 @@
+# benchmarks/policy_tables.py
+
+"""
+Compiled policy tables vs the AdaptiveEngine / AdaptiveML functions.
+
+Checks the tables are equivalent to the functions for the default
+tunables, config/tunables.json and randomized configurations, and
+that every difficulty band edge maps to its band (the default bands
+against their literal labels), then times the per-request decisions
+both ways.
+
+Usage:
+    python -m benchmarks.policy_tables
+"""
+
+import json
+import random
+import sys
+import timeit
+
+from engine.adaptive_engine import AdaptiveEngine
+from engine.policy import PolicyTables
+from ml.adaptive_ml import AdaptiveML
+from models.student_model import StudentModel
+
+
+def configurations(seed=0, count=20):
+    """(name, engine tunables, ml tunables) to check equivalence under."""
+    yield "defaults", {}, {}
+
+    with open("config/tunables.json", "r", encoding="utf-8") as f:
+        config = json.load(f)
+    yield "config/tunables.json", config.get("engine", {}), config.get("ml", {})
+
+    rng = random.Random(seed)
+    for n in range(count):
+        low, high = sorted(rng.sample(range(1, 100), 2))
+        yield f"random-{n}", {
+            # Gaps between bands exercise the "medium" fallback
+            "difficulty_bands": {
+                "easy": [0, low], "medium": [low + rng.randint(0, 3), high],
+                "hard": [high + rng.randint(1, 3), 100]
+            },
+            "hint_trigger_attempts": rng.randint(1, 5),
+            "hint_trigger_error_rate": rng.random()
+        }, {
+            "target_success": rng.uniform(0.5, 0.9),
+            "w_mastery": rng.uniform(0.2, 1.0),
+            "w_difficulty": rng.uniform(0.2, 1.0),
+            "ability_scale": rng.uniform(2, 8)
+        }
+
+
+# Default bands: easy 0-40, medium 41-75, hard 76-100
+DEFAULT_EDGES = {
+    0: "easy", 40: "easy", 41: "medium", 75: "medium", 76: "hard", 100: "hard"
+}
+
+
+def band_edge_failures(engine, policy, expected=None):
+    """
+    Mismatches at each band's edges and their neighbours: the table must
+    give the first band containing the mastery, "medium" in gaps.
+    expected: {mastery: label} checked literally as well.
+    """
+    failures = []
+    bands = engine.DIFFICULTY_BANDS
+
+    def band_of(mastery):
+        for difficulty, (low, high) in bands.items():
+            if low <= mastery <= high:
+                return difficulty
+        return "medium"
+
+    edges = {
+        m for low, high in bands.values() for m in (low - 1, low, high, high + 1)
+        if 0 <= m <= 100
+    }
+    for m in sorted(edges):
+        if policy.select_difficulty(m) != band_of(m):
+            failures.append(f"mastery {m}: {policy.select_difficulty(m)} != {band_of(m)}")
+
+    for m, label in (expected or {}).items():
+        if policy.select_difficulty(m) != label:
+            failures.append(f"mastery {m}: {policy.select_difficulty(m)} != {label}")
+        if policy.get_difficulty_reasoning(m) != engine.get_difficulty_reasoning(m):
+            failures.append(f"mastery {m}: reasoning differs")
+
+    return failures
+
+
+def sample_students(topics, count=20, seed=0):
+    rng = random.Random(seed)
+    students = []
+
+    for n in range(count):
+        student = StudentModel("Mathematics", topics, student_id=f"s{n}")
+        for _ in range(rng.randint(0, 12)):
+            student.record_attempt(rng.choice(topics), rng.random() < 0.5)
+        students.append(student)
+
+    return students
+
+
+def main():
+    topics = ["Fractions", "Decimals", "Arithmetic"]
+    students = sample_students(topics)
+    failures = 0
+
+    for name, engine_config, ml_config in configurations():
+        engine = AdaptiveEngine().configure(**engine_config)
+        ml = AdaptiveML().configure(**ml_config)
+        policy = PolicyTables(engine, ml)
+        mismatches = policy.verify(students) + band_edge_failures(
+            engine, policy, DEFAULT_EDGES if name == "defaults" else None
+        )
+
+        if mismatches:
+            failures += 1
+            print(f"{name}: {len(mismatches)} mismatches, e.g. {mismatches[0]}")
+
+    engine, ml = AdaptiveEngine(), AdaptiveML()
+    policy = PolicyTables(engine, ml)
+    masteries = list(range(101))
+    number = 200
+
+    def per_request_functions():
+        for m in masteries:
+            d = engine.select_difficulty(m)
+            engine.get_difficulty_reasoning(m)
+            ml.explain_prediction(m, d, 0.65)
+            float(ml.mastery_to_ability(m))
+
+    def per_request_tables():
+        for m in masteries:
+            d = policy.select_difficulty(m)
+            policy.get_difficulty_reasoning(m)
+            policy.explain_prediction(m, d, 0.65)
+            policy.mastery_to_ability(m)
+
+    compile_time = min(timeit.repeat(lambda: PolicyTables(engine, ml), number=10, repeat=3)) / 10
+    functions = min(timeit.repeat(per_request_functions, number=number, repeat=3))
+    tables = min(timeit.repeat(per_request_tables, number=number, repeat=3))
+    calls = number * len(masteries)
+
+    print(f"compile: {compile_time * 1e3:.2f} ms per configuration")
+    print(f"decisions per request (difficulty, reasoning, explanation, ability):")
+    print(f"  functions {functions / calls * 1e6:6.2f} us")
+    print(f"  tables    {tables / calls * 1e6:6.2f} us  ({functions / tables:.1f}x)")
+
+    if failures:
+        print(f"FAILED: {failures} configurations differ from the functions")
+        sys.exit(1)
+    print("OK: tables equal the functions under every configuration")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/response_encoding.py
+
+"""
+Payload size and encoding cost of the quiz API responses.
+
+Serves practice / submit / subject-report responses for synthetic
+students through the services (as the routes do), in full and compact
+(verbose=false) form, then compares:
+- bytes on the wire, raw and gzipped
+- building + encoding time with Flask's default jsonify settings
+  (sorted keys, ASCII escapes) vs services.responses.dumps
+
+Usage:
+    python -m benchmarks.response_encoding
+    python -m benchmarks.response_encoding --students 500 --steps 20
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+
+from benchmarks.synthetic import synthetic_bank
+from models.question_index import QuestionIndex
+from models.student_model import StudentModel
+from models.student_store import LocalRedis, RedisBackend, StudentStore
+from services.container import ServiceContainer
+from services.responses import ResponseOptions, dumps, loads, orjson
+from services.subject_service import SubjectService
+
+
+SUBJECT = "Mathematics"
+
+
+def flask_default_dumps(obj):
+    """What jsonify produced before: DefaultJSONProvider settings."""
+    return json.dumps(obj, sort_keys=True, ensure_ascii=True).encode("utf-8") + b"\n"
+
+
+def serve(container, students, steps, options, prefix, seed=0):
+    """{endpoint: [response, ...]} and seconds spent building them."""
+    rng = random.Random(seed)
+    topics = container.question_index.topics(SUBJECT)
+    responses = {"practice": [], "submit": [], "subject_report": []}
+    elapsed = 0.0
+
+    for s in range(students):
+        student_id = f"{prefix}-{s}"
+
+        for _ in range(steps):
+            with container.student_lock(student_id, SUBJECT) as student:
+                start = time.perf_counter()
+                question = options.shape(container.practice.get_next_question(
+                    student, SUBJECT, forced_topic=rng.choice(topics),
+                    verbose=options.verbose
+                ))
+                result = options.shape(container.submission.submit(
+                    student, question["topic"], rng.random() < 0.6,
+                    question_id=question["question_id"], verbose=options.verbose
+                ))
+                elapsed += time.perf_counter() - start
+
+            responses["practice"].append(question)
+            responses["submit"].append(result)
+
+        with container.student_lock(student_id, SUBJECT) as student:
+            start = time.perf_counter()
+            report = options.shape(
+                SubjectService(student).generate_subject_report(verbose=options.verbose)
+            )
+            elapsed += time.perf_counter() - start
+        responses["subject_report"].append(report)
+
+    return responses, elapsed
+
+
+def encode_seconds(encode, payloads, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            encode(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = QuestionIndex(synthetic_bank(3000, n_topics=10))
+    store = StudentStore(
+        RedisBackend(LocalRedis()),
+        factory=lambda student_id, subject: StudentModel(
+            subject, index.topics(subject), student_id=student_id
+        )
+    )
+    container = ServiceContainer(index, store)
+
+    modes = {
+        "full": ResponseOptions(),
+        "compact": ResponseOptions.from_args({"verbose": "false"})
+    }
+
+    # Builds the serving orders, so neither mode pays for them
+    serve(container, 50, args.steps, ResponseOptions(), "warmup")
+
+    served = {
+        name: serve(container, args.students, args.steps, options, name)
+        for name, options in modes.items()
+    }
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"\n{'endpoint':16} {'mode':8} {'bytes':>7} {'gzip':>6} "
+          f"{'default us':>11} {'fast us':>8}")
+
+    failures = []
+    for endpoint in ("practice", "submit", "subject_report"):
+        for name in modes:
+            payloads = served[name][0][endpoint]
+            raw = [flask_default_dumps(p) for p in payloads]
+            fast = [dumps(p) for p in payloads]
+
+            if any(loads(f) != json.loads(r) for f, r in zip(fast, raw)):
+                failures.append(f"{endpoint}/{name}: fast encoding differs")
+
+            size = sum(map(len, fast)) / len(fast)
+            zipped = sum(len(gzip.compress(f, 5)) for f in fast) / len(fast)
+            default_us = encode_seconds(flask_default_dumps, payloads) / len(payloads) * 1e6
+            fast_us = encode_seconds(dumps, payloads) / len(payloads) * 1e6
+
+            print(f"{endpoint:16} {name:8} {size:7.0f} {zipped:6.0f} "
+                  f"{default_us:11.2f} {fast_us:8.2f}")
+
+    steps = args.students * args.steps
+    print(f"\nservice time per learner step: "
+          + ", ".join(f"{name} {served[name][1] / steps * 1e6:.1f} us" for name in modes))
+
+    if failures:
+        print(f"MISMATCH: {failures}")
+        raise SystemExit(1)
+    print("OK: fast encoding decodes to the same payloads")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
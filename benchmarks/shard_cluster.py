@@ -0,0 +1,314 @@
+# benchmarks/shard_cluster.py
+
+"""
+Multi-process sharding harness.
+
+Starts N worker processes (the Flask app, one shard each, sharing one
+SQLite file) and drives simulated students through them with no
+load-balancer affinity: every request goes to a random worker. Midway,
+a shard is added to the tunables file and started. Checks:
+- every response is served by the student's owner on the ring
+- each student's mastery matches a local StudentModel replica, across
+  forwarding and the rebalance (no lost or duplicated updates)
+- the rebalance moves about 1/(N+1) of the students
+
+Usage:
+    python -m benchmarks.shard_cluster
+    python -m benchmarks.shard_cluster --workers 4 --students 200 --steps 30
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from models.student_model import StudentModel
+from services.sharding import SHARD_HEADER, HashRing
+
+
+SUBJECT = "Mathematics"
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# -------------------------
+# Workers
+# -------------------------
+
+def serve(port):
+    """Worker process: the Flask app on 127.0.0.1:port (env configures the shard)."""
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_config(path, shards, vnodes):
+    with open(os.path.join(REPO, "config", "tunables.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    config["sharding"] = {"shards": shards, "vnodes": vnodes}
+
+    # Atomic, so a reloading worker never reads half a file
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    os.replace(path + ".tmp", path)
+
+
+class Cluster:
+    def __init__(self, tmp, vnodes):
+        self.tmp = tmp
+        self.vnodes = vnodes
+        self.config = os.path.join(tmp, "tunables.json")
+        self.shards = {}  # name -> base URL
+        self.ports = {}
+        self.processes = {}
+        self.logs = []
+
+    def add(self, name):
+        """Publish a shard map including `name`, then start its worker."""
+        port = free_port()
+        self.ports[name] = port
+        self.shards[name] = f"http://127.0.0.1:{port}"
+        write_config(self.config, self.shards, self.vnodes)
+
+        env = dict(
+            os.environ,
+            PYTHONPATH=REPO,
+            NEXORA_SHARD=name,
+            NEXORA_CONFIG=self.config,
+            NEXORA_STUDENT_DB=os.path.join(self.tmp, "students.db"),
+            NEXORA_EVENT_LOG=os.path.join(self.tmp, "events")
+        )
+        log = open(os.path.join(self.tmp, f"{name}.log"), "w")
+        self.logs.append(log)
+        self.processes[name] = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.shard_cluster", "--serve", str(port)],
+            cwd=REPO, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+    def wait_ready(self, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        for name, port in self.ports.items():
+            while True:
+                try:
+                    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                    connection.request("GET", "/")
+                    if connection.getresponse().status == 200:
+                        break
+                except OSError:
+                    pass
+                if time.monotonic() > deadline or self.processes[name].poll() is not None:
+                    raise RuntimeError(f"worker {name} did not start; see {name}.log")
+                time.sleep(0.1)
+
+    def poke(self):
+        """One request per worker, so each picks up the new shard map now."""
+        for port in self.ports.values():
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            connection.request("GET", "/")
+            connection.getresponse().read()
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.wait(timeout=10)
+        for log in self.logs:
+            log.close()
+
+
+# -------------------------
+# Students
+# -------------------------
+
+def session_student_id(cookie):
+    """student_id from a Flask session cookie (payload read, not verified)."""
+    from itsdangerous.encoding import base64_decode
+
+    compressed = cookie.startswith(".")
+    payload = base64_decode(cookie.lstrip(".").split(".")[0])
+    return json.loads(zlib.decompress(payload) if compressed else payload)["student_id"]
+
+
+class Student:
+    """A client with its own session cookie and a local replica of its state."""
+
+    def __init__(self, n, seed=0):
+        self.name = f"client-{n}"
+        self.rng = random.Random(seed * 100003 + n)
+        self.cookie = None
+        self.student_id = None
+        self.replica = None
+        self.served_by = []  # (phase, shard)
+        self.errors = []
+
+    def request(self, cluster, method, path, body=None):
+        """Send to a random worker; returns (served-by shard, JSON)."""
+        port = self.rng.choice(list(cluster.ports.values()))
+        headers = {"Content-Type": "application/json"}
+        if self.cookie:
+            headers["Cookie"] = f"session={self.cookie}"
+
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request(method, path, body=json.dumps(body) if body else None, headers=headers)
+        response = connection.getresponse()
+        payload = response.read()
+        connection.close()
+
+        for name, value in response.getheaders():
+            if name.lower() == "set-cookie" and value.startswith("session="):
+                self.cookie = value.split(";")[0][len("session="):]
+                self.student_id = session_student_id(self.cookie)
+
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path}: {response.status} {payload[:200]!r}")
+
+        return response.getheader(SHARD_HEADER), json.loads(payload)
+
+    def step(self, cluster, phase):
+        if self.replica is None:
+            shard, report = self.request(cluster, "GET", f"/api/subject_report/{SUBJECT}?verbose=false")
+            self.replica = StudentModel(SUBJECT, list(report["mastery_overview"]), self.student_id)
+            self.served_by.append((phase, shard))
+
+        topic = self.rng.choice(self.replica.topics)
+        shard, question = self.request(
+            cluster, "GET", f"/api/practice/{SUBJECT}/{topic}?fields=question_id,topic"
+        )
+        self.served_by.append((phase, shard))
+
+        correct = self.rng.random() < 0.6
+        shard, result = self.request(
+            cluster, "POST", "/api/submit?verbose=false",
+            {"subject": SUBJECT, "topic": topic, "correct": correct,
+             "question_id": question["question_id"]}
+        )
+        self.served_by.append((phase, shard))
+
+        self.replica.record_attempt(topic, correct)
+        if result["updated_mastery"] != self.replica.mastery[topic]:
+            self.errors.append(
+                f"{phase}: {topic} mastery {result['updated_mastery']} "
+                f"!= replica {self.replica.mastery[topic]}"
+            )
+
+
+def run_phase(cluster, students, steps, phase, threads):
+    """All students take `steps` steps concurrently; returns requests/s."""
+    def drive(student):
+        for _ in range(steps):
+            try:
+                student.step(cluster, phase)
+            except Exception as e:  # recorded, checked at the end
+                student.errors.append(f"{phase}: {e}")
+                return
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(drive, students))
+    elapsed = time.perf_counter() - start
+
+    requests = sum(1 for s in students for p, _ in s.served_by if p == phase)
+    return requests / elapsed
+
+
+# -------------------------
+# Harness
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--students", type=int, default=120)
+    parser.add_argument("--steps", type=int, default=20, help="steps per student (half before the rebalance)")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="client threads (default: one per student, so "
+                             "every student has unflushed state at the rebalance)")
+    parser.add_argument("--vnodes", type=int, default=128)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return serve(args.serve)
+
+    tmp = tempfile.mkdtemp()
+    cluster = Cluster(tmp, args.vnodes)
+    students = [Student(n) for n in range(args.students)]
+    threads = args.threads or args.students
+    failures = []
+
+    try:
+        for w in range(args.workers):
+            cluster.add(f"w{w}")
+        cluster.wait_ready()
+        before = HashRing(cluster.shards, vnodes=args.vnodes)
+
+        print(f"{args.workers} shards, {args.students} students, random worker per request")
+        rate_before = run_phase(cluster, students, args.steps // 2, "before", threads)
+
+        # Add a shard: the map is published first, then every worker
+        # reloads it (handing off students it lost) before traffic resumes
+        cluster.add(f"w{args.workers}")
+        cluster.wait_ready()
+        time.sleep(2.5)  # > ServiceContainer.reload_interval
+        cluster.poke()
+        after = HashRing(cluster.shards, vnodes=args.vnodes)
+
+        print(f"added shard w{args.workers}")
+        rate_after = run_phase(cluster, students, args.steps - args.steps // 2, "after", threads)
+
+        for student in students:
+            failures += [f"{student.name}: {e}" for e in student.errors]
+            if student.student_id is None:
+                continue
+
+            owners = {"before": before.owner(student.student_id), "after": after.owner(student.student_id)}
+            wrong = [(p, s) for p, s in student.served_by if s != owners[p]]
+            if wrong:
+                failures.append(f"{student.name}: served by {wrong[0][1]}, owner {owners[wrong[0][0]]}")
+
+        ids = [s.student_id for s in students if s.student_id]
+        moved = sum(before.owner(i) != after.owner(i) for i in ids) / max(len(ids), 1)
+        sample = [f"probe-{n}" for n in range(20000)]
+        expected = sum(before.owner(i) != after.owner(i) for i in sample) / len(sample)
+
+        load = {}
+        for student in students:
+            for phase, shard in student.served_by:
+                load.setdefault(phase, {}).setdefault(shard, 0)
+                load[phase][shard] += 1
+
+        print(f"\n{'phase':8} {'requests/s':>11}  per-shard requests")
+        print(f"{'before':8} {rate_before:11.0f}  {dict(sorted(load.get('before', {}).items()))}")
+        print(f"{'after':8} {rate_after:11.0f}  {dict(sorted(load.get('after', {}).items()))}")
+        print(f"\nstudents moved by the rebalance: {moved:.1%} "
+              f"(ring: {expected:.1%}, ideal 1/{args.workers + 1} = {1 / (args.workers + 1):.1%})")
+    finally:
+        cluster.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if failures:
+        print(f"FAILED ({len(failures)}): " + "; ".join(failures[:5]))
+        sys.exit(1)
+    print("OK: every request served by its owning shard, state intact across the rebalance")
+
+
+if __name__ == "__main__":
+    main()
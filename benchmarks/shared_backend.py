@@ -0,0 +1,126 @@
+# benchmarks/shared_backend.py
+
+"""
+Several unsharded workers over one SQLite file: every recorded attempt
+must survive, whichever worker's copy of a student is stale.
+
+Each simulated worker is a StudentStore with its own connection and
+event log. Students are answered through random workers, flushes are
+interleaved, and the short TTL forces reloads, so copies regularly
+fall behind the backend and must be rebased instead of overwriting it.
+
+Usage:
+    python -m benchmarks.shared_backend --workers 4 --students 200
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from models.event_log import EventLog
+from models.student_model import StudentModel
+from models.student_store import SQLiteBackend, StudentStore, student_key
+
+
+SUBJECT = "Mathematics"
+TOPICS = ("Fractions", "Decimals", "Arithmetic")
+
+
+def open_worker(tmp, n, ttl):
+    return StudentStore(
+        SQLiteBackend(os.path.join(tmp, "students.db")),
+        factory=lambda student_id, subject: StudentModel(
+            subject, TOPICS, student_id=student_id
+        ),
+        ttl=ttl,
+        flush_interval=3600,
+        event_log=EventLog(os.path.join(tmp, f"events-{n}"))
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--attempts", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    tmp = tempfile.mkdtemp()
+    failures = []
+
+    try:
+        # A file written before revisions existed is migrated on open
+        legacy = sqlite3.connect(os.path.join(tmp, "students.db"))
+        legacy.execute(
+            "CREATE TABLE students (student_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        legacy.close()
+
+        workers = [open_worker(tmp, n, ttl=0.01) for n in range(args.workers)]
+        recorded = {}
+
+        start = time.perf_counter()
+        for _ in range(args.attempts):
+            store = rng.choice(workers)
+            student_id = f"student-{rng.randrange(args.students)}"
+
+            with store.lock_for(student_id):
+                student = store.get_or_create(student_id, SUBJECT)
+                student.record_attempt(rng.choice(TOPICS), rng.random() < 0.6)
+                store.mark_dirty(student, flush=False)
+            recorded[student_id] = recorded.get(student_id, 0) + 1
+
+            if rng.random() < 0.2:
+                rng.choice(workers).flush(block=True)
+
+        for store in workers:
+            store.flush(block=True)
+        elapsed = time.perf_counter() - start
+
+        check = workers[0].backend
+        lost = 0
+        for student_id, count in recorded.items():
+            state = check.load(student_key(student_id, SUBJECT))
+            stored = sum(state["attempts"]) if state else 0
+            lost += count - stored
+
+        # Rebased attempts are logged once, under distinct seqs
+        seqs = {}
+        for store in workers:
+            for key in {student_key(s, SUBJECT) for s in recorded}:
+                for row in store.event_log.events(key):
+                    seqs.setdefault(key, []).append(row[0])
+        duplicated = sum(len(v) - len(set(v)) for v in seqs.values())
+        logged = sum(len(v) for v in seqs.values())
+
+        for store in workers:
+            store.close()
+
+        print(f"{args.workers} workers, {args.attempts} attempts over "
+              f"{len(recorded)} students in {elapsed:.2f}s")
+        print(f"attempts in the backend: {args.attempts - lost}, in the logs: {logged} "
+              f"({duplicated} duplicate seqs)")
+
+        if lost:
+            failures.append(f"{lost} attempts lost")
+        if duplicated or logged != args.attempts:
+            failures.append("event logs do not hold every attempt exactly once")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# benchmarks/simulate.py
+
+"""
+Offline learner simulation over the service layer or the Flask app.
+
+Synthetic learners (true ability per topic drawn from --ability and
+--spread) work through a synthetic bank: subject report every
+--report-every steps (its focus topic picks what to practice), next
+question, answer, submit. Reports throughput and latency percentiles
+per operation plus learning outcomes, and can gate on a saved baseline.
+
+Usage:
+    python -m benchmarks.simulate --students 200 --steps 50
+    python -m benchmarks.simulate --mode http --save baseline.json
+    python -m benchmarks.simulate --baseline baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test import percentile
+from benchmarks.synthetic import SimulatedLearner, synthetic_bank
+from ml.adaptive_ml import AdaptiveML
+from models.question_index import QuestionIndex
+
+
+OPERATIONS = ("next_question", "submit", "report")
+
+
+# -------------------------
+# Drivers
+# -------------------------
+
+class ServiceDriver:
+    """Calls the services directly, as the routes do (minus HTTP)."""
+
+    def __init__(self, bank, storage, tmp):
+        from models.event_log import EventLog
+        from models.student_model import StudentModel
+        from models.student_store import (
+            LocalRedis, RedisBackend, SQLiteBackend, StudentStore
+        )
+        from services.container import ServiceContainer
+        from services.subject_service import SubjectService
+
+        self.report_service = SubjectService
+        index = QuestionIndex(bank)
+
+        if storage == "memory":
+            backend, event_log = RedisBackend(LocalRedis()), None
+        else:
+            backend = SQLiteBackend(os.path.join(tmp, "students.db"))
+            event_log = EventLog(os.path.join(tmp, "events"))
+
+        self.store = StudentStore(
+            backend,
+            factory=lambda student_id, subject: StudentModel(
+                subject, index.topics(subject), student_id=student_id
+            ),
+            event_log=event_log
+        )
+        self.container = ServiceContainer(index, self.store)
+
+    def next_question(self, student_id, subject, topic):
+        with self.container.student_lock(student_id, subject) as student:
+            return self.container.practice.get_next_question(
+                student, subject, forced_topic=topic
+            )
+
+    def submit(self, student_id, subject, topic, correct, question_id):
+        with self.container.student_lock(student_id, subject) as student:
+            return self.container.submission.submit(
+                student, topic, correct, question_id=question_id
+            )
+
+    def report(self, student_id, subject):
+        with self.container.student_lock(student_id, subject) as student:
+            return self.report_service(student).generate_subject_report()
+
+    def close(self):
+        self.store.close()
+
+
+class HttpDriver:
+    """Goes through the Flask app with one test client (session) per learner."""
+
+    def __init__(self, bank, storage, tmp):
+        bank_path = os.path.join(tmp, "bank.json")
+        with open(bank_path, "w", encoding="utf-8") as f:
+            json.dump(bank, f)
+
+        os.environ["NEXORA_QUESTION_BANK"] = bank_path
+        os.environ["NEXORA_STUDENT_DB"] = os.path.join(tmp, "students.db")
+        os.environ["NEXORA_EVENT_LOG"] = (
+            "" if storage == "memory" else os.path.join(tmp, "events")
+        )
+
+        from app import STUDENT_STORE, app
+
+        self.app = app
+        self.store = STUDENT_STORE
+        self.clients = {}
+
+    def _client(self, student_id):
+        client = self.clients.get(student_id)
+        if client is None:
+            client = self.clients[student_id] = self.app.test_client()
+            with client.session_transaction() as session:
+                session["student_id"] = student_id
+        return client
+
+    def next_question(self, student_id, subject, topic):
+        return self._client(student_id).get(f"/api/practice/{subject}/{topic}").get_json()
+
+    def submit(self, student_id, subject, topic, correct, question_id):
+        return self._client(student_id).post("/api/submit", json={
+            "subject": subject,
+            "topic": topic,
+            "correct": correct,
+            "question_id": question_id
+        }).get_json()
+
+    def report(self, student_id, subject):
+        return self._client(student_id).get(f"/api/subject_report/{subject}").get_json()
+
+    def close(self):
+        self.store.close()
+
+
+DRIVERS = {"service": ServiceDriver, "http": HttpDriver}
+
+
+# -------------------------
+# Simulation
+# -------------------------
+
+def simulate(args):
+    bank = synthetic_bank(
+        args.questions, n_topics=args.topics,
+        subjects=tuple(f"Subject {s}" for s in range(args.subjects)),
+        calibrated=args.calibrated, seed=args.seed
+    )
+    index = QuestionIndex(bank)
+    ml = AdaptiveML()
+
+    learners = []
+    for n in range(args.students):
+        subject = f"Subject {n % args.subjects}"
+        learners.append((
+            f"learner-{n}", subject,
+            SimulatedLearner(
+                index.topics(subject), ability=args.ability, spread=args.spread,
+                learning_rate=args.learning_rate, seed=args.seed + n
+            )
+        ))
+
+    tmp = tempfile.mkdtemp()
+    driver = DRIVERS[args.mode](bank, args.storage, tmp)
+
+    latencies = {op: [] for op in OPERATIONS}
+    focus, final_mastery = {}, {}
+    answered = correct_answers = errors = 0
+
+    def timed(op, fn, *fn_args):
+        start = time.perf_counter()
+        result = fn(*fn_args)
+        latencies[op].append(time.perf_counter() - start)
+        return result
+
+    started = time.perf_counter()
+    try:
+        for step in range(args.steps):
+            for student_id, subject, learner in learners:
+                if step % args.report_every == 0:
+                    report = timed("report", driver.report, student_id, subject)
+                    focus[student_id] = report["focus_topic"]
+
+                payload = timed(
+                    "next_question", driver.next_question,
+                    student_id, subject, focus[student_id]
+                )
+                if not payload or "error" in payload:
+                    errors += 1
+                    continue
+
+                question = index.get(payload["question_id"], subject)
+                a, b = ml.item_params([question], question["difficulty"])
+                correct = learner.answer(payload["topic"], float(a[0]), float(b[0]))
+
+                timed(
+                    "submit", driver.submit, student_id, subject,
+                    payload["topic"], correct, payload["question_id"]
+                )
+                answered += 1
+                correct_answers += correct
+
+        elapsed = time.perf_counter() - started
+
+        for student_id, subject, _ in learners:
+            overview = driver.report(student_id, subject)["mastery_overview"]
+            final_mastery[student_id] = sum(overview.values()) / len(overview)
+    finally:
+        driver.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    operations = {}
+    for op, values in latencies.items():
+        values.sort()
+        operations[op] = {
+            "count": len(values),
+            "per_sec": len(values) / sum(values) if values else 0.0,
+            "p50_us": percentile(values, 50) * 1e6,
+            "p95_us": percentile(values, 95) * 1e6,
+            "p99_us": percentile(values, 99) * 1e6
+        }
+
+    return {
+        "config": {
+            name: getattr(args, name) for name in (
+                "mode", "storage", "students", "steps", "subjects", "topics",
+                "questions", "calibrated", "ability", "spread", "seed"
+            )
+        },
+        "elapsed_s": elapsed,
+        "steps_per_sec": answered / elapsed if elapsed else 0.0,
+        "operations": operations,
+        "learning": {
+            "answered": answered,
+            "errors": errors,
+            "success_rate": correct_answers / answered if answered else 0.0,
+            "target_success": ml.TARGET_SUCCESS,
+            "mean_final_mastery": sum(final_mastery.values()) / len(final_mastery)
+        }
+    }
+
+
+# -------------------------
+# Regression Gate
+# -------------------------
+
+def compare(result, baseline, tolerance, outcome_tolerance):
+    """List of regressions of `result` against `baseline`."""
+    failures = []
+
+    if result["config"] != baseline["config"]:
+        failures.append("configuration differs from the baseline run")
+
+    floor = baseline["steps_per_sec"] * (1 - tolerance)
+    if result["steps_per_sec"] < floor:
+        failures.append(
+            f"throughput {result['steps_per_sec']:.0f} steps/s < {floor:.0f}"
+        )
+
+    for op, stats in result["operations"].items():
+        for metric in ("p50_us", "p99_us"):
+            limit = baseline["operations"][op][metric] * (1 + tolerance)
+            if stats[metric] > limit:
+                failures.append(f"{op} {metric} {stats[metric]:.0f} > {limit:.0f}")
+
+    for metric in ("success_rate",):
+        drift = abs(result["learning"][metric] - baseline["learning"][metric])
+        if drift > outcome_tolerance:
+            failures.append(f"{metric} moved by {drift:.3f} (> {outcome_tolerance})")
+
+    if result["learning"]["errors"] > baseline["learning"]["errors"]:
+        failures.append(
+            f"{result['learning']['errors']} failed requests "
+            f"(baseline {baseline['learning']['errors']})"
+        )
+
+    return failures
+
+
+def print_result(result):
+    print(f"{'operation':14} {'count':>8} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for op, stats in result["operations"].items():
+        print(f"{op:14} {stats['count']:8d} {stats['per_sec']:10.0f} "
+              f"{stats['p50_us']:9.1f} {stats['p95_us']:9.1f} {stats['p99_us']:9.1f}")
+
+    learning = result["learning"]
+    print(f"\n{result['steps_per_sec']:.0f} learner steps/s over {result['elapsed_s']:.2f}s")
+    print(f"success rate {learning['success_rate']:.3f} "
+          f"(target {learning['target_success']:.2f}), "
+          f"mean final mastery {learning['mean_final_mastery']:.1f}, "
+          f"{learning['errors']} errors")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=sorted(DRIVERS), default="service")
+    parser.add_argument("--storage", choices=("memory", "sqlite"), default="memory",
+                        help="http mode always uses SQLite; memory only skips the event log")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--report-every", type=int, default=5)
+    parser.add_argument("--subjects", type=int, default=1)
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=3000,
+                        help="questions per subject")
+    parser.add_argument("--calibrated", type=float, default=0.0,
+                        help="fraction of questions with IRT parameters")
+    parser.add_argument("--ability", type=float, default=0.0)
+    parser.add_argument("--spread", type=float, default=1.0)
+    parser.add_argument("--learning-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--baseline", help="fail on regressions against this JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative latency / throughput regression")
+    parser.add_argument("--outcome-tolerance", type=float, default=0.05,
+                        help="allowed absolute success-rate drift")
+    args = parser.parse_args(argv)
+
+    result = simulate(args)
+    print_result(result)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            failures = compare(result, json.load(f), args.tolerance, args.outcome_tolerance)
+
+        if failures:
+            print("\nREGRESSION:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+        print("\nOK: within tolerance of the baseline")
+
+
+if __name__ == "__main__":
+    main()
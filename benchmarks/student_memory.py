@@ -0,0 +1,104 @@
+# benchmarks/student_memory.py
+
+"""
+Per-student memory footprint: legacy dict-based StudentModel vs the
+compact array-backed one.
+
+Usage:
+    python -m benchmarks.student_memory --students 2000 --attempts 200
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+from models.student_model import StudentModel
+
+
+class LegacyStudentModel:
+    """The original dict/list-based state layout, kept for comparison."""
+
+    def __init__(self, subject, topics):
+        self.subject = subject
+        self.mastery = {topic: 50 for topic in topics}
+        self.attempts = defaultdict(int)
+        self.correct_attempts = defaultdict(int)
+        self.recent_results = defaultdict(list)
+        self.history = []
+        self.MASTERY_STEP_UP = 5
+        self.MASTERY_STEP_DOWN = 3
+        self.RECENT_WINDOW = 5
+
+    def record_attempt(self, topic, is_correct, question_id=None):
+        mastery_before = self.mastery[topic]
+
+        self.attempts[topic] += 1
+        if is_correct:
+            self.correct_attempts[topic] += 1
+
+        self.recent_results[topic].append(is_correct)
+        if len(self.recent_results[topic]) > self.RECENT_WINDOW:
+            self.recent_results[topic].pop(0)
+
+        if is_correct:
+            self.mastery[topic] = min(100, self.mastery[topic] + self.MASTERY_STEP_UP)
+        else:
+            self.mastery[topic] = max(0, self.mastery[topic] - self.MASTERY_STEP_DOWN)
+
+        self.history.append({
+            "timestamp": datetime.utcnow().isoformat(),
+            "topic": topic,
+            "question_id": question_id,
+            "correct": is_correct,
+            "mastery_before": mastery_before,
+            "mastery_after": self.mastery[topic]
+        })
+
+
+def measure(model_cls, n_students, n_attempts, topics, seed=0):
+    """Return bytes allocated per student after n_attempts each."""
+    rng = random.Random(seed)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+
+    students = []
+    for _ in range(n_students):
+        student = model_cls("Mathematics", topics)
+        for _ in range(n_attempts):
+            student.record_attempt(
+                rng.choice(topics), rng.random() < 0.6, rng.randrange(10000)
+            )
+        students.append(student)
+
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (current - baseline) / n_students
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    topics = [f"Topic {i}" for i in range(args.topics)]
+
+    legacy = measure(LegacyStudentModel, args.students, args.attempts, topics)
+    compact = measure(StudentModel, args.students, args.attempts, topics)
+
+    print(f"students={args.students} attempts={args.attempts} topics={args.topics}")
+    print(f"legacy   {legacy:10.0f} bytes/student")
+    print(f"compact  {compact:10.0f} bytes/student")
+    print(f"ratio    {legacy / compact:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/submit_stress.py
+
+"""
+Concurrency stress test for /api/submit.
+
+Many threads submit answers at once, for a few shared students (parallel
+tabs, double clicks) and many distinct ones. Afterwards each student's
+state is checked against its own history:
+- exactly one StudentModel exists per session
+- attempts / correct counts equal the number of submissions
+- mastery equals a sequential replay of the event log history
+- recent windows never exceed their capacity
+
+Exits non-zero if any invariant is violated.
+
+Usage:
+    python -m benchmarks.submit_stress --threads 32 --requests 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="per thread")
+    parser.add_argument("--shared-students", type=int, default=3)
+    parser.add_argument("--cache-size", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    os.environ["NEXORA_STUDENT_DB"] = os.path.join(tmp, "students.db")
+    os.environ["NEXORA_EVENT_LOG"] = os.path.join(tmp, "events")
+    os.environ["NEXORA_STUDENT_CACHE_SIZE"] = str(args.cache_size)
+
+    from app import app, DEFAULT_SUBJECT, QUESTION_INDEX, STUDENT_STORE
+    from models.student_model import StudentModel
+    from models.student_store import student_key
+
+    topics = QUESTION_INDEX.topics(DEFAULT_SUBJECT)
+
+    sys.setswitchinterval(1e-5)  # force frequent thread interleaving
+
+    # Shared students are pre-assigned session IDs that no request has
+    # created yet, so the first requests race on get_or_create
+    shared_ids = [f"shared-{i}" for i in range(args.shared_students)]
+    submitted = {}
+    submitted_lock = threading.Lock()
+    errors = []
+    barrier = threading.Barrier(args.threads)
+
+    def worker(n):
+        rng = random.Random(n)
+        client = app.test_client()
+        student_id = shared_ids[n % len(shared_ids)] if n % 2 else f"solo-{n}"
+
+        with client.session_transaction() as sess:
+            sess["student_id"] = student_id
+
+        barrier.wait()
+        for _ in range(args.requests):
+            topic = rng.choice(topics)
+            correct = rng.random() < 0.55
+            r = client.post("/api/submit", json={"topic": topic, "correct": correct})
+            if r.status_code != 200:
+                errors.append(f"{student_id}: HTTP {r.status_code}")
+                continue
+            with submitted_lock:
+                counts = submitted.setdefault(student_id, {})
+                total, right = counts.get(topic, (0, 0))
+                counts[topic] = (total + 1, right + int(correct))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # -------------------------
+    # Invariants
+    # -------------------------
+
+    # Full history lives in the event log once flushed
+    STUDENT_STORE.flush(block=True)
+
+    for student_id, counts in submitted.items():
+        student = STUDENT_STORE.get(student_id, DEFAULT_SUBJECT)
+        if student is None:
+            errors.append(f"{student_id}: missing from store")
+            continue
+
+        events = STUDENT_STORE.event_log.events(student_key(student_id, DEFAULT_SUBJECT))
+        replay = StudentModel(student.subject, student.topics)
+        replay.replay(events)
+
+        for topic in student.topics:
+            total, right = counts.get(topic, (0, 0))
+            if student.attempts[topic] != total:
+                errors.append(f"{student_id}/{topic}: attempts {student.attempts[topic]} != {total}")
+            if student.correct_attempts[topic] != right:
+                errors.append(f"{student_id}/{topic}: correct {student.correct_attempts[topic]} != {right}")
+            if student.mastery[topic] != replay.mastery[topic]:
+                errors.append(f"{student_id}/{topic}: mastery diverges from replay")
+            if len(student.recent_results.get(topic, [])) > student.RECENT_WINDOW:
+                errors.append(f"{student_id}/{topic}: recent window overflow")
+
+        if len(events) != sum(total for total, _ in counts.values()):
+            errors.append(f"{student_id}: history length mismatch")
+
+    STUDENT_STORE.close()
+
+    total_requests = args.threads * args.requests
+    print(f"{total_requests} submissions from {args.threads} threads "
+          f"in {elapsed:.2f}s ({total_requests / elapsed:.0f} req/s)")
+
+    if errors:
+        print(f"FAILED: {len(errors)} invariant violations")
+        for error in errors[:20]:
+            print("  " + error)
+        return 1
+
+    print(f"OK: invariants hold for {len(submitted)} students")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# benchmarks/synthetic.py
+
+"""
+Synthetic question banks and simulated learners for benchmarks.
+"""
+
+import math
+import random
+
+from models.question_index import assign_question_ids
+
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def synthetic_bank(n_questions, n_topics=20, subjects=("Mathematics",),
+                   calibrated=0.0, seed=0):
+    """
+    Bank with n_questions per subject spread evenly over n_topics
+    ("Topic 0", ...) and the three difficulty labels. A `calibrated`
+    fraction of questions get IRT item parameters.
+    """
+    rng = random.Random(seed)
+    per_topic = n_questions // n_topics
+
+    def question(t, i):
+        q = {
+            "text": f"Question {t}-{i}: what is {i} + {t}? " + "x" * 80,
+            "difficulty": DIFFICULTIES[i % 3],
+            "hint": "Add the two numbers."
+        }
+        if rng.random() < calibrated:
+            q["discrimination"] = round(rng.uniform(0.6, 1.6), 3)
+            q["irt_difficulty"] = round((i % 3 - 1) * 1.5 + rng.gauss(0, 0.5), 3)
+        return q
+
+    bank = {
+        subject: {
+            f"Topic {t}": [question(t, i) for i in range(per_topic)]
+            for t in range(n_topics)
+        }
+        for subject in subjects
+    }
+    assign_question_ids(bank)
+    return bank
+
+
+class SimulatedLearner:
+    """
+    Learner with a true ability per topic on the IRT scale.
+    Answers correctly with probability sigmoid(a * (ability - b)) for
+    the served question's item parameters, and improves a little after
+    every attempt (more after a miss, as feedback is shown).
+    """
+
+    def __init__(self, topics, ability=0.0, spread=1.0, learning_rate=0.02,
+                 seed=0):
+        self.rng = random.Random(seed)
+        self.learning_rate = learning_rate
+        self.ability = {
+            topic: self.rng.gauss(ability, spread) for topic in topics
+        }
+
+    def answer(self, topic, discrimination, item_difficulty):
+        z = discrimination * (self.ability[topic] - item_difficulty)
+        correct = self.rng.random() < 1 / (1 + math.exp(-z))
+
+        self.ability[topic] += self.learning_rate * (1.0 if correct else 1.5)
+        return correct
+
+    def weakest_topic(self):
+        return min(self.ability, key=self.ability.get)
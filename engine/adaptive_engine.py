@@ -1,5 +1,8 @@
 # engine/adaptive_engine.py
 
+from monitoring.metrics import OPERATION_SECONDS, timed
+
+
 class AdaptiveEngine:
     """
     Pedagogical decision layer.
@@ -20,10 +23,29 @@ class AdaptiveEngine:
         self.HINT_TRIGGER_ATTEMPTS = 2
         self.HINT_TRIGGER_ERROR_RATE = 0.5
 
+    def configure(self, difficulty_bands=None, hint_trigger_attempts=None,
+                  hint_trigger_error_rate=None):
+        """
+        Apply tunables loaded from config. Omitted values keep defaults.
+        difficulty_bands: {"easy": [0, 40], ...}
+        """
+        if difficulty_bands is not None:
+            self.DIFFICULTY_BANDS = {
+                difficulty: (int(low), int(high))
+                for difficulty, (low, high) in difficulty_bands.items()
+            }
+        if hint_trigger_attempts is not None:
+            self.HINT_TRIGGER_ATTEMPTS = int(hint_trigger_attempts)
+        if hint_trigger_error_rate is not None:
+            self.HINT_TRIGGER_ERROR_RATE = float(hint_trigger_error_rate)
+
+        return self
+
     # -------------------------
     # Topic Selection
     # -------------------------
 
+    @timed(OPERATION_SECONDS, "engine.select_topic")
     def select_topic(self, student_model, forced_topic=None):
         """
         Select topic for practice.
@@ -67,6 +89,7 @@ class AdaptiveEngine:
     # Hint Logic
     # -------------------------
 
+    @timed(OPERATION_SECONDS, "engine.should_show_hint")
     def should_show_hint(self, student_model, topic):
         """
         Decide whether to show a hint.
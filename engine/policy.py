@@ -0,0 +1,161 @@
+# engine/policy.py
+
+import math
+
+# Mastery is an integer percentage, so every decision that depends on
+# mastery alone has exactly this many inputs
+MASTERY_LEVELS = 101
+
+# Interned explanation strings kept per policy (bounds odd inputs)
+MAX_INTERNED = 100000
+
+
+class PolicyTables:
+    """
+    AdaptiveEngine / AdaptiveML decisions compiled into lookup tables.
+    Built once per configuration (PracticeService is rebuilt on every
+    tunables reload), so the hot path indexes tuples instead of walking
+    difficulty bands, evaluating sigmoids and formatting strings:
+    - difficulty band per mastery
+    - difficulty reasoning per mastery
+    - label-model success probability per mastery x difficulty
+    - IRT ability per mastery and the target-success logit used to
+      bisect the serving order
+    - ML explanation and hint reasoning strings, interned on first use
+      (they include per-question and per-student numbers, so they are
+      not enumerated up front)
+
+    Anything outside the tables (non-integer or out-of-range mastery,
+    unknown difficulty labels) falls through to the engine / ML
+    functions, so results always equal theirs; verify() checks this.
+    """
+
+    def __init__(self, engine, ml):
+        self.engine = engine
+        self.ml = ml
+
+        levels = range(MASTERY_LEVELS)
+        self.difficulty = tuple(engine.select_difficulty(m) for m in levels)
+        self.difficulty_reasoning = tuple(
+            engine.get_difficulty_reasoning(m) for m in levels
+        )
+
+        self.difficulties = tuple(ml.DIFFICULTY_MAP)
+        self.success = tuple(
+            {d: ml.predict_success(m, d) for d in self.difficulties}
+            for m in levels
+        )
+
+        self.ability = tuple(float(ml.mastery_to_ability(m)) for m in levels)
+        self.target_logit = math.log(ml.TARGET_SUCCESS / (1 - ml.TARGET_SUCCESS))
+
+        self._explanations = {}
+        self._hint_reasoning = {}
+
+    # -------------------------
+    # Engine Decisions
+    # -------------------------
+
+    def select_difficulty(self, mastery):
+        if type(mastery) is int and 0 <= mastery < MASTERY_LEVELS:
+            return self.difficulty[mastery]
+        return self.engine.select_difficulty(mastery)
+
+    def get_difficulty_reasoning(self, mastery):
+        if type(mastery) is int and 0 <= mastery < MASTERY_LEVELS:
+            return self.difficulty_reasoning[mastery]
+        return self.engine.get_difficulty_reasoning(mastery)
+
+    def get_hint_reasoning(self, student_model, topic):
+        """Hint reasoning, interned per (topic, recent error percentage)."""
+        key = (topic, round(student_model.get_recent_error_rate(topic) * 100))
+        reasoning = self._hint_reasoning.get(key)
+
+        if reasoning is None:
+            reasoning = self.engine.get_hint_reasoning(student_model, topic)
+            if len(self._hint_reasoning) < MAX_INTERNED:
+                self._hint_reasoning[key] = reasoning
+
+        return reasoning
+
+    # -------------------------
+    # ML Decisions
+    # -------------------------
+
+    def predict_success(self, mastery, difficulty):
+        if type(mastery) is int and 0 <= mastery < MASTERY_LEVELS:
+            probability = self.success[mastery].get(difficulty)
+            if probability is not None:
+                return probability
+        return self.ml.predict_success(mastery, difficulty)
+
+    def mastery_to_ability(self, mastery):
+        if type(mastery) is int and 0 <= mastery < MASTERY_LEVELS:
+            return self.ability[mastery]
+        return float(self.ml.mastery_to_ability(mastery))
+
+    def explain_prediction(self, mastery, difficulty, probability=None):
+        if type(mastery) is not int:
+            # 40 and 40.0 would share a key but format differently
+            return self.ml.explain_prediction(mastery, difficulty, probability)
+
+        if probability is None:
+            probability = self.predict_success(mastery, difficulty)
+
+        key = (mastery, difficulty, probability)
+        explanation = self._explanations.get(key)
+
+        if explanation is None:
+            explanation = self.ml.explain_prediction(mastery, difficulty, probability)
+            if len(self._explanations) < MAX_INTERNED:
+                self._explanations[key] = explanation
+
+        return explanation
+
+    # -------------------------
+    # Equivalence
+    # -------------------------
+
+    def verify(self, student_models=()):
+        """
+        Compare every lookup with the function it replaces, over the
+        whole mastery range plus inputs that take the fallback path.
+        Returns a list of mismatch descriptions (empty when equivalent).
+        student_models: optional students to check hint reasoning with.
+        """
+        mismatches = []
+
+        def check(name, args, got, expected):
+            if got != expected or type(got) is not type(expected):
+                mismatches.append(f"{name}{args}: {got!r} != {expected!r}")
+
+        masteries = list(range(-5, MASTERY_LEVELS + 5)) + [40.5, 75.25, True]
+        difficulties = self.difficulties + ("unknown",)
+
+        for m in masteries:
+            check("select_difficulty", (m,),
+                  self.select_difficulty(m), self.engine.select_difficulty(m))
+            check("get_difficulty_reasoning", (m,),
+                  self.get_difficulty_reasoning(m), self.engine.get_difficulty_reasoning(m))
+
+            check("mastery_to_ability", (m,),
+                  self.mastery_to_ability(m), float(self.ml.mastery_to_ability(m)))
+
+            for d in difficulties:
+                check("predict_success", (m, d),
+                      self.predict_success(m, d), self.ml.predict_success(m, d))
+
+                # Twice: the second call is served from the interned strings
+                for probability in (None, 0.65, None, 0.65):
+                    check("explain_prediction", (m, d, probability),
+                          self.explain_prediction(m, d, probability),
+                          self.ml.explain_prediction(m, d, probability))
+
+        for student in student_models:
+            for topic in student.topics:
+                for _ in range(2):
+                    check("get_hint_reasoning", (student.student_id, topic),
+                          self.get_hint_reasoning(student, topic),
+                          self.engine.get_hint_reasoning(student, topic))
+
+        return mismatches
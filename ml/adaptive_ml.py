@@ -2,12 +2,17 @@
 
 import math
 
+import numpy as np
+
+from monitoring.metrics import OPERATION_SECONDS, timed
+
 
 class AdaptiveML:
     """
     Optimization layer.
-    Predicts probability of student success on a question
-    and ranks questions to maintain ~65% success probability.
+    Predicts probability of student success on a question; the
+    serving orders PracticeService builds from these predictions keep
+    students near ~65% success probability.
     """
 
     def __init__(self, target_success=0.65):
@@ -24,6 +29,31 @@ class AdaptiveML:
             "hard": 0.9
         }
 
+        # Ability scale for per-question (IRT-style) item parameters:
+        # mastery 0–100 maps linearly onto ability -3..+3
+        self.ABILITY_SCALE = 6.0
+
+    def configure(self, target_success=None, w_mastery=None, w_difficulty=None,
+                  difficulty_map=None, ability_scale=None):
+        """
+        Apply tunables loaded from config. Omitted values keep defaults.
+        """
+        if target_success is not None:
+            self.TARGET_SUCCESS = float(target_success)
+        if w_mastery is not None:
+            self.W_MASTERY = float(w_mastery)
+        if w_difficulty is not None:
+            self.W_DIFFICULTY = float(w_difficulty)
+        if difficulty_map is not None:
+            self.DIFFICULTY_MAP = {
+                difficulty: float(value)
+                for difficulty, value in difficulty_map.items()
+            }
+        if ability_scale is not None:
+            self.ABILITY_SCALE = float(ability_scale)
+
+        return self
+
     # -------------------------
     # Core Prediction
     # -------------------------
@@ -47,41 +77,93 @@ class AdaptiveML:
 
         return round(probability, 2)
 
+    def _encode_difficulties(self, difficulties):
+        """Map difficulty labels to their numeric encoding."""
+        values = np.asarray(difficulties)
+
+        if values.dtype.kind in "fiu":
+            return values.astype(np.float64)
+
+        labels, inverse = np.unique(values, return_inverse=True)
+        table = np.array(
+            [self.DIFFICULTY_MAP.get(label, 0.6) for label in labels],
+            dtype=np.float64
+        )
+        return table[inverse].reshape(values.shape)
+
     # -------------------------
-    # Question Ranking
+    # Item-Level Prediction
     # -------------------------
 
-    def rank_questions(self, questions, mastery, difficulty):
+    def mastery_to_ability(self, mastery):
+        """Map mastery (0–100) onto the IRT ability scale."""
+        return (np.asarray(mastery, dtype=np.float64) / 100 - 0.5) * self.ABILITY_SCALE
+
+    def default_item_params(self, difficulties):
         """
-        Rank questions by closeness to target success probability.
-        ML does NOT choose topic — only ranks questions.
+        Item parameters (discrimination, item difficulty) that reproduce
+        the label-based predict_success exactly on the ability scale.
+        Used for questions that have not been calibrated yet.
         """
-        scored = []
+        difficulty_val = self._encode_difficulties(difficulties)
 
-        for q in questions:
-            prob = self.predict_success(mastery, difficulty)
-            distance = abs(prob - self.TARGET_SUCCESS)
+        discrimination = 5 * self.W_MASTERY / self.ABILITY_SCALE
+        item_difficulty = (
+            5 * self.W_DIFFICULTY * difficulty_val - 2.5 * self.W_MASTERY
+        ) / discrimination
 
-            scored.append({
-                "question": q,
-                "predicted_success": prob,
-                "distance": distance
-            })
+        return np.full_like(item_difficulty, discrimination), item_difficulty
 
-        # Sort by closest to target success
-        scored.sort(key=lambda x: x["distance"])
+    @timed(OPERATION_SECONDS, "ml.item_params")
+    def item_params(self, questions, difficulty):
+        """
+        Per-question (discrimination, item difficulty) arrays.
+        Calibrated values come from the bank; missing ones fall back
+        to the defaults for the difficulty label.
+        """
+        discrimination = getattr(questions, "discrimination", None)
+        item_difficulty = getattr(questions, "item_difficulty", None)
+
+        if discrimination is None or item_difficulty is None:
+            discrimination = np.array(
+                [q.get("discrimination", np.nan) for q in questions],
+                dtype=np.float64
+            )
+            item_difficulty = np.array(
+                [q.get("irt_difficulty", np.nan) for q in questions],
+                dtype=np.float64
+            )
 
-        return scored
+        default_a, default_b = self.default_item_params(difficulty)
+
+        return (
+            np.where(np.isnan(discrimination), default_a, discrimination),
+            np.where(np.isnan(item_difficulty), default_b, item_difficulty)
+        )
+
+    def predict_success_items(self, mastery, discrimination, item_difficulty):
+        """
+        2PL success probability: sigmoid(a * (ability - b)).
+        Unrounded, so questions with close parameters still rank apart.
+        """
+        ability = self.mastery_to_ability(mastery)
+        z = np.asarray(discrimination) * (ability - np.asarray(item_difficulty))
+
+        return 1 / (1 + np.exp(-z))
 
     # -------------------------
     # Explanation Layer
     # -------------------------
 
-    def explain_prediction(self, mastery, difficulty):
+    def explain_prediction(self, mastery, difficulty, probability=None):
         """
         Human-readable ML explanation.
+        probability: item-level prediction for the served question, if known
         """
-        prob = self.predict_success(mastery, difficulty)
+        prob = (
+            probability if probability is not None
+            else self.predict_success(mastery, difficulty)
+        )
 
         return (
             f"Predicted success probability is {int(prob * 100)}% "
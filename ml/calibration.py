@@ -0,0 +1,231 @@
+# ml/calibration.py
+
+"""
+Item calibration job.
+
+Fits per-question IRT (2PL) parameters from logged attempts:
+
+    P(correct) = sigmoid(discrimination * (ability - irt_difficulty))
+
+Student ability is taken from the mastery recorded just before each
+attempt (the event log's mastery_before column), mapped onto the
+ability scale of AdaptiveML. Every item is fitted at once with vectorized Newton steps,
+so millions of attempts refit in seconds on a CPU.
+
+Usage:
+    python -m ml.calibration data/question_bank.json data/events
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from ml.adaptive_ml import AdaptiveML
+from ml.knowledge_tracing import event_columns
+from models.event_log import EventLog
+from models.question_index import iter_questions
+
+
+# -------------------------
+# Event Extraction
+# -------------------------
+
+def events_to_arrays(columns):
+    """
+    Convert event log columns ({column: array}, see EventLog.columns)
+    into (question_ids, masteries, correct) arrays.
+    Events without a question_id (-1) cannot be attributed and are skipped.
+    """
+    question_ids = np.asarray(columns["question_id"], dtype=np.int64)
+    known = question_ids >= 0
+
+    return (
+        question_ids[known],
+        np.asarray(columns["mastery_before"], dtype=np.float64)[known],
+        (np.asarray(columns["correct"])[known] != 0).astype(np.float64)
+    )
+
+
+def load_attempts(event_logs):
+    """
+    (question_ids, masteries, correct) over one or more event logs
+    (e.g. one per shard), duplicates dropped.
+    """
+    _, _, columns = event_columns(
+        event_logs, ("question_id", "mastery_before", "correct")
+    )
+    return events_to_arrays(columns)
+
+
+# -------------------------
+# Vectorized Fit
+# -------------------------
+
+def fit_items(item_index, ability, correct, prior_a, prior_b,
+              prior_strength=1.0, iterations=50, tolerance=1e-6):
+    """
+    Fit 2PL parameters for every item simultaneously.
+
+    item_index: int array (n_attempts,) of dense item positions
+    ability: float array (n_attempts,) of abilities at attempt time
+    correct: float array (n_attempts,) of 0/1 outcomes
+    prior_a, prior_b: float arrays (n_items,) the fit shrinks towards,
+        so rarely attempted items stay close to their defaults
+
+    Uses Newton-Raphson on the slope/intercept form z = a*ability + c
+    with a Gaussian prior. Per-item sums are aggregated with bincount,
+    so each iteration is O(n_attempts) in NumPy.
+    """
+    n_items = prior_a.shape[0]
+    lam = prior_strength
+
+    prior_c = -prior_a * prior_b
+    a = prior_a.astype(np.float64).copy()
+    c = prior_c.astype(np.float64).copy()
+
+    ability_sq = ability * ability
+
+    for _ in range(iterations):
+        z = a[item_index] * ability + c[item_index]
+        p = 1 / (1 + np.exp(-z))
+        residual = correct - p
+        weight = p * (1 - p)
+
+        grad_a = np.bincount(item_index, residual * ability, n_items) - lam * (a - prior_a)
+        grad_c = np.bincount(item_index, residual, n_items) - lam * (c - prior_c)
+
+        info_aa = np.bincount(item_index, weight * ability_sq, n_items) + lam
+        info_ac = np.bincount(item_index, weight * ability, n_items)
+        info_cc = np.bincount(item_index, weight, n_items) + lam
+
+        det = info_aa * info_cc - info_ac * info_ac
+        step_a = np.clip((info_cc * grad_a - info_ac * grad_c) / det, -1, 1)
+        step_c = np.clip((info_aa * grad_c - info_ac * grad_a) / det, -1, 1)
+
+        a += step_a
+        c += step_c
+
+        if max(np.abs(step_a).max(), np.abs(step_c).max()) < tolerance:
+            break
+
+    # Keep discrimination positive so difficulty stays finite
+    a = np.maximum(a, 0.05)
+
+    return a, -c / a
+
+
+def calibrate(question_ids, masteries, correct, prior_a, prior_b, ml=None,
+              prior_strength=1.0):
+    """
+    Fit parameters for the items that appear in question_ids.
+    prior_a / prior_b: dict {question_id: value}
+
+    Returns {question_id: (discrimination, irt_difficulty, n_attempts)}.
+    """
+    ml = ml or AdaptiveML()
+
+    if question_ids.size == 0:
+        return {}
+
+    unique_ids, item_index = np.unique(question_ids, return_inverse=True)
+    counts = np.bincount(item_index)
+
+    fitted_a, fitted_b = fit_items(
+        item_index,
+        ml.mastery_to_ability(masteries),
+        correct,
+        np.array([prior_a[q] for q in unique_ids], dtype=np.float64),
+        np.array([prior_b[q] for q in unique_ids], dtype=np.float64),
+        prior_strength=prior_strength
+    )
+
+    return {
+        int(q): (float(fitted_a[i]), float(fitted_b[i]), int(counts[i]))
+        for i, q in enumerate(unique_ids)
+    }
+
+
+def calibrate_question_bank(question_bank, attempts, ml=None, min_attempts=20,
+                            prior_strength=1.0):
+    """
+    Refit item parameters in place on the raw question bank.
+    attempts: (question_ids, masteries, correct) arrays (see load_attempts)
+    Questions with fewer than min_attempts logged attempts are untouched.
+    Returns the number of questions updated.
+    """
+    ml = ml or AdaptiveML()
+
+    questions = {}
+    prior_a, prior_b = {}, {}
+
+    for qid, _, _, q in iter_questions(question_bank):
+        default_a, default_b = ml.default_item_params([q.get("difficulty")])
+        questions[qid] = q
+        prior_a[qid] = q.get("discrimination", float(default_a[0]))
+        prior_b[qid] = q.get("irt_difficulty", float(default_b[0]))
+
+    question_ids, masteries, correct = attempts
+
+    known = np.isin(question_ids, np.fromiter(questions, dtype=np.int64))
+    fitted = calibrate(
+        question_ids[known], masteries[known], correct[known],
+        prior_a, prior_b, ml=ml, prior_strength=prior_strength
+    )
+
+    updated = 0
+
+    for qid, (a, b, n_attempts) in fitted.items():
+        if n_attempts < min_attempts:
+            continue
+
+        questions[qid]["discrimination"] = round(a, 4)
+        questions[qid]["irt_difficulty"] = round(b, 4)
+        updated += 1
+
+    return updated
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fit per-question IRT parameters from attempt logs."
+    )
+    parser.add_argument("bank", help="question bank JSON file")
+    parser.add_argument("events", nargs="+", help="event log directories (one per shard)")
+    parser.add_argument("-o", "--output", help="output bank (default: in place)")
+    parser.add_argument("--min-attempts", type=int, default=20)
+    parser.add_argument("--prior-strength", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        question_bank = json.load(f)
+
+    logs = [EventLog(directory, readonly=True) for directory in args.events]
+    try:
+        attempts = load_attempts(logs)
+    finally:
+        for log in logs:
+            log.close()
+
+    updated = calibrate_question_bank(
+        question_bank,
+        attempts,
+        min_attempts=args.min_attempts,
+        prior_strength=args.prior_strength
+    )
+
+    output = args.output or args.bank
+    with open(output + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(question_bank, f, indent=2, ensure_ascii=False)
+    os.replace(output + ".tmp", output)
+
+    print(f"Calibrated {updated} questions")
+
+
+if __name__ == "__main__":
+    main()
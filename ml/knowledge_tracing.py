@@ -0,0 +1,358 @@
+# ml/knowledge_tracing.py
+
+"""
+Knowledge tracing fit job.
+
+Fits per-topic Bayesian Knowledge Tracing parameters (prior, learn,
+guess, slip; see models.mastery_model.BKTMasteryModel) from the attempt
+history of every student in the event log, with expectation
+maximization over all (student, topic) sequences at once:
+
+- rows are laid out position-major: sequences are ranked by length,
+  so the sequences still running at position t are a prefix of the
+  ranking and their rows at t are one contiguous slice
+- the forward (filtering) and backward (smoothing) passes step through
+  positions, each step one vectorized operation over its slice; the
+  work is O(attempts) in NumPy plus O(longest sequence) Python steps
+- per-topic expected counts are aggregated with bincount
+
+Tens of millions of attempts refit in well under a minute on a CPU.
+
+Usage:
+    python -m ml.knowledge_tracing data/events -o data/bkt_params.json
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from models.event_log import EventLog
+from models.mastery_model import BKTParams
+
+
+# Guess / slip above this make "known" and "unknown" swap meaning
+MAX_GUESS = 0.3
+MAX_SLIP = 0.3
+EPSILON = 1e-4
+
+
+# -------------------------
+# Sequences
+# -------------------------
+
+class Sequences:
+    """
+    Attempts grouped into (student, topic) sequences, position-major.
+
+    skill: int array (n_attempts,) of dense topic ids ("skills")
+    sequence: int array (n_attempts,) of sequence ids
+    order: sortable array (n_attempts,) of attempt order within a sequence
+    correct: bool array (n_attempts,)
+    """
+
+    def __init__(self, skill, sequence, order, correct):
+        n = len(skill)
+
+        # Sequence by sequence, in attempt order
+        rows = np.lexsort((order, sequence))
+        sequence = sequence[rows]
+
+        starts = np.flatnonzero(np.r_[True, sequence[1:] != sequence[:-1]]) if n else np.empty(0, dtype=np.int64)
+        lengths = np.diff(np.r_[starts, n])
+        position = np.arange(n) - np.repeat(starts, lengths)
+
+        # Longest sequences first: the sequences reaching position t
+        # are ranks 0 .. active[t]-1
+        rank_order = np.argsort(-lengths, kind="stable")
+        rank = np.empty_like(rank_order)
+        rank[rank_order] = np.arange(len(rank_order))
+
+        position_major = np.lexsort((np.repeat(rank, lengths), position))
+        rows = rows[position_major]
+
+        self.n_attempts = n
+        self.n_sequences = len(starts)
+        self.active = np.bincount(position) if n else np.empty(0, dtype=np.int64)
+        self.offsets = np.r_[0, np.cumsum(self.active)]
+
+        self.skill = skill[rows]
+        self.correct = correct[rows]
+        self.rows = rows  # input row of each position-major row
+
+        # Rows followed by another attempt of the same sequence
+        next_active = np.r_[self.active[1:], 0]
+        self.has_next = np.arange(n) - np.repeat(self.offsets[:-1], self.active) \
+            < np.repeat(next_active, self.active)
+
+    def slices(self):
+        """(lo, hi, next_count) per position."""
+        active = self.active.tolist()
+        offsets = self.offsets.tolist()
+
+        for t, count in enumerate(active):
+            yield offsets[t], offsets[t] + count, active[t + 1] if t + 1 < len(active) else 0
+
+
+# -------------------------
+# EM
+# -------------------------
+
+def forward_backward(sequences, prior, learn, guess, slip):
+    """
+    E-step. Returns (log likelihood, gamma, xi): per row P(known | all
+    of its sequence's attempts), and P(unknown -> known between this
+    attempt and the next).
+    """
+    skill = sequences.skill
+    correct = sequences.correct
+    n = sequences.n_attempts
+
+    # Emission probabilities of each row's outcome, and its learn rate
+    known_emission = np.where(correct, 1 - slip[skill], slip[skill]).astype(np.float32)
+    unknown_emission = np.where(correct, guess[skill], 1 - guess[skill]).astype(np.float32)
+    learn_rate = learn[skill].astype(np.float32)
+
+    predicted = np.empty(n, dtype=np.float32)  # P(known) before the attempt
+    filtered = np.empty(n, dtype=np.float32)  # P(known) after seeing it
+    log_likelihood = 0.0
+
+    p = prior[skill[:sequences.n_sequences]].astype(np.float32)
+    for lo, hi, following in sequences.slices():
+        p = p[:hi - lo]
+        known = p * known_emission[lo:hi]
+        evidence = known + (1 - p) * unknown_emission[lo:hi]
+        f = known / evidence
+
+        predicted[lo:hi] = p
+        filtered[lo:hi] = f
+        log_likelihood += float(np.log(evidence).sum(dtype=np.float64))
+
+        p = f + (1 - f) * learn_rate[lo:hi]
+
+    gamma = np.empty(n, dtype=np.float32)
+    xi = np.zeros(n, dtype=np.float32)
+
+    # Known is absorbing, so smoothing only needs the next row's P(known)
+    for lo, hi, following in reversed(list(sequences.slices())):
+        g = filtered[lo:hi].copy()
+
+        if following:
+            ahead = slice(hi, hi + following)
+            ratio = gamma[ahead] / predicted[ahead]
+            f = g[:following]
+            xi[lo:lo + following] = (1 - f) * learn_rate[lo:lo + following] * ratio
+            g[:following] = f * ratio
+
+        gamma[lo:hi] = g
+
+    return log_likelihood, gamma, xi
+
+
+def maximize(sequences, gamma, xi, n_skills, defaults, prior_strength):
+    """M-step: expected counts per skill, shrunk towards the defaults."""
+    skill = sequences.skill
+    first = slice(0, sequences.n_sequences)
+    unknown = 1 - gamma
+
+    def rate(numerator, denominator, default):
+        return (numerator + prior_strength * default) / (denominator + prior_strength)
+
+    prior = rate(
+        np.bincount(skill[first], gamma[first], n_skills),
+        np.bincount(skill[first], minlength=n_skills), defaults["prior"]
+    )
+    learn = rate(
+        np.bincount(skill, xi, n_skills),
+        np.bincount(skill, unknown * sequences.has_next, n_skills), defaults["learn"]
+    )
+    guess = rate(
+        np.bincount(skill, unknown * sequences.correct, n_skills),
+        np.bincount(skill, unknown, n_skills), defaults["guess"]
+    )
+    slip = rate(
+        np.bincount(skill, gamma * ~sequences.correct, n_skills),
+        np.bincount(skill, gamma, n_skills), defaults["slip"]
+    )
+
+    return (
+        np.clip(prior, EPSILON, 1 - EPSILON),
+        np.clip(learn, EPSILON, 1 - EPSILON),
+        np.clip(guess, EPSILON, MAX_GUESS),
+        np.clip(slip, EPSILON, MAX_SLIP)
+    )
+
+
+def fit_bkt(sequences, n_skills, defaults=None, prior_strength=1.0,
+            iterations=100, tolerance=1e-6):
+    """
+    Fit (prior, learn, guess, slip) arrays (n_skills,) by EM.
+    defaults: BKTParams to start from and shrink towards, so rarely
+    attempted skills stay close to them. Stops once the mean
+    log-likelihood per attempt improves by less than tolerance.
+    Returns (params, log likelihood per iteration).
+    """
+    defaults = (defaults or BKTParams()).to_dict()
+    params = tuple(
+        np.full(n_skills, defaults[name], dtype=np.float64)
+        for name in ("prior", "learn", "guess", "slip")
+    )
+
+    history = []
+    for _ in range(iterations):
+        log_likelihood, gamma, xi = forward_backward(sequences, *params)
+        history.append(log_likelihood)
+
+        params = maximize(sequences, gamma, xi, n_skills, defaults, prior_strength)
+
+        if len(history) > 1 and \
+                history[-1] - history[-2] < tolerance * max(sequences.n_attempts, 1):
+            break
+
+    return params, history
+
+
+# -------------------------
+# Event Log
+# -------------------------
+
+def event_columns(event_logs, names):
+    """
+    (keys, key_id, {name: array}) for the named columns over one or
+    more event logs (e.g. one per shard), sorted by (student, seq) with
+    duplicates dropped.
+    """
+    key_parts, id_parts = [], []
+    columns = {name: [] for name in ("seq", *names)}
+
+    offset = 0
+    for log in event_logs:
+        keys, key_id, arrays = log.columns()
+        key_parts.append(keys)
+        id_parts.append(key_id.astype(np.int64) + offset)
+        offset += len(keys)
+        for name in columns:
+            columns[name].append(arrays[name])
+
+    keys, remap = np.unique(np.concatenate(key_parts), return_inverse=True)
+    key_id = remap[np.concatenate(id_parts)]
+    columns = {name: np.concatenate(parts) for name, parts in columns.items()}
+
+    if not len(key_id):
+        return keys, key_id, columns
+
+    # An interrupted compaction can repeat rows
+    seq = columns["seq"]
+    rows = np.lexsort((seq, key_id))
+    key_id, seq = key_id[rows], seq[rows]
+    unique = np.r_[True, (key_id[1:] != key_id[:-1]) | (seq[1:] != seq[:-1])]
+
+    return keys, key_id[unique], {
+        name: values[rows][unique] for name, values in columns.items()
+    }
+
+
+def load_attempts(event_logs):
+    """
+    (keys, key_id, seq, topic, correct) over one or more event logs
+    (e.g. one per shard), duplicates dropped.
+    """
+    keys, key_id, columns = event_columns(event_logs, ("topic", "correct"))
+    return keys, key_id, columns["seq"], columns["topic"], columns["correct"] != 0
+
+
+def fit_event_logs(event_logs, topics_by_subject, defaults=None, prior_strength=1.0,
+                   min_attempts=50, iterations=100):
+    """
+    Fit BKT parameters for every (subject, topic) with at least
+    min_attempts logged attempts.
+    topics_by_subject: {subject: [topic, ...]} in StudentModel order
+    (the log stores topic indexes).
+
+    Returns {subject: {topic: {"prior", "learn", "guess", "slip",
+    "attempts"}}}.
+    """
+    keys, key_id, seq, topic, correct = load_attempts(event_logs)
+    if not len(key_id):
+        return {}
+
+    subject_names, subject_of_key = np.unique(
+        np.char.partition(keys, ":")[:, 2], return_inverse=True
+    )
+    subject = subject_of_key[key_id]
+
+    max_topics = int(topic.max()) + 1
+    skills, skill = np.unique(subject * max_topics + topic, return_inverse=True)
+
+    sequences = Sequences(skill, key_id * max_topics + topic, seq, correct)
+    (prior, learn, guess, slip), _ = fit_bkt(
+        sequences, len(skills), defaults, prior_strength, iterations
+    )
+    attempts = np.bincount(skill, minlength=len(skills))
+
+    fitted = {}
+    for s, code in enumerate(skills.tolist()):
+        name = str(subject_names[code // max_topics])
+        index = code % max_topics
+        topics = topics_by_subject.get(name)
+
+        if topics is None or index >= len(topics) or attempts[s] < min_attempts:
+            continue
+
+        fitted.setdefault(name, {})[topics[index]] = {
+            "prior": round(float(prior[s]), 4),
+            "learn": round(float(learn[s]), 4),
+            "guess": round(float(guess[s]), 4),
+            "slip": round(float(slip[s]), 4),
+            "attempts": int(attempts[s])
+        }
+
+    return fitted
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def main(argv=None):
+    from models.question_bank_file import load_question_index
+
+    parser = argparse.ArgumentParser(
+        description="Fit per-topic BKT mastery parameters from event logs."
+    )
+    parser.add_argument("events", nargs="+", help="event log directories (one per shard)")
+    parser.add_argument("-o", "--output", default="data/bkt_params.json")
+    parser.add_argument("--bank", default="data/question_bank.json",
+                        help="question bank (topic order per subject)")
+    parser.add_argument("--min-attempts", type=int, default=50)
+    parser.add_argument("--prior-strength", type=float, default=1.0)
+    parser.add_argument("--reload", metavar="CONFIG",
+                        help="touch this tunables file so running workers reload")
+    args = parser.parse_args(argv)
+
+    index = load_question_index(args.bank)
+    topics = {subject: list(index.topics(subject)) for subject in index.subjects()}
+
+    logs = [EventLog(directory, readonly=True) for directory in args.events]
+    try:
+        fitted = fit_event_logs(
+            logs, topics, prior_strength=args.prior_strength,
+            min_attempts=args.min_attempts
+        )
+    finally:
+        for log in logs:
+            log.close()
+
+    with open(args.output + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(fitted, f, indent=2, ensure_ascii=False)
+    os.replace(args.output + ".tmp", args.output)
+
+    if args.reload:
+        os.utime(args.reload)
+
+    print(f"Fitted {sum(map(len, fitted.values()))} topics to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
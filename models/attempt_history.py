@@ -0,0 +1,143 @@
+# models/attempt_history.py
+
+import time
+from array import array
+from datetime import datetime, timezone
+
+
+class AttemptHistory:
+    """
+    Columnar, append-only attempt log for one student.
+
+    Each field is a typed array instead of a dict per event:
+    timestamps are epoch seconds, topics are topic indices and a
+    missing question_id is stored as -1. Iterating yields the familiar
+    event dicts, so callers reading history keep working.
+
+    With an EventLog behind the store, only a recent tail stays in
+    memory: events written to the log may be trimmed from the front.
+    `start` counts trimmed events, so event numbers (seq) stay global,
+    and `logged` is the seq up to which events are in the log.
+    """
+
+    __slots__ = (
+        "topics", "timestamp", "topic", "question_id",
+        "correct", "mastery_before", "mastery_after", "start", "logged"
+    )
+
+    def __init__(self, topics):
+        self.topics = topics  # shared tuple of topic names
+        self.start = 0
+        self.logged = 0
+
+        self.timestamp = array("d")
+        self.topic = array("H")
+        self.question_id = array("i")
+        self.correct = array("b")
+        self.mastery_before = array("b")
+        self.mastery_after = array("b")
+
+    def append(self, topic_index, question_id, correct, mastery_before,
+               mastery_after, timestamp=None):
+        self.timestamp.append(time.time() if timestamp is None else timestamp)
+        self.topic.append(topic_index)
+        self.question_id.append(-1 if question_id is None else question_id)
+        self.correct.append(1 if correct else 0)
+        self.mastery_before.append(mastery_before)
+        self.mastery_after.append(mastery_after)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @property
+    def total(self):
+        """Events ever recorded, including trimmed ones."""
+        return self.start + len(self.timestamp)
+
+    def __getitem__(self, position):
+        question_id = self.question_id[position]
+
+        return {
+            "timestamp": datetime.fromtimestamp(
+                self.timestamp[position], timezone.utc
+            ).replace(tzinfo=None).isoformat(),
+            "topic": self.topics[self.topic[position]],
+            "question_id": None if question_id < 0 else question_id,
+            "correct": bool(self.correct[position]),
+            "mastery_before": self.mastery_before[position],
+            "mastery_after": self.mastery_after[position]
+        }
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    # -------------------------
+    # Event Log
+    # -------------------------
+
+    def pending(self):
+        """
+        Rows not yet in the event log:
+        (seq, timestamp, topic, question_id, correct, mastery_before, mastery_after)
+        """
+        return self.rows(self.logged)
+
+    def rows(self, since=0):
+        """Rows from seq `since` on (those still in memory), as pending()."""
+        first = max(since - self.start, 0)
+
+        return list(zip(
+            range(self.start + first, self.total),
+            self.timestamp[first:],
+            self.topic[first:],
+            self.question_id[first:],
+            self.correct[first:],
+            self.mastery_before[first:],
+            self.mastery_after[first:]
+        ))
+
+    def trim(self, keep):
+        """Drop logged events from the front, keeping at least `keep`."""
+        drop = min(self.logged - self.start, len(self) - keep)
+        if drop <= 0:
+            return
+
+        for name in (
+            "timestamp", "topic", "question_id",
+            "correct", "mastery_before", "mastery_after"
+        ):
+            del getattr(self, name)[:drop]
+
+        self.start += drop
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def to_columns(self):
+        return {
+            "start": self.start,
+            "logged": self.logged,
+            "timestamp": self.timestamp.tolist(),
+            "topic": self.topic.tolist(),
+            "question_id": self.question_id.tolist(),
+            "correct": self.correct.tolist(),
+            "mastery_before": self.mastery_before.tolist(),
+            "mastery_after": self.mastery_after.tolist()
+        }
+
+    @classmethod
+    def from_columns(cls, topics, columns):
+        history = cls(topics)
+        history.start = columns.get("start", 0)
+        history.logged = columns.get("logged", 0)
+
+        history.timestamp.extend(columns["timestamp"])
+        history.topic.extend(columns["topic"])
+        history.question_id.extend(columns["question_id"])
+        history.correct.extend(columns["correct"])
+        history.mastery_before.extend(columns["mastery_before"])
+        history.mastery_after.extend(columns["mastery_after"])
+
+        return history
@@ -0,0 +1,183 @@
+# models/cohort_matrix.py
+
+import threading
+
+import numpy as np
+
+
+class CohortMatrix:
+    """
+    Columnar per-topic state of every student of one subject:
+    rows are students, columns are the subject's topics.
+
+    - mastery (int8), attempts / correct (uint32) and the recent error
+      rate (float32) are dense students x topics arrays
+    - rows are filled from serialized student states (to_dict() output,
+      or just its FIELDS), so a matrix is built straight from a backend
+      scan and kept current from the states each store flush writes
+    - storage grows geometrically as students are added; snapshot()
+      hands analytics a consistent, right-sized copy while updates go on
+    """
+
+    # State fields a row is built from
+    FIELDS = (
+        "topics", "mastery", "attempts", "correct_attempts",
+        "recent_window", "recent_results", "recent_ewma"
+    )
+
+    def __init__(self, subject, topics, capacity=1024):
+        self.subject = subject
+        self.topics = tuple(topics)
+        self._topic_index = {t: i for i, t in enumerate(self.topics)}
+
+        self.student_ids = []
+        self._rows = {}  # student_id -> row
+        self._lock = threading.Lock()
+
+        self._allocate(max(capacity, 1))
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    # -------------------------
+    # Update
+    # -------------------------
+
+    def update(self, student_id, state):
+        """Insert or replace one student's row from a serialized state."""
+        topics = state.get("topics") or list(state["mastery"].keys())
+
+        mastery = _per_topic(state["mastery"], topics, 50)
+        attempts = _per_topic(state.get("attempts", {}), topics, 0)
+        correct = _per_topic(state.get("correct_attempts", {}), topics, 0)
+        errors = _recent_error_rates(state, topics)
+
+        if tuple(topics) == self.topics:
+            columns = slice(None)
+        else:
+            # Bank changed since the state was saved: map by topic name
+            known = [(k, self._topic_index[t]) for k, t in enumerate(topics)
+                     if t in self._topic_index]
+            picked = [k for k, _ in known]
+            columns = [c for _, c in known]
+            mastery, attempts, correct, errors = (
+                [values[k] for k in picked]
+                for values in (mastery, attempts, correct, errors)
+            )
+
+        with self._lock:
+            row = self._rows.get(student_id)
+            if row is None:
+                row = len(self.student_ids)
+                if row == len(self._mastery):
+                    self._grow()
+                self._rows[student_id] = row
+                self.student_ids.append(student_id)
+
+            self._mastery[row] = 50
+            self._attempts[row] = 0
+            self._correct[row] = 0
+            self._errors[row] = 0
+
+            self._mastery[row, columns] = mastery
+            self._attempts[row, columns] = attempts
+            self._correct[row, columns] = correct
+            self._errors[row, columns] = errors
+
+    # -------------------------
+    # Reading
+    # -------------------------
+
+    def snapshot(self):
+        """Consistent copy holding exactly the current students."""
+        with self._lock:
+            n = len(self.student_ids)
+            copy = CohortMatrix(self.subject, self.topics, capacity=n)
+            copy.student_ids = list(self.student_ids)
+            copy._rows = dict(self._rows)
+            copy._mastery = self._mastery[:n].copy()
+            copy._attempts = self._attempts[:n].copy()
+            copy._correct = self._correct[:n].copy()
+            copy._errors = self._errors[:n].copy()
+
+        return copy
+
+    def select(self, student_ids):
+        """Snapshot restricted to the given students (unknown IDs skipped)."""
+        with self._lock:
+            rows = [self._rows[s] for s in student_ids if s in self._rows]
+            rows = list(dict.fromkeys(rows))
+
+            subset = CohortMatrix(self.subject, self.topics, capacity=len(rows))
+            subset.student_ids = [self.student_ids[r] for r in rows]
+            subset._rows = {s: i for i, s in enumerate(subset.student_ids)}
+            subset._mastery = self._mastery[rows]
+            subset._attempts = self._attempts[rows]
+            subset._correct = self._correct[rows]
+            subset._errors = self._errors[rows]
+
+        return subset
+
+    @property
+    def mastery(self):
+        return self._mastery[:len(self.student_ids)]
+
+    @property
+    def attempts(self):
+        return self._attempts[:len(self.student_ids)]
+
+    @property
+    def correct_attempts(self):
+        return self._correct[:len(self.student_ids)]
+
+    @property
+    def recent_error_rates(self):
+        return self._errors[:len(self.student_ids)]
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+
+    def _allocate(self, capacity):
+        n = len(self.topics)
+        self._mastery = np.full((capacity, n), 50, dtype=np.int8)
+        self._attempts = np.zeros((capacity, n), dtype=np.uint32)
+        self._correct = np.zeros((capacity, n), dtype=np.uint32)
+        self._errors = np.zeros((capacity, n), dtype=np.float32)
+
+    def _grow(self):
+        old = (self._mastery, self._attempts, self._correct, self._errors)
+        self._allocate(2 * len(self._mastery))
+
+        for new, values in zip(
+            (self._mastery, self._attempts, self._correct, self._errors), old
+        ):
+            new[:len(values)] = values
+
+
+def _per_topic(values, topics, default):
+    """Per-topic values in topic order from the list or old dict layout."""
+    if isinstance(values, dict):
+        return [values.get(t, default) for t in topics]
+    return values
+
+
+def _recent_error_rates(state, topics):
+    """RecentWindow.error_rate() for every topic of a serialized state."""
+    window = state.get("recent_window") or {}
+    ewma = state.get("recent_ewma")
+
+    if window.get("mode") == "decay" and ewma:
+        return ewma
+
+    recent = state.get("recent_results") or {}
+    size = window.get("size")
+    rates = []
+
+    for topic in topics:
+        results = recent.get(topic)
+        if results and size:
+            results = results[-size:]
+        rates.append(1 - sum(results) / len(results) if results else 0.0)
+
+    return rates
@@ -0,0 +1,561 @@
+# models/event_log.py
+
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import struct
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: the single writer is not enforced
+    fcntl = None
+
+
+# key length, seq, timestamp, topic, question_id, correct,
+# mastery_before, mastery_after; followed by the UTF-8 key
+RECORD = struct.Struct("<HIdHibbb")
+KEY_LENGTH = struct.Struct("<H")
+
+COLUMNS = (
+    "seq", "timestamp", "topic", "question_id",
+    "correct", "mastery_before", "mastery_after"
+)
+DTYPES = ("<u4", "<f8", "<u2", "<i4", "i1", "i1", "i1")
+
+logger = logging.getLogger(__name__)
+
+
+class EventLogLockedError(RuntimeError):
+    """The directory already has a writer (another process, or this one)."""
+
+
+class EventLog:
+    """
+    Append-only, on-disk attempt log shared by every student.
+
+    - appends are buffered and written with one write + fsync per
+      commit() (group commit); StudentStore commits once per flush,
+      just before saving the matching snapshots
+    - records go to numbered segment files; a new segment is started
+      once the active one exceeds segment_bytes
+    - checkpoint() records the log position covered by saved snapshots,
+      so recovery only replays the tail written after it
+    - compact() folds sealed segments into one columnar archive sorted
+      by (student, seq), dropping duplicate events, for fast per-student
+      reads and analytics scans; nothing is dropped from history. The
+      archive is a directory of .npy columns, memory-mapped on read.
+      The writer compacts in a background thread once compact_after
+      sealed segments have piled up; with the writer stopped, run
+      python -m models.event_log compact <directory>
+
+    One writer process per directory, enforced: the writer holds an
+    exclusive lock on the directory's LOCK file and a second one raises
+    EventLogLockedError, as does writing from a child forked after the
+    log was opened. Offline jobs reading a live log (model fitting,
+    analytics) open it with readonly=True and take no lock.
+
+    Rows are tuples in COLUMNS order; topic is the topic index of the
+    student's subject and a missing question_id is -1.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 2**20, compact_after=4,
+                 readonly=False):
+        """compact_after: sealed segments that trigger a compaction (0: never)"""
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compact_after = compact_after
+        self.readonly = readonly
+
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._archive = None  # (generation, {column: memory-mapped array})
+        # {segment: (inode, bytes decoded, keys, key_id, {column: array})}
+        self._segment_columns = {}
+        self._columns_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+
+        self._lock_file = None
+        self._pid = os.getpid()
+        if not readonly:
+            self._lock_directory()
+
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 1
+        self._file = None
+
+        if not readonly:
+            self._truncate_torn_record(self._segment_path(self._segment))
+            self._file = open(self._segment_path(self._segment), "ab")
+
+    # -------------------------
+    # Writing
+    # -------------------------
+
+    def append(self, key, rows):
+        """Buffer rows for one student key until the next commit()."""
+        if self.readonly:
+            raise ValueError(f"event log {self.directory} is open read-only")
+
+        encoded = key.encode("utf-8")
+        with self._lock:
+            for row in rows:
+                self._buffer += RECORD.pack(len(encoded), *row)
+                self._buffer += encoded
+
+    def commit(self):
+        """Write and fsync everything appended since the last commit."""
+        with self._lock:
+            if not self._buffer:
+                return
+            self._check_writer()
+
+            self._file.write(self._buffer)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer.clear()
+
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+
+    def checkpoint(self):
+        """Mark every committed event as covered by saved snapshots."""
+        self._check_writer()
+        with self._lock:
+            position = {"segment": self._segment, "offset": self._file.tell()}
+
+        tmp_path = os.path.join(self.directory, "checkpoint.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(position, f)
+        os.replace(tmp_path, os.path.join(self.directory, "checkpoint.json"))
+
+        # Covered sealed segments can now be folded into the archive
+        if self.compact_after and position["segment"] > self.compact_after \
+                and len(self._segments()) > self.compact_after:
+            self._compact_in_background()
+
+    def close(self):
+        self.commit()
+        with self._compact_lock, self._lock:
+            if self._file is not None:
+                self._file.close()
+            if self._lock_file is not None and os.getpid() == self._pid:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _rotate(self):
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), "ab")
+
+    # -------------------------
+    # Reading
+    # -------------------------
+
+    def tail(self):
+        """{key: [row, ...]} for events committed after the checkpoint."""
+        position = self._read_checkpoint()
+        events = {}
+
+        for segment in self._segments():
+            if segment < position["segment"]:
+                continue
+            offset = position["offset"] if segment == position["segment"] else 0
+
+            for key, row in self._read_segment(segment, offset):
+                events.setdefault(key, []).append(row)
+
+        return events
+
+    def events(self, key):
+        """Every logged row for one student key, in seq order."""
+        rows = {}
+
+        # Segments before the archive: a compaction finishing in between
+        # then repeats rows (dropped here) instead of hiding them
+        for segment in self._segments():
+            for row_key, row in self._read_segment(segment):
+                if row_key == key:
+                    rows.setdefault(row[0], row)
+
+        archive = self._load_archive()
+        if archive is not None:
+            keys = archive["keys"]
+            i = int(np.searchsorted(keys, key))
+            if i < len(keys) and keys[i] == key:
+                lo, hi = np.searchsorted(archive["key_id"], [i, i + 1])
+                columns = [archive[name][lo:hi].tolist() for name in COLUMNS]
+                for row in zip(*columns):
+                    rows.setdefault(row[0], row)
+
+        return [rows[seq] for seq in sorted(rows)]
+
+    def columns(self, since=None):
+        """
+        Every logged event as columns, for analytics scans:
+        (keys, key_id, {column: array}) with keys the distinct student
+        keys (sorted) and key_id each row's index into them. Archived
+        rows are read from the memory-mapped archive. Segments are
+        decoded once and kept as columns until compacted, so repeated
+        scans only decode what was committed since the last one. Rows
+        older than `since` (epoch seconds) are dropped.
+        Unlike events(), rows are not deduplicated, so an interrupted or
+        concurrent compaction may repeat a few.
+        """
+        key_parts, id_parts = [], []
+        column_parts = {name: [] for name in COLUMNS}
+
+        # Segments before the archive (see events()); compacted ones
+        # are no longer listed and leave the cache
+        listed = self._segments()
+        with self._columns_lock:
+            for stale in set(self._segment_columns) - set(listed):
+                del self._segment_columns[stale]
+        segments = [self._decoded_segment(segment) for segment in listed]
+
+        archive = self._load_archive()
+        if archive is not None:
+            segments.insert(0, (
+                np.asarray(archive["keys"]), np.asarray(archive["key_id"]), archive
+            ))
+
+        for part_keys, part_ids, part_columns in segments:
+            if not len(part_ids):
+                continue
+            offset = sum(len(part) for part in key_parts)
+            key_parts.append(part_keys)
+            id_parts.append(part_ids + offset)
+            for name in COLUMNS:
+                column_parts[name].append(part_columns[name])
+
+        if not key_parts:
+            return (
+                np.array([], dtype=str), np.array([], dtype=np.int32),
+                {name: np.array([], dtype=dtype) for name, dtype in zip(COLUMNS, DTYPES)}
+            )
+
+        # Archive and segment keys merged into one sorted key table
+        keys, remap = np.unique(np.concatenate(key_parts), return_inverse=True)
+        key_id = remap[np.concatenate(id_parts)].astype(np.int32)
+        arrays = {name: np.concatenate(parts) for name, parts in column_parts.items()}
+
+        if since is not None:
+            recent = arrays["timestamp"] >= since
+            key_id = key_id[recent]
+            arrays = {name: values[recent] for name, values in arrays.items()}
+
+        return keys, key_id, arrays
+
+    # -------------------------
+    # Compaction
+    # -------------------------
+
+    def compact(self):
+        """
+        Fold sealed segments already covered by the checkpoint into the
+        archive. Returns the number of segments folded.
+        """
+        if self.readonly:
+            raise ValueError(f"event log {self.directory} is open read-only")
+        self._check_writer()
+
+        with self._compact_lock:
+            return self._compact()
+
+    def _compact_in_background(self):
+        if self._compact_lock.locked():
+            return
+        threading.Thread(
+            target=self._background_compact, name="event-log-compact", daemon=True
+        ).start()
+
+    def _background_compact(self):
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            if not self._file.closed:
+                self._compact()
+        except Exception:
+            logger.exception("event log compaction failed in %s", self.directory)
+        finally:
+            self._compact_lock.release()
+
+    def _compact(self):
+        with self._lock:
+            self._file.flush()
+            checkpoint = self._read_checkpoint()
+
+            if self._file.tell() and checkpoint == {
+                "segment": self._segment, "offset": self._file.tell()
+            }:
+                # Everything is checkpointed: seal the active segment too
+                self._rotate()
+
+            # Segments before the checkpoint are covered, and so is the
+            # checkpoint's own segment once sealed and fully covered
+            limit = checkpoint["segment"]
+            path = self._segment_path(limit)
+            if limit < self._segment and os.path.exists(path) \
+                    and os.path.getsize(path) == checkpoint["offset"]:
+                limit += 1
+
+        sealed = [s for s in self._segments() if s < limit]
+        if not sealed:
+            return 0
+
+        keys, rows = [], []
+        for segment in sealed:
+            for key, row in self._read_segment(segment):
+                keys.append(key)
+                rows.append(row)
+
+        key_parts = [np.array(keys, dtype=str)]
+        column_parts = {
+            name: [np.array([row[i] for row in rows], dtype=dtype)]
+            for i, (name, dtype) in enumerate(zip(COLUMNS, DTYPES))
+        }
+
+        # The existing archive goes first, so its copy of a duplicate wins
+        archive = self._load_archive()
+        if archive is not None:
+            key_parts.insert(0, np.asarray(archive["keys"])[archive["key_id"]])
+            for name in COLUMNS:
+                column_parts[name].insert(0, np.asarray(archive[name]))
+
+        unique_keys, key_id = np.unique(np.concatenate(key_parts), return_inverse=True)
+        arrays = {
+            name: np.concatenate(parts).astype(dtype)
+            for (name, parts), dtype in zip(column_parts.items(), DTYPES)
+        }
+
+        # Sort by (student, seq); the first copy of a duplicate wins
+        order = np.lexsort((np.arange(len(key_id)), arrays["seq"], key_id))
+        key_id = key_id[order]
+        seq = arrays["seq"][order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = (key_id[1:] != key_id[:-1]) | (seq[1:] != seq[:-1])
+
+        # Written aside, then renamed into place as the next generation
+        generations = self._archives()
+        generation = generations[-1] + 1 if generations else 1
+        tmp_path = os.path.join(self.directory, "archive.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        np.save(os.path.join(tmp_path, "keys.npy"), unique_keys)
+        np.save(os.path.join(tmp_path, "key_id.npy"), key_id[keep].astype(np.int32))
+        for name in COLUMNS:
+            np.save(os.path.join(tmp_path, name + ".npy"), arrays[name][order][keep])
+
+        os.rename(tmp_path, self._archive_path(generation))
+
+        for old in generations:
+            shutil.rmtree(self._archive_path(old), ignore_errors=True)
+        for segment in sealed:
+            os.remove(self._segment_path(segment))
+
+        return len(sealed)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+
+    def _lock_directory(self):
+        self._lock_file = open(os.path.join(self.directory, "LOCK"), "a")
+        if fcntl is None:
+            return
+
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise EventLogLockedError(
+                f"event log {self.directory} already has a writer; give every "
+                "worker process its own directory (or shard), or open it "
+                "with readonly=True"
+            ) from None
+
+    def _check_writer(self):
+        # A forked child shares the parent's lock, not its ownership
+        if os.getpid() != self._pid:
+            raise EventLogLockedError(
+                f"event log {self.directory} was opened by process {self._pid}, "
+                f"not {os.getpid()}; open the log after forking workers"
+            )
+
+    def _segments(self):
+        return sorted(
+            int(os.path.basename(path)[8:-4])
+            for path in glob.glob(os.path.join(self.directory, "segment-*.log"))
+        )
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:06d}.log")
+
+    def _read_checkpoint(self):
+        path = os.path.join(self.directory, "checkpoint.json")
+        if not os.path.exists(path):
+            return {"segment": 0, "offset": 0}
+
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _truncate_torn_record(path):
+        """
+        Cut a torn final record (crash mid-write) off the active
+        segment, so appends start on a record boundary.
+        """
+        if not os.path.exists(path):
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        position, size, end = 0, RECORD.size, len(data)
+        while position + size <= end:
+            length = size + KEY_LENGTH.unpack_from(data, position)[0]
+            if position + length > end:
+                break
+            position += length
+
+        if position < end:
+            with open(path, "r+b") as f:
+                f.truncate(position)
+                os.fsync(f.fileno())
+
+    def _read_segment(self, segment, offset=0):
+        """Yield (key, row) from one segment, starting at a byte offset."""
+        for key, row, _ in self._parse_segment(segment, offset):
+            yield key, row
+
+    def _parse_segment(self, segment, offset=0):
+        """As _read_segment, also yielding the byte offset after each record."""
+        path = self._segment_path(segment)
+        if not os.path.exists(path):
+            return
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        position, size, end = 0, RECORD.size, len(data)
+        unpack = RECORD.unpack_from
+
+        # A torn final record (crash mid-write) is ignored
+        while position + size <= end:
+            key_length, *row = unpack(data, position)
+            position += size
+            if position + key_length > end:
+                break
+            key = data[position:position + key_length].decode("utf-8")
+            position += key_length
+            yield key, tuple(row), offset + position
+
+    def _decoded_segment(self, segment):
+        """
+        (keys, key_id, {column: array}) for one segment, decoding only
+        the bytes appended since the previous call.
+        """
+        with self._columns_lock:
+            try:
+                inode = os.stat(self._segment_path(segment)).st_ino
+            except FileNotFoundError:
+                inode = None
+
+            cached = self._segment_columns.get(segment)
+            # A segment number is reused once a restarted writer finds
+            # every earlier segment compacted: a new file starts over
+            if cached is None or cached[0] != inode:
+                cached = (inode, 0, np.array([], dtype=str),
+                          np.array([], dtype=np.int64),
+                          {name: np.array([], dtype=dtype)
+                           for name, dtype in zip(COLUMNS, DTYPES)})
+
+            _, decoded, keys, key_id, columns = cached
+            new_keys, rows = [], []
+            for key, row, decoded in self._parse_segment(segment, decoded):
+                new_keys.append(key)
+                rows.append(row)
+
+            if rows:
+                # Old key_id index the old keys, new rows follow them
+                new_ids = np.arange(len(rows)) + len(keys)
+                keys, remap = np.unique(
+                    np.concatenate([keys, np.array(new_keys, dtype=str)]),
+                    return_inverse=True
+                )
+                key_id = remap[np.concatenate([key_id, new_ids])]
+                columns = {
+                    name: np.concatenate([
+                        columns[name], np.array([row[i] for row in rows], dtype=dtype)
+                    ])
+                    for i, (name, dtype) in enumerate(zip(COLUMNS, DTYPES))
+                }
+
+            if inode is not None:
+                self._segment_columns[segment] = (inode, decoded, keys, key_id, columns)
+
+            return keys, key_id, columns
+
+    def _archives(self):
+        return sorted(
+            int(os.path.basename(path)[8:])
+            for path in glob.glob(os.path.join(self.directory, "archive-*"))
+        )
+
+    def _archive_path(self, generation):
+        return os.path.join(self.directory, f"archive-{generation:06d}")
+
+    def _load_archive(self):
+        generations = self._archives()
+        if not generations:
+            return None
+
+        generation = generations[-1]
+        if self._archive is None or self._archive[0] != generation:
+            path = self._archive_path(generation)
+            self._archive = (generation, {
+                name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+                for name in ("keys", "key_id") + COLUMNS
+            })
+
+        return self._archive[1]
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Event log maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact = commands.add_parser(
+        "compact",
+        help="fold checkpointed segments into the archive (stop the "
+             "directory's writer first; running workers compact on their own)"
+    )
+    compact.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    log = EventLog(args.directory, compact_after=0)
+    try:
+        folded = log.compact()
+    finally:
+        log.close()
+
+    print(f"Folded {folded} segments into the archive of {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
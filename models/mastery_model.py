@@ -0,0 +1,162 @@
+# models/mastery_model.py
+
+"""
+Mastery models: how one attempt moves a topic's mastery.
+
+StudentModel keeps mastery as an integer percentage per topic and asks
+its mastery model (StudentModel.mastery_model, chosen by the
+"mastery_model" tunables) for the value after each attempt:
+
+- StepMasteryModel: fixed +step_up / -step_down (the default)
+- BKTMasteryModel: Bayesian Knowledge Tracing with per-topic
+  prior / learn / guess / slip parameters, fitted offline from the
+  event log (see ml.knowledge_tracing)
+
+A model implements initial_mastery(subject, topics),
+initial_knowledge(subject, topics) and
+next_state(student, i, is_correct) -> (mastery, knowledge); all are
+O(1) per attempt. knowledge is the model's own per-topic state at full
+precision (StudentModel._knowledge), or None for models that need only
+the integer mastery.
+"""
+
+import json
+import os
+
+
+class StepMasteryModel:
+    """Bounded fixed-step update (easy to justify to judges)."""
+
+    name = "step"
+
+    def __init__(self, step_up=5, step_down=3, initial=50):
+        self.step_up = step_up
+        self.step_down = step_down
+        self.initial = initial
+
+    def initial_mastery(self, subject, topics):
+        return [self.initial] * len(topics)
+
+    def initial_knowledge(self, subject, topics):
+        return None
+
+    def next_state(self, student, i, is_correct):
+        if is_correct:
+            return min(100, student._mastery[i] + self.step_up), None
+        return max(0, student._mastery[i] - self.step_down), None
+
+
+class BKTParams:
+    """Per-topic BKT parameters: P(known) at first attempt, P(learn), P(guess), P(slip)."""
+
+    __slots__ = ("prior", "learn", "guess", "slip")
+
+    def __init__(self, prior=0.5, learn=0.1, guess=0.2, slip=0.1):
+        self.prior = prior
+        self.learn = learn
+        self.guess = guess
+        self.slip = slip
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def update(self, p, is_correct):
+        """
+        P(known) after an attempt: the posterior given the outcome, then
+        the learning step. p is held within 0.5%-99.5% first: taken
+        literally, P(known) = 1 would never drop again after a miss.
+        """
+        p = min(max(p, 0.005), 0.995)
+
+        if is_correct:
+            known, unknown = p * (1 - self.slip), (1 - p) * self.guess
+        else:
+            known, unknown = p * self.slip, (1 - p) * (1 - self.guess)
+
+        posterior = known / (known + unknown) if known + unknown else p
+        return posterior + (1 - posterior) * self.learn
+
+
+class BKTMasteryModel:
+    """
+    Bayesian Knowledge Tracing.
+
+    params: {subject: {topic: BKTParams}}; topics without fitted
+    parameters use `default`, resolved once per (subject, topic list).
+    P(known) is carried per topic at full precision as the student's
+    knowledge, and mastery is it rounded to a whole percent, so the
+    rounding never feeds back into later updates. A student without
+    knowledge (e.g. one that last practiced under the step model)
+    starts from its mastery.
+    """
+
+    name = "bkt"
+
+    def __init__(self, params=None, default=None):
+        self.params = params or {}
+        self.default = default or BKTParams()
+        self._resolved = {}  # (subject, topics) -> per-topic BKTParams
+
+    @classmethod
+    def load(cls, path, default=None):
+        """Model from a parameter file written by ml.knowledge_tracing."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        return cls({
+            subject: {topic: BKTParams.from_dict(p) for topic, p in topics.items()}
+            for subject, topics in data.items()
+        }, default)
+
+    def topic_params(self, subject, topic):
+        return self.params.get(subject, {}).get(topic, self.default)
+
+    def initial_mastery(self, subject, topics):
+        return [
+            round(self.topic_params(subject, topic).prior * 100) for topic in topics
+        ]
+
+    def initial_knowledge(self, subject, topics):
+        return [self.topic_params(subject, topic).prior for topic in topics]
+
+    def next_state(self, student, i, is_correct):
+        params = self._resolved.get((student.subject, student.topics))
+        if params is None:
+            params = self._resolve(student.subject, student.topics)
+
+        knowledge = student._knowledge
+        p = knowledge[i] if knowledge is not None else student._mastery[i] / 100
+
+        after = params[i].update(p, is_correct)
+        return min(100, max(0, round(after * 100))), after
+
+    def _resolve(self, subject, topics):
+        params = self._resolved[(subject, topics)] = tuple(
+            self.topic_params(subject, topic) for topic in topics
+        )
+        return params
+
+
+def mastery_model_from_config(config):
+    """Mastery model from the "mastery_model" tunables (step by default)."""
+    backend = config.get("backend", "step")
+
+    if backend == "step":
+        return StepMasteryModel(
+            step_up=config.get("step_up", 5),
+            step_down=config.get("step_down", 3)
+        )
+
+    if backend == "bkt":
+        # Until a parameter file has been fitted, every topic uses the defaults
+        default = BKTParams.from_dict(config.get("default", {}))
+        path = config.get("params")
+        if path and os.path.exists(path):
+            return BKTMasteryModel.load(path, default)
+        return BKTMasteryModel(default=default)
+
+    raise ValueError(f"unknown mastery model {backend!r}")
@@ -0,0 +1,397 @@
+# models/question_bank_file.py
+
+"""
+Compiled, memory-mapped question bank.
+
+The JSON bank is compiled once into a binary file:
+
+    magic (8 bytes) | header length (u64) | JSON header | padding
+    | records (fixed-width, grouped by bucket) | id order | sorted ids
+    | text blob
+
+Records hold each question's ID, item parameters, difficulty label and
+the location of its JSON in the blob. Workers map the file read-only,
+so every process on the host shares the same physical pages, and
+startup only parses the small header. Question JSON (text, hints, ...)
+is decoded lazily, the first time a served question is read.
+
+Compiling also assigns an "id" to every question that lacks one and,
+once the compile has succeeded, writes the IDs back to the JSON bank,
+so they stay put as questions are added or reordered (see
+models.question_index.assign_question_ids).
+
+Usage:
+    python -m models.question_bank_file data/question_bank.json
+"""
+
+import argparse
+import json
+import mmap
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+from models.question_index import (
+    QuestionIndex, SubjectPartitions, assign_question_ids, iter_questions
+)
+
+
+MAGIC = b"NXQB\x01\x00\x00\x00"
+EXTENSION = ".qbin"
+
+RECORD_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("discrimination", "<f8"),
+    ("irt_difficulty", "<f8"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("difficulty", "<u2"),
+    ("_pad", "<u2")
+])
+
+
+# -------------------------
+# Compilation
+# -------------------------
+
+def compile_question_bank(question_bank, path):
+    """Write a compiled bank for `question_bank` to `path`."""
+    subjects = {
+        subject: list(topics.keys())
+        for subject, topics in question_bank.items()
+    }
+
+    # Group questions by bucket, keeping bank order inside each bucket
+    partitions = {}
+    for qid, subject, topic, q in iter_questions(question_bank):
+        key = (subject, topic, q.get("difficulty"))
+        partitions.setdefault(key, []).append((qid, q))
+
+    difficulties = list(dict.fromkeys(key[2] for key in partitions))
+    count = sum(len(questions) for questions in partitions.values())
+
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    blob = bytearray()
+    buckets = []
+    row = 0
+
+    for (subject, topic, difficulty), questions in partitions.items():
+        buckets.append([subject, topic, difficulty, row, len(questions)])
+
+        for qid, q in questions:
+            encoded = json.dumps(
+                q, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+
+            records[row] = (
+                qid,
+                q.get("discrimination", np.nan),
+                q.get("irt_difficulty", np.nan),
+                len(blob),
+                len(encoded),
+                difficulties.index(difficulty),
+                0
+            )
+            blob += encoded
+            row += 1
+
+    id_order = np.argsort(records["id"], kind="stable").astype("<i8")
+    sorted_ids = records["id"][id_order]
+
+    header = {
+        "count": count,
+        "subjects": subjects,
+        "difficulties": difficulties,
+        "buckets": buckets
+    }
+    encoded_header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    # Sections start on 8-byte boundaries so they map as aligned arrays
+    records_offset = _align(len(MAGIC) + 8 + len(encoded_header))
+    id_order_offset = records_offset + records.nbytes
+    sorted_ids_offset = id_order_offset + id_order.nbytes
+    blob_offset = sorted_ids_offset + sorted_ids.nbytes
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded_header).to_bytes(8, "little"))
+        f.write(encoded_header)
+        f.write(bytes(records_offset - f.tell()))
+        f.write(records.tobytes())
+        f.write(id_order.tobytes())
+        f.write(sorted_ids.tobytes())
+        f.write(blob)
+
+        assert f.tell() == blob_offset + len(blob)
+
+    os.replace(tmp_path, path)
+    return count
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+# -------------------------
+# Mapped Access
+# -------------------------
+
+class MappedQuestion(Mapping):
+    """
+    Read-only view of one compiled question.
+    ID and difficulty come from the record; everything else is decoded
+    from the blob on first access.
+    """
+
+    __slots__ = ("_bank", "_row", "_data")
+
+    def __init__(self, bank, row):
+        self._bank = bank
+        self._row = row
+        self._data = None
+
+    def __getitem__(self, key):
+        if key == "id":
+            return int(self._bank.records["id"][self._row])
+        if key == "difficulty":
+            return self._bank.difficulty_of(self._row)
+        return self._decoded()[key]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __len__(self):
+        return len(self._decoded())
+
+    def _decoded(self):
+        if self._data is None:
+            self._data = {**self._bank.decode(self._row), "id": self["id"]}
+        return self._data
+
+
+class MappedBucket:
+    """
+    QuestionBucket over a contiguous slice of compiled records.
+    ids and item parameters are views into the shared mapping.
+    """
+
+    __slots__ = (
+        "_bank", "_start", "ids", "discrimination", "item_difficulty",
+        "__weakref__"
+    )
+
+    def __init__(self, bank, start, count):
+        records = bank.records[start:start + count]
+
+        self._bank = bank
+        self._start = start
+        self.ids = records["id"]
+        self.discrimination = records["discrimination"]
+        self.item_difficulty = records["irt_difficulty"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+    def __getitem__(self, position):
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self._bank.question(self._start + position)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class MappedQuestionIndex:
+    """
+    QuestionIndex over a compiled bank file.
+    Offers the same lookups; nothing but the header is parsed up front,
+    and a subject's buckets are created on its first access.
+    """
+
+    def __init__(self, path, max_subjects=None):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled question bank")
+
+        header_start = len(MAGIC) + 8
+        header_length = int.from_bytes(self._mmap[len(MAGIC):header_start], "little")
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+
+        count = header["count"]
+        records_offset = _align(header_start + header_length)
+        id_order_offset = records_offset + count * RECORD_DTYPE.itemsize
+        sorted_ids_offset = id_order_offset + count * 8
+        self._blob_offset = sorted_ids_offset + count * 8
+
+        self.records = np.frombuffer(
+            self._mmap, dtype=RECORD_DTYPE, count=count, offset=records_offset
+        )
+        self._id_order = np.frombuffer(
+            self._mmap, dtype="<i8", count=count, offset=id_order_offset
+        )
+        self._sorted_ids = np.frombuffer(
+            self._mmap, dtype="<i8", count=count, offset=sorted_ids_offset
+        )
+
+        self._difficulties = header["difficulties"]
+        self._topics = {
+            subject: tuple(topics)
+            for subject, topics in header["subjects"].items()
+        }
+
+        self._bucket_ranges = {}
+        for subject, topic, difficulty, start, n in header["buckets"]:
+            self._bucket_ranges.setdefault(subject, []).append(
+                (topic, difficulty, start, n)
+            )
+
+        self._partitions = SubjectPartitions(self._partition, max_subjects)
+
+    def _partition(self, subject):
+        return {
+            (topic, difficulty): MappedBucket(self, start, n)
+            for topic, difficulty, start, n in self._bucket_ranges[subject]
+        }
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def bucket(self, subject, topic, difficulty):
+        """O(1) lookup of the questions for one partition."""
+        if subject not in self._bucket_ranges:
+            return _EMPTY
+
+        return self._partitions.get(subject).get((topic, difficulty), _EMPTY)
+
+    def get(self, question_id, subject=None):
+        """Return a question by its stable ID (or None)."""
+        if not isinstance(question_id, int) or not len(self._sorted_ids):
+            return None
+
+        i = int(np.searchsorted(self._sorted_ids, question_id))
+        if i == len(self._sorted_ids) or self._sorted_ids[i] != question_id:
+            return None
+
+        return self.question(int(self._id_order[i]))
+
+    def subjects(self):
+        return tuple(self._topics.keys())
+
+    def topics(self, subject):
+        return self._topics.get(subject, ())
+
+    def loaded_subjects(self):
+        return self._partitions.loaded()
+
+    def __len__(self):
+        return len(self.records)
+
+    # -------------------------
+    # Records
+    # -------------------------
+
+    def question(self, row):
+        return MappedQuestion(self, row)
+
+    def difficulty_of(self, row):
+        return self._difficulties[self.records["difficulty"][row]]
+
+    def decode(self, row):
+        record = self.records[row]
+        start = self._blob_offset + int(record["offset"])
+        return json.loads(self._mmap[start:start + int(record["length"])])
+
+
+class _EmptyBucket:
+    __slots__ = ("__weakref__",)
+
+    ids = np.empty(0, dtype="<i8")
+    discrimination = np.empty(0)
+    item_difficulty = np.empty(0)
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __getitem__(self, position):
+        raise IndexError(position)
+
+    def __bool__(self):
+        return False
+
+
+_EMPTY = _EmptyBucket()
+
+
+# -------------------------
+# Loading
+# -------------------------
+
+def load_question_index(path, max_subjects=None):
+    """
+    Index for the bank at `path`, keeping at most max_subjects subjects
+    partitioned in memory (all of them by default).
+    A compiled file is mapped directly. For a JSON bank, a compiled file
+    next to it (same name, .qbin) is used when it is at least as new;
+    otherwise the JSON is parsed into an in-memory QuestionIndex.
+    """
+    if path.endswith(EXTENSION):
+        return MappedQuestionIndex(path, max_subjects)
+
+    compiled = os.path.splitext(path)[0] + EXTENSION
+    if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+        return MappedQuestionIndex(compiled, max_subjects)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return QuestionIndex(json.load(f), max_subjects)
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compile a question bank JSON file for memory-mapped loading."
+    )
+    parser.add_argument("bank", help="question bank JSON file")
+    parser.add_argument(
+        "-o", "--output", help=f"compiled file (default: bank with {EXTENSION})"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        question_bank = json.load(f)
+
+    # Assigning validates existing IDs and compiling validates the rest;
+    # the JSON is only rewritten once both have succeeded
+    assigned = assign_question_ids(question_bank)
+
+    output = args.output or os.path.splitext(args.bank)[0] + EXTENSION
+    count = compile_question_bank(question_bank, output)
+
+    if assigned:
+        tmp_path = args.bank + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(question_bank, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, args.bank)
+
+        # Keep the compiled file at least as new as the JSON, so
+        # load_question_index still picks it up
+        os.utime(output)
+        print(f"Assigned ids to {assigned} questions in {args.bank}")
+
+    print(f"Compiled {count} questions to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# models/question_index.py
+
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+
+from models.student_model import MAX_QUESTION_ID
+
+
+def iter_questions(question_bank):
+    """
+    Yield (question_id, subject, topic, question) in bank order.
+    Every question carries an explicit, unique integer "id" (see
+    assign_question_ids); IDs are what student history, seen bitmaps
+    and calibration refer to, so they must not move when the bank is
+    edited. Raises ValueError for a missing or duplicate ID.
+    """
+    seen = set()
+
+    for subject, topics in question_bank.items():
+        for topic, questions in topics.items():
+            for position, q in enumerate(questions):
+                qid = q.get("id")
+
+                if isinstance(qid, bool) or not isinstance(qid, int) \
+                        or not 0 <= qid <= MAX_QUESTION_ID:
+                    raise ValueError(
+                        f"{subject} / {topic} question {position}: "
+                        f"missing or invalid id {qid!r} "
+                        "(assign ids with python -m models.question_bank_file)"
+                    )
+                if qid in seen:
+                    raise ValueError(
+                        f"{subject} / {topic} question {position}: duplicate id {qid}"
+                    )
+
+                seen.add(qid)
+                yield qid, subject, topic, q
+
+
+def assign_question_ids(question_bank):
+    """
+    Give every question without an "id" one, in place.
+    Existing IDs are checked first: a non-integer or duplicate ID raises
+    ValueError before anything is assigned. New IDs count up from the
+    highest existing one, so they never collide with questions further
+    along the bank; in a bank without IDs that numbers questions in bank
+    order (subject → topic → position), which is how IDs were derived
+    before they were stored. Returns the number of IDs assigned.
+    """
+    seen = set()
+
+    for subject, topics in question_bank.items():
+        for topic, questions in topics.items():
+            for position, q in enumerate(questions):
+                if "id" not in q:
+                    continue
+
+                qid = q["id"]
+                if isinstance(qid, bool) or not isinstance(qid, int) or qid < 0:
+                    raise ValueError(
+                        f"{subject} / {topic} question {position}: invalid id {qid!r}"
+                    )
+                if qid in seen:
+                    raise ValueError(
+                        f"{subject} / {topic} question {position}: duplicate id {qid}"
+                    )
+                seen.add(qid)
+
+    next_id = max(seen, default=-1) + 1
+    assigned = 0
+
+    for topics in question_bank.values():
+        for questions in topics.values():
+            for q in questions:
+                if "id" not in q:
+                    q["id"] = next_id
+                    next_id += 1
+                    assigned += 1
+
+    return assigned
+
+
+class QuestionBucket:
+    """
+    Immutable group of questions sharing (subject, topic, difficulty).
+    Questions, integer IDs and item parameters are stored in parallel.
+    Item parameters are NaN for questions that have not been calibrated.
+    """
+
+    __slots__ = (
+        "questions", "ids", "discrimination", "item_difficulty", "__weakref__"
+    )
+
+    def __init__(self, questions, ids):
+        self.questions = tuple(questions)
+        self.ids = tuple(ids)
+
+        self.discrimination = _param_array(self.questions, "discrimination")
+        self.item_difficulty = _param_array(self.questions, "irt_difficulty")
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __iter__(self):
+        return iter(self.questions)
+
+    def __getitem__(self, position):
+        return self.questions[position]
+
+    def __bool__(self):
+        return bool(self.questions)
+
+
+def _param_array(questions, field):
+    values = np.array(
+        [q.get(field, np.nan) for q in questions], dtype=np.float64
+    )
+    values.setflags(write=False)
+    return values
+
+
+EMPTY_BUCKET = QuestionBucket((), ())
+
+
+class SubjectPartitions:
+    """
+    Per-subject partitions, built by loader(subject) on first access.
+    At most max_subjects stay resident; the least recently used subject
+    is dropped beyond that and rebuilt if it is needed again.
+    """
+
+    def __init__(self, loader, max_subjects=None):
+        self._loader = loader
+        self.max_subjects = max_subjects
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject):
+        with self._lock:
+            partition = self._loaded.get(subject)
+            if partition is not None:
+                self._loaded.move_to_end(subject)
+                return partition
+
+        # Built outside the lock; a concurrent duplicate build is discarded
+        partition = self._loader(subject)
+
+        with self._lock:
+            partition = self._loaded.setdefault(subject, partition)
+            self._loaded.move_to_end(subject)
+
+            while self.max_subjects and len(self._loaded) > self.max_subjects:
+                self._loaded.popitem(last=False)
+
+        return partition
+
+    def loaded(self):
+        """Subjects currently resident, least recently used first."""
+        with self._lock:
+            return tuple(self._loaded)
+
+
+class QuestionIndex:
+    """
+    Read-only index over the question bank.
+    Every question has a stable integer ID (see iter_questions).
+
+    Subjects are partitioned lazily: a subject's buckets and ID lookup
+    are built on its first access, so lookups never scan topic lists,
+    and unused subjects are evicted beyond max_subjects.
+    """
+
+    def __init__(self, question_bank, max_subjects=None):
+        self._bank = question_bank
+        self._topics = {
+            subject: tuple(topics.keys())
+            for subject, topics in question_bank.items()
+        }
+
+        # One cheap pass that validates every ID and records the range
+        # each subject's IDs cover
+        self._id_ranges = {}
+        self._count = 0
+
+        for qid, subject, _, _ in iter_questions(question_bank):
+            low, high = self._id_ranges.get(subject, (qid, qid))
+            self._id_ranges[subject] = (min(low, qid), max(high, qid))
+            self._count += 1
+
+        self._partitions = SubjectPartitions(self._partition, max_subjects)
+
+    def _partition(self, subject):
+        """(buckets by (topic, difficulty), questions by ID) for one subject."""
+        buckets = {}
+        by_id = {}
+        partitions = {}
+
+        for qid, _, topic, q in iter_questions({subject: self._bank[subject]}):
+            frozen = MappingProxyType(dict(q))
+            key = (topic, q.get("difficulty"))
+            partitions.setdefault(key, []).append(frozen)
+            by_id[qid] = frozen
+
+        for key, frozen_questions in partitions.items():
+            buckets[key] = QuestionBucket(
+                frozen_questions,
+                (q["id"] for q in frozen_questions)
+            )
+
+        return buckets, by_id
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def bucket(self, subject, topic, difficulty):
+        """O(1) lookup of the questions for one partition."""
+        if subject not in self._topics:
+            return EMPTY_BUCKET
+
+        buckets, _ = self._partitions.get(subject)
+        return buckets.get((topic, difficulty), EMPTY_BUCKET)
+
+    def get(self, question_id, subject=None):
+        """
+        Return a question by its stable ID (or None).
+        Passing the subject, when known, avoids loading other subjects.
+        """
+        if not isinstance(question_id, int):
+            return None
+
+        subjects = (subject,) if subject is not None else self._topics
+
+        for candidate in subjects:
+            low, high = self._id_ranges.get(candidate, (0, -1))
+            if low <= question_id <= high:
+                _, by_id = self._partitions.get(candidate)
+                if question_id in by_id:
+                    return by_id[question_id]
+
+        return None
+
+    def subjects(self):
+        return tuple(self._topics.keys())
+
+    def topics(self, subject):
+        return self._topics.get(subject, ())
+
+    def loaded_subjects(self):
+        return self._partitions.loaded()
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,121 @@
+# models/recent_window.py
+
+from array import array
+
+
+class RecentWindow:
+    """
+    Recent results per topic for one student.
+
+    Each topic owns a fixed-capacity ring buffer of bits (1 = correct)
+    plus a running count of correct results, so pushing a result and
+    reading the error rate are both O(1) regardless of window size.
+
+    mode:
+    - "window": error rate over the last `size` results
+    - "decay":  exponentially-decayed error rate; each new result has
+                weight `decay` (default 2 / (size + 1))
+    """
+
+    __slots__ = (
+        "size", "mode", "decay", "_stride",
+        "_bits", "_len", "_pos", "_correct", "_ewma"
+    )
+
+    MODES = ("window", "decay")
+
+    def __init__(self, n_topics, size=5, mode="window", decay=None):
+        if size < 1:
+            raise ValueError("window size must be at least 1")
+        if mode not in self.MODES:
+            raise ValueError(f"unknown recent window mode: {mode}")
+
+        self.size = size
+        self.mode = mode
+        self.decay = decay if decay is not None else 2 / (size + 1)
+        self._stride = (size + 7) // 8
+
+        self._bits = bytearray(n_topics * self._stride)
+        self._len = array("I", bytes(4 * n_topics))
+        self._pos = array("I", bytes(4 * n_topics))
+        self._correct = array("I", bytes(4 * n_topics))
+        self._ewma = array("d", bytes(8 * n_topics)) if mode == "decay" else None
+
+    # -------------------------
+    # Update
+    # -------------------------
+
+    def push(self, i, is_correct):
+        """Add one result for topic i, evicting the oldest if full."""
+        pos = self._pos[i]
+        byte = i * self._stride + (pos >> 3)
+        mask = 1 << (pos & 7)
+
+        if self._len[i] == self.size:
+            if self._bits[byte] & mask:
+                self._correct[i] -= 1
+        else:
+            self._len[i] += 1
+
+        if is_correct:
+            self._bits[byte] |= mask
+            self._correct[i] += 1
+        else:
+            self._bits[byte] &= ~mask & 0xFF
+
+        self._pos[i] = pos + 1 if pos + 1 < self.size else 0
+
+        if self._ewma is not None:
+            error = 0.0 if is_correct else 1.0
+            if self._len[i] == 1:
+                self._ewma[i] = error
+            else:
+                self._ewma[i] += self.decay * (error - self._ewma[i])
+
+    # -------------------------
+    # Queries
+    # -------------------------
+
+    def error_rate(self, i):
+        """Recent error rate for topic i (0 when there are no results)."""
+        length = self._len[i]
+        if not length:
+            return 0
+
+        if self._ewma is not None:
+            return self._ewma[i]
+
+        return 1 - (self._correct[i] / length)
+
+    def __len__(self):
+        return len(self._len)
+
+    def count(self, i):
+        return self._len[i]
+
+    def results(self, i):
+        """Results for topic i, oldest first."""
+        length = self._len[i]
+        start = (self._pos[i] - length) % self.size
+        base = i * self._stride
+
+        results = []
+        for k in range(length):
+            pos = (start + k) % self.size
+            results.append(bool(self._bits[base + (pos >> 3)] >> (pos & 7) & 1))
+
+        return results
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def config(self):
+        return {"size": self.size, "mode": self.mode, "decay": self.decay}
+
+    def ewma_values(self):
+        return self._ewma.tolist() if self._ewma is not None else None
+
+    def restore_ewma(self, values):
+        if self._ewma is not None and values:
+            self._ewma[:] = array("d", values)
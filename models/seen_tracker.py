@@ -0,0 +1,195 @@
+# models/seen_tracker.py
+
+import re
+
+# Any byte with at least one unseen (0) bit
+_NOT_FULL = re.compile(rb"[^\xff]")
+
+
+class SeenTracker:
+    """
+    Per-student record of which questions have been served.
+
+    - one bitmap per question bucket, one bit per question (about
+      1.25 KB for 10,000 questions); bits follow the bucket's serving
+      order, so "next unseen from here" is a byte scan that skips fully
+      seen stretches at C speed. Each bitmap records the serving order
+      it was built for (order_id); if the order changes, e.g. after a
+      recalibration, the bitmap starts over.
+    - a short spaced-repetition queue per topic: questions answered
+      incorrectly come back after REVIEW_INTERVALS further attempts on
+      the topic, stepping through the intervals while they are answered
+      correctly
+
+    Once every question in a bucket has been seen, the bucket starts a
+    fresh cycle.
+    """
+
+    __slots__ = ("_bitmaps", "_reviews")
+
+    REVIEW_INTERVALS = (2, 5, 12, 30)
+    MAX_REVIEWS_PER_TOPIC = 20
+
+    def __init__(self):
+        self._bitmaps = {}  # bucket key -> (order_id, bytearray)
+        self._reviews = {}  # topic -> [[due, question_id, stage], ...]
+
+    # -------------------------
+    # Seen Bitmaps
+    # -------------------------
+
+    def next_unseen(self, key, order_id, size, start, count=1):
+        """
+        Up to `count` unseen positions, scanning forward from `start`
+        and wrapping around. Does not mark anything as seen.
+        """
+        if size == 0:
+            return []
+
+        bitmap = self._bitmap(key, order_id, size)
+        found = self._scan(bitmap, size, start, count)
+
+        if not found:
+            # Every question seen: start a new cycle
+            bitmap[:] = _empty_bitmap(size)
+            found = self._scan(bitmap, size, start, count)
+
+        return found
+
+    def mark_seen(self, key, order_id, size, position):
+        bitmap = self._bitmap(key, order_id, size)
+        bitmap[position >> 3] |= 1 << (position & 7)
+
+    def _bitmap(self, key, order_id, size):
+        entry = self._bitmaps.get(key)
+
+        if entry is None or entry[0] != order_id or len(entry[1]) != (size + 7) >> 3:
+            entry = self._bitmaps[key] = (order_id, _empty_bitmap(size))
+
+        return entry[1]
+
+    @staticmethod
+    def _scan(bitmap, size, start, count):
+        found = []
+        start %= size
+
+        # Bits of the starting byte at or after `start`
+        byte = start >> 3
+        for bit in range(start & 7, 8):
+            if not bitmap[byte] >> bit & 1:
+                found.append(byte * 8 + bit)
+                if len(found) == count:
+                    return found
+
+        # Remaining bytes, wrapping around, skipping full ones in C
+        n_bytes = len(bitmap)
+        for lo, hi in ((byte + 1, n_bytes), (0, byte + 1)):
+            pos = lo
+            while pos < hi:
+                match = _NOT_FULL.search(bitmap, pos, hi)
+                if match is None:
+                    break
+                pos = match.start()
+                for bit in range(8):
+                    position = pos * 8 + bit
+                    if hi == byte + 1 and pos == byte and position >= start:
+                        break
+                    if not bitmap[pos] >> bit & 1:
+                        found.append(position)
+                        if len(found) == count:
+                            return found
+                pos += 1
+
+        return found
+
+    # -------------------------
+    # Spaced Repetition
+    # -------------------------
+
+    def due_review(self, topic, clock):
+        """
+        A question due for review at this topic clock (attempt count),
+        or None. A served review is pushed back by the first interval so
+        it is not served again before it is answered.
+        """
+        entry = self._due_entry(topic, clock)
+        if entry is None:
+            return None
+
+        entry[0] = clock + self.REVIEW_INTERVALS[0]
+        return entry[1]
+
+    def peek_review(self, topic, clock):
+        """Like due_review, without changing the schedule."""
+        entry = self._due_entry(topic, clock)
+        return None if entry is None else entry[1]
+
+    def _due_entry(self, topic, clock):
+        reviews = self._reviews.get(topic)
+        if not reviews:
+            return None
+
+        entry = min(reviews, key=lambda r: r[0])
+        return entry if entry[0] <= clock else None
+
+    def record_result(self, topic, clock, question_id, is_correct):
+        """Schedule (or advance) spaced repetition after an answer."""
+        if question_id is None:
+            return
+
+        reviews = self._reviews.setdefault(topic, [])
+        entry = next((r for r in reviews if r[1] == question_id), None)
+
+        if not is_correct:
+            if entry is None:
+                entry = [0, question_id, 0]
+                reviews.append(entry)
+            entry[2] = 0
+            entry[0] = clock + self.REVIEW_INTERVALS[0]
+
+            if len(reviews) > self.MAX_REVIEWS_PER_TOPIC:
+                reviews.remove(max(reviews, key=lambda r: r[0]))
+            return
+
+        if entry is None:
+            return
+
+        entry[2] += 1
+        if entry[2] >= len(self.REVIEW_INTERVALS):
+            reviews.remove(entry)
+        else:
+            entry[0] = clock + self.REVIEW_INTERVALS[entry[2]]
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def to_dict(self):
+        return {
+            "bitmaps": {
+                key: [order_id, bitmap.hex()]
+                for key, (order_id, bitmap) in self._bitmaps.items()
+            },
+            "reviews": self._reviews
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tracker = cls()
+        tracker._bitmaps = {
+            key: (order_id, bytearray.fromhex(bitmap))
+            for key, (order_id, bitmap) in data.get("bitmaps", {}).items()
+        }
+        tracker._reviews = {
+            topic: [list(r) for r in reviews]
+            for topic, reviews in data.get("reviews", {}).items()
+        }
+        return tracker
+
+
+def _empty_bitmap(size):
+    """All unseen, with padding bits past `size` marked as seen."""
+    bitmap = bytearray((size + 7) >> 3)
+    if size & 7:
+        bitmap[-1] = 0xFF & ~((1 << (size & 7)) - 1)
+    return bitmap
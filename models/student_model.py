@@ -1,69 +1,273 @@
 # models/student_model.py
 
-from collections import defaultdict
-from datetime import datetime
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+from models.attempt_history import AttemptHistory
+from models.mastery_model import StepMasteryModel
+from models.recent_window import RecentWindow
+from models.seen_tracker import SeenTracker
+from models.topic_priority import TopicPriorityIndex
+
+
+# Topic tables are shared by every student with the same topic list
+_TOPIC_TABLES = {}
+
+# question_id is stored in an int32 history column (-1 for none)
+MAX_QUESTION_ID = 2**31 - 1
+
+
+def _topic_table(topics):
+    key = tuple(topics)
+    table = _TOPIC_TABLES.get(key)
+
+    if table is None:
+        table = _TOPIC_TABLES[key] = (key, {t: i for i, t in enumerate(key)})
+
+    return table
+
+
+def check_question_id(question_id):
+    """question_id as stored in history; ValueError if it cannot be."""
+    if question_id is None:
+        return None
+
+    if isinstance(question_id, bool) or not isinstance(question_id, int) \
+            or not 0 <= question_id <= MAX_QUESTION_ID:
+        raise ValueError(f"invalid question_id {question_id!r}")
+
+    return question_id
+
+
+def _knowledge_array(values):
+    return array("d", values) if values is not None else None
+
+
+class TopicArrayView(Mapping):
+    """Read-only {topic: value} view over a per-topic array."""
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, topic):
+        return self._values[self._index[topic]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def copy(self):
+        return dict(self.items())
+
+
+class DerivedView:
+    """
+    Dashboard analytics derived from one version of a student's state.
+    Computed in a single pass and reused until the next attempt.
+    """
+
+    __slots__ = (
+        "version", "mastery_overview", "strengths", "weak_areas", "focus_topic"
+    )
+
+    def __init__(self, student, strength_threshold=75, weak_threshold=50):
+        self.version = student.version
+        self.mastery_overview = {}
+        self.strengths = []
+        self.weak_areas = []
+
+        for topic, mastery in zip(student.topics, student._mastery):
+            self.mastery_overview[topic] = mastery
+            if mastery >= strength_threshold:
+                self.strengths.append(f"{topic} ({mastery}%)")
+            if mastery < weak_threshold:
+                self.weak_areas.append(f"{topic} ({mastery}%)")
+
+        self.focus_topic = student.get_focus_topic()
 
 
 class StudentModel:
     """
     State layer for a single student (session-based).
     Tracks mastery, attempts, accuracy, and learning history per topic.
+
+    State is stored compactly: per-topic values live in typed arrays
+    indexed by topic position, the recent window is a bit-packed
+    RecentWindow, and history is a columnar AttemptHistory. The mapping-style
+    attributes (mastery, attempts, ...) are read-only views over them.
     """
 
-    def __init__(self, subject, topics):
+    __slots__ = (
+        "student_id", "subject", "topics", "_topic_index", "version",
+        "_mastery", "_attempts", "_correct", "_knowledge",
+        "_recent", "_focus", "_derived", "_history", "_seen", "prefetch",
+        "stored"
+    )
+
+    # How attempts move mastery (see models.mastery_model); replaced
+    # for every student when the "mastery_model" tunables change
+    mastery_model = StepMasteryModel()
+
+    # Tunables (easy to justify to judges)
+    RECENT_WINDOW = 5
+    RECENT_MODE = "window"  # or "decay" for an exponentially-decayed rate
+
+    def __init__(self, subject, topics, student_id=None,
+                 recent_window=None, recent_mode=None, recent_decay=None):
+        self.student_id = student_id
         self.subject = subject
+        self.topics, self._topic_index = _topic_table(topics)
+
+        # Bumped on every attempt; invalidates cached derived views
+        self.version = 0
+
+        n = len(self.topics)
 
         # Core per-topic state
-        self.mastery = {topic: 50 for topic in topics}  # start neutral
-        self.attempts = defaultdict(int)
-        self.correct_attempts = defaultdict(int)
+        self._mastery = array("b", self.mastery_model.initial_mastery(subject, self.topics))
+        self._attempts = array("I", bytes(4 * n))
+        self._correct = array("I", bytes(4 * n))
+
+        # The mastery model's full-precision state, if it keeps one
+        self._knowledge = _knowledge_array(
+            self.mastery_model.initial_knowledge(subject, self.topics)
+        )
+
+        # Recent results: ring buffer with running counts per topic
+        self._recent = RecentWindow(
+            n,
+            size=recent_window or self.RECENT_WINDOW,
+            mode=recent_mode or self.RECENT_MODE,
+            decay=recent_decay
+        )
+
+        # Focus-topic priority index, built on first get_focus_topic()
+        self._focus = None
+        self._derived = None
+
+        self._history = None  # global event log, allocated on first attempt
+        self._seen = None  # served questions, allocated on first question
+
+        # Transient prefetched questions (see PracticeService); not persisted
+        self.prefetch = None
+
+        # (backend revision, history total) this state was loaded or last
+        # saved as, None if never stored (see StudentStore); not persisted
+        self.stored = None
+
+    # -------------------------
+    # Mapping-Style Views
+    # -------------------------
+
+    @property
+    def mastery(self):
+        return TopicArrayView(self._topic_index, self._mastery)
+
+    @property
+    def attempts(self):
+        return TopicArrayView(self._topic_index, self._attempts)
 
-        # Fine-grained tracking
-        self.recent_results = defaultdict(list)  # last N results per topic
-        self.history = []  # global event log
+    @property
+    def correct_attempts(self):
+        return TopicArrayView(self._topic_index, self._correct)
 
-        # Tunables (easy to justify to judges)
-        self.MASTERY_STEP_UP = 5
-        self.MASTERY_STEP_DOWN = 3
-        self.RECENT_WINDOW = 5
+    @property
+    def recent_results(self):
+        """{topic: [bool, ...]} oldest first, for topics with results."""
+        return {
+            topic: self._recent.results(i)
+            for topic, i in self._topic_index.items()
+            if self._recent.count(i)
+        }
+
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = AttemptHistory(self.topics)
+        return self._history
+
+    @property
+    def seen(self):
+        """SeenTracker of served questions and scheduled reviews."""
+        if self._seen is None:
+            self._seen = SeenTracker()
+        return self._seen
 
     # -------------------------
     # Update Logic
     # -------------------------
 
-    def record_attempt(self, topic, is_correct):
-        """Update student state after an attempt."""
+    def record_attempt(self, topic, is_correct, question_id=None, timestamp=None):
+        """
+        Update student state after an attempt.
+        timestamp: epoch seconds of the attempt (defaults to now)
+
+        Raises KeyError (unknown topic) or ValueError (bad question_id
+        or timestamp) before any state changes.
+        """
 
-        self.attempts[topic] += 1
+        i = self._topic_index[topic]
+        question_id = check_question_id(question_id)
+        if timestamp is not None:
+            timestamp = float(timestamp)
+
+        mastery_before = self._mastery[i]
+        mastery_after, knowledge_after = self._next_state(i, is_correct)
+
+        # Log history first: every value is checked, so the counters
+        # below never run ahead of it
+        self.history.append(
+            i, question_id, is_correct, mastery_before, mastery_after,
+            timestamp=timestamp
+        )
+        self.version += 1
+
+        self._attempts[i] += 1
         if is_correct:
-            self.correct_attempts[topic] += 1
+            self._correct[i] += 1
 
         # Update recent results window
-        self.recent_results[topic].append(is_correct)
-        if len(self.recent_results[topic]) > self.RECENT_WINDOW:
-            self.recent_results[topic].pop(0)
+        self._recent.push(i, is_correct)
 
         # Update mastery
-        self._update_mastery(topic, is_correct)
+        self._set_mastery(i, mastery_after, knowledge_after)
+
+        if self._focus is not None:
+            self._focus.update(i, self._mastery[i], self._recent.error_rate(i))
 
-        # Log history
-        self.history.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "topic": topic,
-            "correct": is_correct,
-            "mastery_after": self.mastery[topic]
-        })
+        # Schedule spaced re-exposure of missed questions
+        if question_id is not None:
+            self.seen.record_result(topic, self._attempts[i], question_id, is_correct)
 
-    def _update_mastery(self, topic, is_correct):
+    def _update_mastery(self, i, is_correct):
         """Bounded mastery update."""
-        if is_correct:
-            self.mastery[topic] = min(
-                100, self.mastery[topic] + self.MASTERY_STEP_UP
-            )
-        else:
-            self.mastery[topic] = max(
-                0, self.mastery[topic] - self.MASTERY_STEP_DOWN
-            )
+        self._set_mastery(i, *self._next_state(i, is_correct))
+
+    def _next_state(self, i, is_correct):
+        return self.mastery_model.next_state(self, i, is_correct)
+
+    def _set_mastery(self, i, mastery, knowledge):
+        self._mastery[i] = mastery
+
+        if knowledge is None:
+            # The current model keeps no state: any kept by a previous
+            # one no longer matches mastery
+            self._knowledge = None
+            return
+
+        if self._knowledge is None:
+            self._knowledge = array("d", (m / 100 for m in self._mastery))
+        self._knowledge[i] = knowledge
+
+    def projected_mastery(self, topic, is_correct):
+        """Mastery the topic would have after an attempt (no state change)."""
+        return self._next_state(self._topic_index[topic], is_correct)[0]
 
     # -------------------------
     # Analytics / Insights
@@ -71,35 +275,33 @@ class StudentModel:
 
     def get_mastery_overview(self):
         """Return mastery snapshot for dashboard."""
-        return self.mastery.copy()
+        return dict(zip(self.topics, self._mastery))
 
     def get_accuracy(self, topic):
         """Overall accuracy for a topic."""
-        if self.attempts[topic] == 0:
+        i = self._topic_index[topic]
+        if self._attempts[i] == 0:
             return None
-        return self.correct_attempts[topic] / self.attempts[topic]
+        return self._correct[i] / self._attempts[i]
 
     def get_recent_error_rate(self, topic):
-        """Error rate over recent window."""
-        recent = self.recent_results[topic]
-        if not recent:
-            return 0
-        return 1 - (sum(recent) / len(recent))
+        """Error rate over recent window (O(1))."""
+        return self._recent.error_rate(self._topic_index[topic])
 
     def get_strengths(self, threshold=75):
         """Topics where mastery is high."""
         return [
-            f"{topic} ({self.mastery[topic]}%)"
-            for topic in self.mastery
-            if self.mastery[topic] >= threshold
+            f"{topic} ({mastery}%)"
+            for topic, mastery in zip(self.topics, self._mastery)
+            if mastery >= threshold
         ]
 
     def get_weak_areas(self, threshold=50):
         """Topics where mastery is low."""
         return [
-            f"{topic} ({self.mastery[topic]}%)"
-            for topic in self.mastery
-            if self.mastery[topic] < threshold
+            f"{topic} ({mastery}%)"
+            for topic, mastery in zip(self.topics, self._mastery)
+            if mastery < threshold
         ]
 
     def get_focus_topic(self):
@@ -108,32 +310,145 @@ class StudentModel:
         Criteria:
         - Lowest mastery
         - Highest recent error rate as tie-breaker
+        Served from a priority index kept current by record_attempt.
         """
-        scored_topics = []
+        if self._focus is None:
+            self._focus = TopicPriorityIndex(
+                self._mastery,
+                (self._recent.error_rate(i) for i in range(len(self.topics)))
+            )
 
-        for topic in self.mastery:
-            scored_topics.append((
-                topic,
-                self.mastery[topic],
-                self.get_recent_error_rate(topic)
-            ))
+        return self.topics[self._focus.top()]
 
-        # Sort by mastery ASC, error rate DESC
-        scored_topics.sort(key=lambda x: (x[1], -x[2]))
+    def derived_view(self):
+        """Cached DerivedView for the current version of the state."""
+        if self._derived is None or self._derived.version != self.version:
+            self._derived = DerivedView(self)
+        return self._derived
+
+    # -------------------------
+    # Event Log
+    # -------------------------
 
-        return scored_topics[0][0]
+    def pending_events(self):
+        """History rows not yet written to the event log."""
+        return self._history.pending() if self._history is not None else []
 
-    def get_ai_reasoning_for_focus(self):
-        """Explain why the focus topic was chosen."""
-        topic = self.get_focus_topic()
-        mastery = self.mastery[topic]
-        error_rate = round(self.get_recent_error_rate(topic) * 100)
+    def mark_logged(self, seq):
+        """Events before seq are in the event log."""
+        if self._history is not None:
+            self._history.logged = max(self._history.logged, seq)
 
-        return (
-            f"{topic} has the lowest mastery ({mastery}%) "
-            f"and a high recent error rate ({error_rate}%)"
+    def trim_history(self, keep):
+        """Keep only the last `keep` logged events in memory."""
+        if self._history is not None:
+            self._history.trim(keep)
+
+    def replay(self, rows):
+        """
+        Apply event log rows newer than this state (seq order), e.g. the
+        tail written after the latest snapshot. Returns the number applied.
+        """
+        applied = 0
+
+        for seq, timestamp, topic, question_id, correct, _, _ in rows:
+            if seq != self.history.total:
+                continue
+
+            self.record_attempt(
+                self.topics[topic], bool(correct),
+                question_id=None if question_id < 0 else question_id,
+                timestamp=timestamp
+            )
+            applied += 1
+
+        # Replayed events are already in the log
+        self.mark_logged(self.history.total)
+        return applied
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def to_dict(self):
+        """Serializable state (used by StudentStore backends)."""
+        return {
+            "student_id": self.student_id,
+            "subject": self.subject,
+            "version": self.version,
+            "topics": list(self.topics),
+            "mastery": self._mastery.tolist(),
+            "attempts": self._attempts.tolist(),
+            "correct_attempts": self._correct.tolist(),
+            "knowledge": (
+                self._knowledge.tolist() if self._knowledge is not None else None
+            ),
+            "recent_window": self._recent.config(),
+            "recent_results": {
+                topic: [int(r) for r in results]
+                for topic, results in self.recent_results.items()
+            },
+            "recent_ewma": self._recent.ewma_values(),
+            "history": self.history.to_columns(),
+            "seen": self.seen.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a StudentModel from to_dict() output.
+        The older dict-per-topic / dict-per-event layout is also accepted.
+        """
+        topics = data.get("topics") or list(data["mastery"].keys())
+        window = data.get("recent_window", {})
+        student = cls(
+            subject=data["subject"],
+            topics=topics,
+            student_id=data.get("student_id"),
+            recent_window=window.get("size"),
+            recent_mode=window.get("mode"),
+            recent_decay=window.get("decay")
         )
 
+        for name, values in (
+            ("_mastery", data["mastery"]),
+            ("_attempts", data.get("attempts", {})),
+            ("_correct", data.get("correct_attempts", {}))
+        ):
+            target = getattr(student, name)
+            if isinstance(values, dict):
+                for topic, value in values.items():
+                    target[student._topic_index[topic]] = value
+            else:
+                target[:] = array(target.typecode, values)
+
+        for topic, results in data.get("recent_results", {}).items():
+            for result in results[-student._recent.size:]:
+                student._recent.push(student._topic_index[topic], bool(result))
+        student._recent.restore_ewma(data.get("recent_ewma"))
+        student._knowledge = _knowledge_array(data.get("knowledge"))
+        student.version = data.get("version", 0)
+
+        history = data.get("history", [])
+        if isinstance(history, dict):
+            student._history = AttemptHistory.from_columns(student.topics, history)
+        else:
+            for event in history:
+                student.history.append(
+                    student._topic_index[event["topic"]],
+                    event.get("question_id"),
+                    event["correct"],
+                    event.get("mastery_before", event["mastery_after"]),
+                    event["mastery_after"],
+                    timestamp=datetime.fromisoformat(event["timestamp"])
+                    .replace(tzinfo=timezone.utc).timestamp()
+                )
+
+        if "seen" in data:
+            student._seen = SeenTracker.from_dict(data["seen"])
+
+        return student
+
     # -------------------------
     # Debug / Transparency
     # -------------------------
@@ -142,10 +457,10 @@ class StudentModel:
         """Full state snapshot (useful for debugging or demos)."""
         return {
             "subject": self.subject,
-            "mastery": self.mastery,
-            "attempts": dict(self.attempts),
+            "mastery": self.get_mastery_overview(),
+            "attempts": dict(zip(self.topics, self._attempts)),
             "accuracy": {
-                t: self.get_accuracy(t) for t in self.mastery
+                t: self.get_accuracy(t) for t in self.topics
             },
-            "recent_results": dict(self.recent_results)
+            "recent_results": self.recent_results
         }
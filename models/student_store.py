@@ -0,0 +1,839 @@
+# models/student_store.py
+
+import contextlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from models.cohort_matrix import CohortMatrix
+from models.student_model import StudentModel
+from monitoring.metrics import REGISTRY
+
+
+FLUSH_STAGE_SECONDS = REGISTRY.histogram(
+    "nexora_store_flush_stage_seconds",
+    "Time spent in each stage of StudentStore.flush",
+    labels=("stage",)
+)
+FLUSHED_STUDENTS = REGISTRY.counter(
+    "nexora_store_flushed_students_total",
+    "Student states written to the backend"
+)
+LOOKUPS = REGISTRY.counter(
+    "nexora_store_lookups_total",
+    "Student lookups by outcome (hit, resurrected, loaded, missing)",
+    labels=("result",)
+)
+RESIDENT = REGISTRY.gauge(
+    "nexora_store_resident_students",
+    "Student subjects resident in the LRU tier"
+)
+REBASED = REGISTRY.counter(
+    "nexora_store_rebased_students_total",
+    "Student copies rebased on newer backend state after losing a save race"
+)
+DIRTY = REGISTRY.gauge(
+    "nexora_store_dirty_students",
+    "Student subjects awaiting the write-behind flush"
+)
+
+
+# -------------------------
+# Durable Backends
+# -------------------------
+
+class SQLiteBackend:
+    """
+    Durable student state in a local SQLite file, one row per
+    student_key(student_id, subject).
+    Shared by every worker process on the host: each row carries the
+    revision of its last save, so saves can be compare-and-set.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS students ("
+            " student_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " revision INTEGER NOT NULL DEFAULT 0)"
+        )
+
+        # Files written before revisions: every row starts at 0
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(students)")]
+        if "revision" not in columns:
+            self._conn.execute(
+                "ALTER TABLE students ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"
+            )
+        self._conn.commit()
+
+    def load(self, key):
+        row = self._conn.execute(
+            "SELECT state, revision FROM students WHERE student_id = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+
+        state = json.loads(row[0])
+        state["revision"] = row[1]
+        return state
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Hold the database write lock, across processes, for a
+        revisions() check and the save_many() that follows it.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def revisions(self, keys):
+        """{student_key: revision} of the stored ones among keys."""
+        keys = list(keys)
+        found = {}
+
+        for lo in range(0, len(keys), 500):
+            chunk = keys[lo:lo + 500]
+            found.update(self._conn.execute(
+                "SELECT student_id, revision FROM students"
+                f" WHERE student_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ))
+
+        return found
+
+    def save_many(self, states, expected=None):
+        """
+        states: dict {student_key: state_dict}, written in one transaction
+        (or the caller's, see transaction()), each with its "revision".
+        expected: {student_key: revision} the stored rows must still
+        have (None: not stored yet); rows that do not match are left
+        alone. Returns the keys not written.
+        """
+        now = time.time()
+        rows = [
+            (json.dumps(state), state.get("revision", 0), now, key)
+            for key, state in states.items()
+        ]
+        conflicts = []
+
+        with contextlib.nullcontext() if self._conn.in_transaction else self._conn:
+            if expected is None:
+                self._conn.executemany(
+                    "INSERT INTO students (state, revision, updated_at, student_id)"
+                    " VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(student_id) DO UPDATE SET"
+                    " state = excluded.state, revision = excluded.revision,"
+                    " updated_at = excluded.updated_at",
+                    rows
+                )
+                return conflicts
+
+            for row in rows:
+                base = expected[row[3]]
+                if base is None:
+                    cursor = self._conn.execute(
+                        "INSERT INTO students (state, revision, updated_at, student_id)"
+                        " VALUES (?, ?, ?, ?) ON CONFLICT(student_id) DO NOTHING",
+                        row
+                    )
+                else:
+                    cursor = self._conn.execute(
+                        "UPDATE students SET state = ?, revision = ?, updated_at = ?"
+                        " WHERE student_id = ? AND revision = ?",
+                        (*row, base)
+                    )
+                if cursor.rowcount != 1:
+                    conflicts.append(row[3])
+
+        return conflicts
+
+    def scan(self, subject, fields):
+        """
+        Yield (student_id, state) for every stored student of a subject,
+        state holding only the given top-level fields. SQLite extracts
+        them, so the full documents are never parsed in Python.
+        Reads through a connection of its own, so a long scan runs
+        alongside loads and saves (WAL: it sees the last commit).
+        """
+        suffix = ":" + subject
+        # One json_extract with several paths parses each document once
+        paths = ", ".join(f"'$.{field}'" for field in fields)
+
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(
+                f"SELECT student_id, json_extract(state, {paths}) FROM students"
+                " WHERE substr(student_id, -?) = ?",
+                (len(suffix), suffix)
+            )
+
+            for key, values in rows:
+                yield key[:-len(suffix)], dict(zip(fields, json.loads(values)))
+        finally:
+            conn.close()
+
+    def delete(self, key):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM students WHERE student_id = ?", (key,)
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisBackend:
+    """
+    Durable student state in Redis (or anything with the same API).
+    client: object providing get(key), set(key, value) and delete(key),
+    e.g. redis.Redis or LocalRedis for single-host development.
+
+    Compare-and-set saves run as one server-side script per student
+    (clients with eval). Redis has no transaction spanning the
+    revisions() check and the save, so a save racing another host's
+    can still fail after the event log commit (see StudentStore.flush).
+    """
+
+    # KEYS[1]: state key; ARGV: expected revision ("" if new), state
+    COMPARE_AND_SET = """
+    local current = redis.call('GET', KEYS[1])
+    if ARGV[1] == '' then
+        if current then return 0 end
+    elseif not current
+            or tostring(cjson.decode(current)['revision'] or 0) ~= ARGV[1] then
+        return 0
+    end
+    redis.call('SET', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    def __init__(self, client, prefix="nexora:student:"):
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def transaction(self):
+        return contextlib.nullcontext()
+
+    def revisions(self, keys):
+        """{student_key: revision} of the stored ones among keys."""
+        keys = list(keys)
+        raws = self.client.mget([self.prefix + key for key in keys]) if keys else []
+
+        return {
+            key: json.loads(raw).get("revision", 0)
+            for key, raw in zip(keys, raws) if raw
+        }
+
+    def save_many(self, states, expected=None):
+        """As SQLiteBackend.save_many (revisions live in the state)."""
+        if expected is not None:
+            return [
+                key for key, state in states.items()
+                if not self._compare_and_set(key, expected[key], json.dumps(state))
+            ]
+
+        pipeline = getattr(self.client, "pipeline", None)
+        target = pipeline() if pipeline else self.client
+
+        for key, state in states.items():
+            target.set(self.prefix + key, json.dumps(state))
+
+        if pipeline:
+            target.execute()
+        return []
+
+    def _compare_and_set(self, key, base, encoded):
+        name = self.prefix + key
+
+        if hasattr(self.client, "eval"):
+            return bool(self.client.eval(
+                self.COMPARE_AND_SET, 1, name, "" if base is None else str(base), encoded
+            ))
+
+        # In-process client (LocalRedis): nothing else writes it meanwhile
+        raw = self.client.get(name)
+        current = json.loads(raw).get("revision", 0) if raw else None
+        if current != base:
+            return False
+        self.client.set(name, encoded)
+        return True
+
+    def scan(self, subject, fields, batch=1000):
+        """
+        Yield (student_id, state) for every stored student of a subject,
+        state holding only the given top-level fields.
+        """
+        suffix = ":" + subject
+        names = self.client.scan_iter(
+            match=self.prefix + "*" + _glob_escape(suffix), count=batch
+        )
+
+        chunk = []
+        for name in names:
+            chunk.append(name.decode("utf-8") if isinstance(name, bytes) else name)
+            if len(chunk) == batch:
+                yield from self._scan_chunk(chunk, suffix, fields)
+                chunk = []
+        yield from self._scan_chunk(chunk, suffix, fields)
+
+    def _scan_chunk(self, names, suffix, fields):
+        for name, raw in zip(names, self.client.mget(names) if names else ()):
+            if raw:
+                state = json.loads(raw)
+                yield (
+                    name[len(self.prefix):-len(suffix)],
+                    {field: state.get(field) for field in fields}
+                )
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def close(self):
+        pass
+
+
+class LocalRedis:
+    """
+    In-process stand-in for a Redis client (get / set / delete).
+    Useful for development and tests; not shared between processes.
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value):
+        self._data[key] = value.encode("utf-8") if isinstance(value, str) else value
+        return True
+
+    def delete(self, key):
+        return 1 if self._data.pop(key, None) is not None else 0
+
+    def mget(self, keys):
+        return [self._data.get(key) for key in keys]
+
+    def scan_iter(self, match="*", count=None):
+        pattern = _glob_regex(match)
+        return [key for key in list(self._data) if pattern.fullmatch(key)]
+
+
+def _glob_escape(text):
+    """Escape Redis glob metacharacters."""
+    return re.sub(r"([*?\[\]\\])", r"\\\1", text)
+
+
+def _glob_regex(pattern):
+    """Compile a Redis glob pattern (*, ?, backslash escapes) to a regex."""
+    parts = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "")))
+        elif char == "*":
+            parts.append(".*")
+        elif char == "?":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+# -------------------------
+# Keys
+# -------------------------
+
+def student_key(student_id, subject):
+    """Store / backend key of one student's state for one subject."""
+    return f"{student_id}:{subject}"
+
+
+def parse_student_key(key):
+    """(student_id, subject) of a student_key."""
+    student_id, _, subject = key.partition(":")
+    return student_id, subject
+
+
+# -------------------------
+# Locking
+# -------------------------
+
+class LockStripes:
+    """
+    Fixed pool of re-entrant locks; a key always maps to the same lock.
+    Unrelated students almost never share a stripe, and memory stays
+    constant no matter how many students exist.
+    """
+
+    def __init__(self, stripes=256):
+        self._locks = tuple(threading.RLock() for _ in range(stripes))
+
+    def lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+# -------------------------
+# LRU Store
+# -------------------------
+
+class StudentStore:
+    """
+    Bounded in-memory tier of StudentModels over a durable backend.
+
+    State is kept per (student, subject): each subject a student studies
+    is its own StudentModel, loaded on first access and evicted on its
+    own, so a student's unused subjects cost nothing.
+
+    - LRU eviction once more than max_size student subjects are resident
+    - entries older than ttl seconds are reloaded from the backend,
+      so workers sharing a backend converge on the same state
+    - saves are compare-and-set on the revision each copy was loaded
+      or last saved at: a worker whose copy is behind the backend
+      reloads it and replays its own new attempts on top (rebase)
+      instead of overwriting the other worker's
+    - students are loaded lazily on first access
+    - updates are write-behind: mark_dirty() queues a student and dirty
+      state is flushed in one batch every flush_interval seconds,
+      and on flush() / close()
+    - with an EventLog, each flush first group-commits the new attempts
+      to the log, then saves the snapshots and checkpoints the log;
+      only the last history_in_memory logged attempts stay in memory,
+      and recover() replays any tail committed after the checkpoint
+    - cohort() keeps a CohortMatrix per subject for class-level
+      analytics, built from one backend scan and updated by each flush
+    - release() hands students off to another shard (flush, then drop)
+
+    Thread safety:
+    - get_or_create() is atomic per student (no duplicate students)
+    - callers hold lock_for(student_id) while reading or mutating a
+      student; the store takes the same lock to serialize it (one lock
+      covers all of a student's subjects)
+    - the store's own bookkeeping sits behind one short internal lock,
+      and backend I/O behind another (cohort scans run outside it)
+    """
+
+    # Save rounds per flush when other workers keep winning the race
+    SAVE_ATTEMPTS = 3
+
+    def __init__(self, backend, factory, max_size=10000, ttl=3600,
+                 flush_interval=2.0, lock_stripes=256, event_log=None,
+                 history_in_memory=100):
+        """
+        factory: callable(student_id, subject) -> new StudentModel
+        event_log: optional EventLog holding the full attempt history
+        """
+        self.backend = backend
+        self.factory = factory
+        self.event_log = event_log
+        self.history_in_memory = history_in_memory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+
+        self._cache = OrderedDict()  # student_key -> (student, loaded_at)
+        self._dirty = {}  # student_key -> student (may be evicted already)
+        self._cohorts = {}  # subject -> (CohortMatrix, built_at)
+        self._cohort_saves = {}  # subject -> [(student_id, state)] saved mid-build
+        self._last_flush = time.monotonic()
+
+        self._stripes = LockStripes(lock_stripes)
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._cohort_lock = threading.Lock()
+
+    # -------------------------
+    # Access
+    # -------------------------
+
+    def lock_for(self, student_id):
+        """Re-entrant lock guarding one student's state."""
+        return self._stripes.lock_for(student_id)
+
+    def get(self, student_id, subject):
+        """Return the resident or stored student, or None."""
+        with self.lock_for(student_id):
+            return self._get_locked(student_key(student_id, subject))
+
+    def get_or_create(self, student_id, subject):
+        """Atomically return the existing student or create a new one."""
+        with self.lock_for(student_id):
+            key = student_key(student_id, subject)
+            student = self._get_locked(key)
+
+            if student is None:
+                student = self.factory(student_id, subject)
+                with self._lock:
+                    self._insert(key, student)
+                self.mark_dirty(student)
+
+            return student
+
+    def mark_dirty(self, student, flush=True):
+        """
+        Queue a student for the next write-behind flush.
+        With flush=False the caller schedules the flush itself (see
+        flush_due), e.g. to keep backend I/O off an event loop.
+        """
+        with self._lock:
+            self._dirty[student_key(student.student_id, student.subject)] = student
+
+        if flush and self.flush_due():
+            self.flush()
+
+    def flush_due(self):
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self, block=False):
+        """
+        Write dirty students to the backend in one batch.
+        Students whose lock is busy are skipped (unless block=True)
+        and stay dirty for the next flush, so a flush triggered from
+        inside one student's lock never waits on another's.
+        Students another worker saved meanwhile are rebased and saved
+        again (up to SAVE_ATTEMPTS rounds; then left for the next flush).
+        """
+        for _ in range(self.SAVE_ATTEMPTS):
+            conflicts = self._flush_once(block)
+            if not conflicts:
+                return
+            for key, student in conflicts:
+                self._rebase(key, student, block)
+
+    def _flush_once(self, block):
+        """One flush round; returns [(key, student)] that lost a save race."""
+        clock = FLUSH_STAGE_SECONDS.clock()
+
+        with self._lock:
+            self._last_flush = time.monotonic()
+            pending = list(self._dirty.items())
+
+        states, expected, saved, events = {}, {}, [], {}
+        for key, student in pending:
+            lock = self.lock_for(student.student_id)
+            if not lock.acquire(blocking=block):
+                continue
+            try:
+                rows = []
+                if self.event_log is not None:
+                    student.trim_history(self.history_in_memory)
+                    rows = student.pending_events()
+
+                base = student.stored[0] if student.stored is not None else None
+                state = student.to_dict()
+                state["revision"] = (base or 0) + 1
+                if rows:
+                    # The snapshot is only saved once the log commit succeeded
+                    state["history"]["logged"] = rows[-1][0] + 1
+                    events[key] = rows
+
+                states[key] = state
+                expected[key] = base
+                saved.append((
+                    key, student, student.version, student.history.total,
+                    state["history"]["logged"]
+                ))
+            finally:
+                lock.release()
+
+        if not states:
+            return []
+        clock.lap("serialize")
+
+        with self._io_lock:
+            clock.lap("io_wait")
+
+            with self.backend.transaction():
+                # Copies behind the backend are neither logged nor saved
+                current = self.backend.revisions(states)
+                conflicts = {key for key in states if current.get(key) != expected[key]}
+
+                if self.event_log is not None:
+                    for key, rows in events.items():
+                        if key not in conflicts:
+                            self.event_log.append(key, rows)
+                    self.event_log.commit()
+                    clock.lap("log_commit")
+
+                # Only a Redis save can still lose a race here (see RedisBackend)
+                conflicts.update(self.backend.save_many(
+                    {key: state for key, state in states.items() if key not in conflicts},
+                    {key: base for key, base in expected.items() if key not in conflicts}
+                ))
+                clock.lap("save")
+
+            if self.event_log is not None:
+                self.event_log.checkpoint()
+                clock.lap("checkpoint")
+
+            # Same I/O section as the save, so no cohort rebuild can miss
+            # it: a rebuild scanning right now applies it after the scan
+            if self._cohorts or self._cohort_saves:
+                for key, state in states.items():
+                    if key in conflicts:
+                        continue
+                    student_id, subject = parse_student_key(key)
+                    entry = self._cohorts.get(subject)
+                    if entry is not None:
+                        entry[0].update(student_id, state)
+                    if subject in self._cohort_saves:
+                        self._cohort_saves[subject].append((student_id, state))
+                clock.lap("cohort")
+
+        # Only clear entries that did not change while being written
+        lost = []
+        with self._lock:
+            for key, student, version, total, logged in saved:
+                if key in conflicts:
+                    lost.append((key, student))
+                    continue
+                student.stored = (states[key]["revision"], total)
+                student.mark_logged(logged)
+                if self._dirty.get(key) is student and student.version == version:
+                    del self._dirty[key]
+
+            RESIDENT.set(len(self._cache))
+            DIRTY.set(len(self._dirty))
+        FLUSHED_STUDENTS.inc(amount=len(states) - len(lost))
+
+        # Logged history can leave memory now (or on the next flush if busy)
+        if self.event_log is not None:
+            for key, student, _, _, _ in saved:
+                if key in conflicts:
+                    continue
+                lock = self.lock_for(student.student_id)
+                if lock.acquire(blocking=False):
+                    try:
+                        student.trim_history(self.history_in_memory)
+                    finally:
+                        lock.release()
+            clock.lap("trim")
+
+        return lost
+
+    def _rebase(self, key, student, block):
+        """
+        Replace a copy that lost a save race with the backend's state
+        plus the attempts this copy recorded since it was loaded or
+        last saved. The result stays dirty for the next save.
+        """
+        lock = self.lock_for(student.student_id)
+        if not lock.acquire(blocking=block):
+            return
+        try:
+            with self._lock:
+                if self._dirty.get(key) is not student:
+                    return  # rebased or replaced meanwhile
+
+            with self._io_lock:
+                state = self.backend.load(key)
+
+            if state is None:
+                # Deleted meanwhile: saved as new
+                student.stored = None
+                return
+
+            rebased = self._from_state(state)
+            since = student.stored[1] if student.stored is not None else 0
+
+            for _, timestamp, topic, question_id, correct, _, _ in student.history.rows(since):
+                try:
+                    rebased.record_attempt(
+                        student.topics[topic], bool(correct),
+                        question_id=None if question_id < 0 else question_id,
+                        timestamp=timestamp
+                    )
+                except (KeyError, ValueError):
+                    continue  # topic no longer in the subject
+            REBASED.inc()
+
+            with self._lock:
+                if key in self._cache:
+                    self._cache[key] = (rebased, time.monotonic())
+                self._dirty[key] = rebased
+        finally:
+            lock.release()
+
+    def release(self, owned):
+        """
+        Hand off the students this store no longer owns (see
+        services.sharding): flush every dirty student, then drop the
+        resident ones for which owned(student_id) is false, so their
+        new owner loads the state just saved. Returns the number of
+        student subjects released.
+        """
+        self.flush(block=True)
+
+        with self._lock:
+            keys = list(self._cache)
+
+        released = [key for key in keys if not owned(parse_student_key(key)[0])]
+
+        with self._lock:
+            for key in released:
+                # Changed since the flush: still dirty, flushed next time
+                self._cache.pop(key, None)
+            RESIDENT.set(len(self._cache))
+
+        return len(released)
+
+    def recover(self):
+        """
+        Replay event log entries committed after the last checkpoint
+        (a crash between log commit and snapshot save) into their
+        students, then save them. Returns the number of students rebuilt.
+        """
+        if self.event_log is None:
+            return 0
+
+        rebuilt = 0
+        for key, rows in self.event_log.tail().items():
+            student_id, subject = parse_student_key(key)
+
+            with self.lock_for(student_id):
+                student = self.get_or_create(student_id, subject)
+                if student.replay(rows):
+                    self.mark_dirty(student, flush=False)
+                    rebuilt += 1
+
+        self.flush(block=True)
+        return rebuilt
+
+    def cohort(self, subject, topics):
+        """
+        CohortMatrix of every stored student of a subject.
+        Built from a backend scan on first use, and again once older
+        than ttl (to pick up other workers' writes); in between, every
+        flush updates it with the states it saved.
+
+        The scan runs outside the backend I/O lock, so student loads and
+        flushes carry on meanwhile; states saved during the scan are
+        applied to the new matrix once it finishes.
+        """
+        def current():
+            entry = self._cohorts.get(subject)
+            if entry is not None and entry[0].topics == tuple(topics) \
+                    and time.monotonic() - entry[1] <= self.ttl:
+                return entry[0]
+            return None
+
+        with self._io_lock:
+            matrix = current()
+        if matrix is not None:
+            return matrix
+
+        # One rebuild at a time; a waiting caller reuses the fresh result
+        with self._cohort_lock:
+            with self._io_lock:
+                matrix = current()
+                if matrix is not None:
+                    return matrix
+                saves = self._cohort_saves[subject] = []
+
+            try:
+                matrix = CohortMatrix(subject, topics)
+                for student_id, state in self.backend.scan(subject, CohortMatrix.FIELDS):
+                    matrix.update(student_id, state)
+            except BaseException:
+                with self._io_lock:
+                    del self._cohort_saves[subject]
+                raise
+
+            with self._io_lock:
+                del self._cohort_saves[subject]
+
+                # Newer than (or the same as) what the scan read
+                for student_id, state in saves:
+                    matrix.update(student_id, state)
+                self._cohorts[subject] = (matrix, time.monotonic())
+
+        return matrix
+
+    def close(self):
+        self.flush(block=True)
+        with self._io_lock:
+            self.backend.close()
+            if self.event_log is not None:
+                self.event_log.close()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        """key: student_key(student_id, subject)"""
+        return key in self._cache
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+
+    def _get_locked(self, key):
+        """Lookup while holding the student's lock."""
+        with self._lock:
+            entry = self._cache.get(key)
+
+            if entry is not None:
+                student, loaded_at = entry
+                fresh = time.monotonic() - loaded_at <= self.ttl
+
+                # Unflushed local changes are newer than the backend
+                if fresh or key in self._dirty:
+                    self._cache[key] = (
+                        student, loaded_at if fresh else time.monotonic()
+                    )
+                    self._cache.move_to_end(key)
+                    LOOKUPS.inc("hit")
+                    return student
+
+                del self._cache[key]
+
+            # Evicted before its flush: resurrect rather than reload
+            student = self._dirty.get(key)
+            if student is not None:
+                self._insert(key, student)
+                LOOKUPS.inc("resurrected")
+                return student
+
+        with self._io_lock:
+            state = self.backend.load(key)
+        if state is None:
+            LOOKUPS.inc("missing")
+            return None
+        LOOKUPS.inc("loaded")
+
+        student = self._from_state(state)
+        with self._lock:
+            self._insert(key, student)
+        return student
+
+    @staticmethod
+    def _from_state(state):
+        """StudentModel of a loaded state, marked with its revision."""
+        student = StudentModel.from_dict(state)
+        student.stored = (state.get("revision", 0), student.history.total)
+        return student
+
+    def _insert(self, key, student):
+        """Insert under self._lock; evicted dirty students await flush."""
+        self._cache[key] = (student, time.monotonic())
+        self._cache.move_to_end(key)
+
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
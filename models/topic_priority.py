@@ -0,0 +1,47 @@
+# models/topic_priority.py
+
+import heapq
+
+
+class TopicPriorityIndex:
+    """
+    Incrementally maintained focus-topic order for one student.
+
+    A binary heap keyed by (mastery ASC, recent error rate DESC, topic
+    position) — the same order get_focus_topic has always used. Updates
+    push a fresh entry and leave the old one behind; stale entries are
+    skipped lazily at the top and the heap is rebuilt once it holds too
+    many of them. Updates are O(log n), reading the focus topic is O(1)
+    amortized.
+    """
+
+    __slots__ = ("_heap", "_keys")
+
+    def __init__(self, masteries, error_rates):
+        self._keys = [
+            (mastery, -error_rate, i)
+            for i, (mastery, error_rate) in enumerate(zip(masteries, error_rates))
+        ]
+        self._heap = list(self._keys)
+        heapq.heapify(self._heap)
+
+    def update(self, i, mastery, error_rate):
+        key = (mastery, -error_rate, i)
+        if key == self._keys[i]:
+            return
+
+        self._keys[i] = key
+        heapq.heappush(self._heap, key)
+
+        if len(self._heap) > 2 * len(self._keys) + 16:
+            self._heap = list(self._keys)
+            heapq.heapify(self._heap)
+
+    def top(self):
+        """Position of the topic that needs attention most."""
+        heap = self._heap
+
+        while heap[0] != self._keys[heap[0][2]]:
+            heapq.heappop(heap)
+
+        return heap[0][2]
@@ -0,0 +1,226 @@
+# monitoring/metrics.py
+
+import bisect
+import threading
+import time
+from functools import wraps
+
+
+# Histogram bounds in seconds, from 10 µs (per-stage work) to 2.5 s
+LATENCY_BUCKETS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3,
+    5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+
+class Counter:
+    """Monotonic count per label values."""
+
+    kind = "counter"
+
+    def __init__(self, registry, name, help, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, values, count) for values, count in self._values.items()]
+
+
+class Gauge(Counter):
+    """Current value per label values."""
+
+    kind = "gauge"
+
+    def set(self, value, *label_values):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram:
+    """
+    Bucketed distribution per label values (cumulative on render,
+    Prometheus style). observe() is one bisect and three additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        if not self.registry.enabled:
+            return
+
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clock(self):
+        """StageClock timing consecutive stages into this histogram."""
+        if not self.registry.enabled:
+            return _NULL_CLOCK
+        return StageClock(self)
+
+    def samples(self):
+        with self._lock:
+            series = [(values, list(counts), total, count)
+                      for values, (counts, total, count) in self._series.items()]
+
+        samples = []
+        for values, counts, total, count in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                samples.append((f"{self.name}_bucket", values + (_format(bound),), cumulative))
+            samples.append((f"{self.name}_sum", values, total))
+            samples.append((f"{self.name}_count", values, count))
+        return samples
+
+
+class StageClock:
+    """
+    Times consecutive stages of one call:
+        clock = STAGES.clock(); ...; clock.lap("select"); ...; clock.lap("rank")
+    Each lap records the time since the previous lap (or creation).
+    """
+
+    __slots__ = ("histogram", "last")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, stage)
+        self.last = now
+
+
+class _NullClock:
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+
+_NULL_CLOCK = _NullClock()
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics, rendered in the Prometheus text format.
+
+    Metrics are created once at import time by the modules that update
+    them (registering the same name again returns the existing metric).
+    Disabling the registry turns every update into one attribute check;
+    it is toggled from the tunables file (see ServiceContainer).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            names = metric.labels
+            if metric.kind == "histogram":
+                names = names + ("le",)
+
+            for sample, values, value in metric.samples():
+                labels = ",".join(
+                    f'{name}="{_escape(v)}"'
+                    for name, v in zip(names if sample.endswith("_bucket") else metric.labels, values)
+                )
+                lines.append(f"{sample}{{{labels}}} {_format(value)}" if labels
+                             else f"{sample} {_format(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, cls, name, help, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help, labels, **kwargs)
+            return metric
+
+
+def timed(histogram, *label_values):
+    """Decorator recording each call's duration in a histogram."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not histogram.registry.enabled:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *label_values)
+        return wrapper
+    return decorate
+
+
+def _format(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Shared by the whole process
+REGISTRY = MetricsRegistry()
+
+# Durations of coarse operations in the ML / engine layers
+OPERATION_SECONDS = REGISTRY.histogram(
+    "nexora_operation_seconds",
+    "Duration of instrumented service operations",
+    labels=("operation",)
+)
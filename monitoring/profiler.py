@@ -0,0 +1,106 @@
+# monitoring/profiler.py
+
+import os
+import sys
+import threading
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that can be switched on and off at runtime.
+
+    While running, a daemon thread captures every other thread's stack
+    every `interval` seconds and counts identical stacks. Results come
+    out in the folded ("collapsed") format read by flamegraph.pl and
+    speedscope. Nothing runs and nothing is sampled while stopped.
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+
+        self.samples = 0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def configure(self, enabled=False, interval=None):
+        """Apply tunables (the "profiler" section); starts or stops sampling."""
+        if interval is not None:
+            self.interval = float(interval)
+
+        if enabled and not self.running:
+            self.start()
+        elif not enabled and self.running:
+            self.stop()
+
+        return self
+
+    def start(self):
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="nexora-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def folded(self, limit=None):
+        """'frame;frame;frame count' lines, most sampled stacks first."""
+        with self._lock:
+            stacks = self._stacks.most_common(limit)
+
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    # -------------------------
+    # Sampling
+    # -------------------------
+
+    def _run(self):
+        own = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            stacks = [
+                self._fold(frame)
+                for thread_id, frame in frames.items()
+                if thread_id != own
+            ]
+            del frames
+
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def _fold(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+
+        return ";".join(reversed(names))
+
+
+# Shared by the whole process; toggled from the tunables file
+PROFILER = SamplingProfiler()
@@ -0,0 +1,27 @@
+# routes/cohort_routes.py
+
+from flask import Blueprint, jsonify, request
+from services.container import UnknownSubjectError, get_container
+
+cohort_bp = Blueprint("cohort_bp", __name__)
+
+@cohort_bp.route("/api/cohort_report/<subject>", methods=["GET"])
+def cohort_report(subject):
+    """
+    Teacher dashboard over many students (Authorization: Bearer <token>).
+    Query: students=id1,id2,... to limit the report to one class.
+    """
+    container = get_container()
+    if not container.is_teacher(request.headers.get("Authorization")):
+        return jsonify({"error": "teacher authorization required"}), 401
+
+    students = request.args.get("students")
+
+    try:
+        report = container.cohort_report(
+            subject, students.split(",") if students else None
+        )
+    except UnknownSubjectError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify(report)
@@ -0,0 +1,28 @@
+# routes/metrics_routes.py
+
+from flask import Blueprint, current_app, request
+from monitoring.metrics import REGISTRY
+from monitoring.profiler import PROFILER
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint."""
+    return current_app.response_class(
+        REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+@metrics_bp.route("/metrics/profile", methods=["GET"])
+def profile():
+    """
+    Folded stacks sampled since the profiler was enabled (tunables
+    "profiler" section). Query: limit=N stacks, reset=1 to start over.
+    """
+    body = PROFILER.folded(request.args.get("limit", type=int))
+    if request.args.get("reset"):
+        PROFILER.reset()
+
+    return current_app.response_class(body, content_type="text/plain; charset=utf-8")
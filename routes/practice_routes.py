@@ -1,30 +1,28 @@
 # routes/practice_routes.py
 
-from flask import Blueprint, jsonify
-from services.practice_service import PracticeService
-from engine.adaptive_engine import AdaptiveEngine
-from ml.adaptive_ml import AdaptiveML
+from flask import Blueprint, jsonify, request
+from services.container import UnknownSubjectError, get_container
+from services.responses import ResponseOptions
 
 practice_bp = Blueprint("practice_bp", __name__)
 
 @practice_bp.route("/api/practice/<subject>/<topic>", methods=["GET"])
 def practice_topic(subject, topic):
-    from app import get_student, QUESTION_BANK
+    """Query: fields=a,b,... or verbose=false for a compact response."""
+    container = get_container()
+    options = ResponseOptions.from_args(request.args)
 
-    student = get_student()
-    engine = AdaptiveEngine()
-    ml = AdaptiveML()
+    try:
+        with container.locked_student(subject) as student:
+            response = container.practice.get_next_question(
+                student=student,
+                subject=subject,
+                forced_topic=topic,
+                verbose=options.verbose
+            )
+            # Serving updates seen / review state, which must be saved
+            container.student_store.mark_dirty(student)
+    except UnknownSubjectError as e:
+        return jsonify({"error": str(e)}), 404
 
-    service = PracticeService(
-        student_model=student,
-        adaptive_engine=engine,
-        adaptive_ml=ml,
-        question_bank=QUESTION_BANK
-    )
-
-    response = service.get_next_question(
-        subject=subject,
-        forced_topic=topic
-    )
-
-    return jsonify(response)
+    return jsonify(options.shape(response))
@@ -1,16 +1,34 @@
 # routes/subject_routes.py
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
+from services.container import UnknownSubjectError, get_container
+from services.responses import ResponseOptions, if_none_match_matches
 from services.subject_service import SubjectService
 
 subject_bp = Blueprint("subject_bp", __name__)
 
 @subject_bp.route("/api/subject_report/<subject>", methods=["GET"])
 def subject_report(subject):
-    from app import get_student  # lazy import to avoid circular deps
+    """Query: fields=a,b,... or verbose=false for a compact report."""
+    options = ResponseOptions.from_args(request.args)
 
-    student = get_student()
-    service = SubjectService(student)
+    # Only this subject's state is loaded; other subjects stay untouched
+    try:
+        with get_container().locked_student(subject) as student:
+            service = SubjectService(student)
 
-    report = service.generate_subject_report()
-    return jsonify(report)
+            # Dashboard polls revalidate; unchanged state answers 304 without a
+            # report. Compared weakly: gzipped reports carry a weak ETag
+            etag = service.etag()
+            if if_none_match_matches(request.headers.get("If-None-Match"), etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = jsonify(options.shape(
+                    service.generate_subject_report(verbose=options.verbose)
+                ))
+    except UnknownSubjectError as e:
+        return jsonify({"error": str(e)}), 404
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -1,36 +1,61 @@
 # routes/submission_routes.py
 
 from flask import Blueprint, jsonify, request
+from services.container import UnknownSubjectError, get_container
+from services.responses import ResponseOptions
+from services.submission_service import SubmissionError
 
 submission_bp = Blueprint("submission_bp", __name__)
 
 @submission_bp.route("/api/submit", methods=["POST"])
 def submit_answer():
-    from app import get_student
-    from engine.adaptive_engine import AdaptiveEngine
+    """Query: fields=a,b,... or verbose=false for a compact response."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "request body must be a JSON object"}), 400
 
-    data = request.get_json()
+    options = ResponseOptions.from_args(request.args)
     topic = data.get("topic")
     is_correct = data.get("correct")
-
-    student = get_student()
-    engine = AdaptiveEngine()
-
-    # Update student model
-    student.record_attempt(topic, is_correct)
-
-    updated_mastery = student.mastery[topic]
-    show_hint = engine.should_show_hint(student, topic)
-
-    response = {
-        "correct": is_correct,
-        "updated_mastery": updated_mastery,
-        "show_hint": show_hint,
-        "learning_feedback": (
-            f"Mastery in {topic} increased due to correct response"
-            if is_correct
-            else f"Mastery in {topic} decreased due to incorrect response"
-        )
-    }
+    question_id = data.get("question_id")
+    subject = data.get("subject")  # optional; the default subject if omitted
+
+    container = get_container()
+
+    try:
+        with container.locked_student(subject) as student:
+            response = container.submission.submit(
+                student, topic, is_correct, question_id=question_id,
+                verbose=options.verbose
+            )
+    except UnknownSubjectError as e:
+        return jsonify({"error": str(e)}), 404
+    except SubmissionError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(options.shape(response))
+
+@submission_bp.route("/api/submit/batch", methods=["POST"])
+def submit_batch():
+    """
+    Apply many answers in one round trip.
+    Body: {"subject"?, "attempts": [{"topic", "correct", "question_id", "timestamp"}, ...]}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "request body must be a JSON object"}), 400
+
+    container = get_container()
+
+    # One lock acquisition for the whole batch
+    try:
+        with container.locked_student(data.get("subject")) as student:
+            response = container.submission.submit_batch(
+                student, data.get("attempts")
+            )
+    except UnknownSubjectError as e:
+        return jsonify({"error": str(e)}), 404
+    except SubmissionError as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify(response)
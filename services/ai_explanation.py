@@ -8,89 +8,198 @@ This module does NOT change state.
 It only EXPLAINS decisions made by the system.
 """
 
+from functools import lru_cache
+
+import numpy as np
+
+
+# -------------------------------
+# Reasons
+# -------------------------------
+
+LOW_MASTERY = 1
+FREQUENT_ERRORS = 2
+LIMITED_PRACTICE = 4
+
+REASONS = (LOW_MASTERY, FREQUENT_ERRORS, LIMITED_PRACTICE)
+
+# Text per locale: one phrase per reason bit, the phrase used when no
+# reason applies, how phrases are joined, and the sentence template
+TEMPLATES = {
+    "en": {
+        LOW_MASTERY: "low overall mastery",
+        FREQUENT_ERRORS: "frequent recent errors",
+        LIMITED_PRACTICE: "limited practice so far",
+        0: "balanced difficulty with room for improvement",
+        "join": " and ",
+        "focus": "{topic} was selected because of {reasons} (mastery {low}–{high}%).",
+    },
+    "es": {
+        LOW_MASTERY: "un dominio general bajo",
+        FREQUENT_ERRORS: "errores recientes frecuentes",
+        LIMITED_PRACTICE: "poca práctica hasta ahora",
+        0: "una dificultad equilibrada con margen de mejora",
+        "join": " y ",
+        "focus": "Se eligió {topic} por {reasons} (dominio {low}–{high} %).",
+    },
+}
+
 
 class AIExplanationEngine:
-    def __init__(self, mastery_data, attempt_data, history_data):
-        """
-        mastery_data: dict -> {topic: mastery_percentage}
-        attempt_data: dict -> {topic: total_attempts}
-        history_data: dict -> {topic: [True, False, ...]}  # recent answers
-        """
-        self.mastery = mastery_data
-        self.attempts = attempt_data
-        self.history = history_data
+    """
+    Explains why a topic needs attention, for one student or a cohort.
+
+    - the reasons are encoded as a bitmask (LOW_MASTERY, FREQUENT_ERRORS,
+      LIMITED_PRACTICE)
+    - mastery is reported by decile bucket, so an explanation depends
+      only on (topic, mastery bucket, reason bits, locale); the reason
+      phrases are compiled per locale up front and finished sentences
+      come from a bounded LRU cache on that key
+    - explain_cohort() explains every student of a CohortMatrix in one
+      call: focus topics and reason bits are computed as arrays, and
+      each distinct key is rendered once
+
+    Stateless across students: one instance is shared by every request.
+    """
+
+    # Tunables (same thresholds the explanations have always used)
+    LOW_MASTERY_THRESHOLD = 50      # mastery below this is low
+    ERROR_RATE_THRESHOLD = 0.4      # recent error rate above this is frequent
+    LIMITED_PRACTICE_ATTEMPTS = 5   # fewer attempts than this is limited
+
+    def __init__(self, locale="en", cache_size=65536):
+        self.default_locale = locale if locale in TEMPLATES else "en"
+
+        # Reason phrase for every combination of bits, per locale
+        self._phrases = {
+            name: tuple(
+                template["join"].join(
+                    template[bit] for bit in REASONS if bits & bit
+                ) or template[0]
+                for bits in range(2 ** len(REASONS))
+            )
+            for name, template in TEMPLATES.items()
+        }
+
+        self._render = lru_cache(maxsize=cache_size)(self._render_uncached)
 
     # -------------------------------
-    # Strengths & Weaknesses
+    # Reasons
     # -------------------------------
 
-    def get_strengths(self, threshold=75):
-        strengths = []
-        for topic, value in self.mastery.items():
-            if value >= threshold:
-                strengths.append(f"{topic} ({value}%)")
-        return strengths
-
-    def get_weak_areas(self, threshold=50):
-        weak = []
-        for topic, value in self.mastery.items():
-            if value <= threshold:
-                weak.append(f"{topic} ({value}%)")
-        return weak
+    def reason_bits(self, mastery, error_rate, attempts):
+        """Reason bitmask; works elementwise on NumPy arrays too."""
+        if isinstance(error_rate, np.ndarray):
+            # Compare in the array's precision: float32(0.4) > 0.4
+            threshold = error_rate.dtype.type(self.ERROR_RATE_THRESHOLD)
+        else:
+            threshold = self.ERROR_RATE_THRESHOLD
+
+        return (
+            (mastery < self.LOW_MASTERY_THRESHOLD) * LOW_MASTERY
+            | (error_rate > threshold) * FREQUENT_ERRORS
+            | (attempts < self.LIMITED_PRACTICE_ATTEMPTS) * LIMITED_PRACTICE
+        )
+
+    @staticmethod
+    def mastery_bucket(mastery):
+        """Decile bucket 0–9 (100 falls in the top bucket)."""
+        return np.minimum(mastery // 10, 9) if isinstance(mastery, np.ndarray) \
+            else min(int(mastery) // 10, 9)
 
     # -------------------------------
-    # Focus Topic Selection
+    # Natural Language Explanation
     # -------------------------------
 
-    def get_focus_topic(self):
-        """
-        Choose the topic that needs attention most.
-        Priority:
-        1. Lowest mastery
-        2. Highest recent error rate
+    def explain_focus(self, topic, mastery, error_rate, attempts, locale=None):
+        """Why `topic` needs attention, from the student's numbers for it."""
+        return self._render(
+            topic,
+            self.mastery_bucket(mastery),
+            int(self.reason_bits(mastery, error_rate, attempts)),
+            self._locale(locale)
+        )
+
+    def explain_student_focus(self, student, locale=None):
+        """Explanation for a StudentModel's current focus topic."""
+        topic = student.get_focus_topic()
+
+        return self.explain_focus(
+            topic,
+            student.mastery[topic],
+            student.get_recent_error_rate(topic),
+            student.attempts[topic],
+            locale
+        )
+
+    def explain_cohort(self, matrix, locale=None):
         """
-        scored = []
-
-        for topic in self.mastery:
-            mastery_score = self.mastery[topic]
-
-            recent = self.history.get(topic, [])
-            if recent:
-                error_rate = recent.count(False) / len(recent)
-            else:
-                error_rate = 0
+        Focus topic and explanation for every student of a CohortMatrix:
+        [(student_id, topic, explanation), ...] in matrix order.
+        locale: one locale for everyone, or {student_id: locale}.
 
-            scored.append((topic, mastery_score, error_rate))
-
-        # Sort: lowest mastery, highest error rate
-        scored.sort(key=lambda x: (x[1], -x[2]))
-
-        return scored[0][0]
+        Focus topics follow StudentModel.get_focus_topic: lowest mastery,
+        then highest recent error rate, then topic order.
+        """
+        n = len(matrix)
+        if not n:
+            return []
+
+        mastery = matrix.mastery.astype(np.int16)
+        errors = matrix.recent_error_rates
+        rows = np.arange(n)
+
+        candidates = mastery == mastery.min(axis=1, keepdims=True)
+        worst = np.where(candidates, errors, -1).max(axis=1, keepdims=True)
+        focus = np.argmax(candidates & (errors == worst), axis=1)
+
+        focus_mastery = mastery[rows, focus]
+        bits = self.reason_bits(
+            focus_mastery, errors[rows, focus], matrix.attempts[rows, focus]
+        )
+        buckets = self.mastery_bucket(focus_mastery)
+
+        locales = tuple(TEMPLATES)
+        if isinstance(locale, dict):
+            codes = np.array([
+                locales.index(self._locale(locale.get(s)))
+                for s in matrix.student_ids
+            ])
+        else:
+            codes = np.full(n, locales.index(self._locale(locale)))
+
+        # One render per distinct (topic, bucket, bits, locale)
+        keys = ((focus * 10 + buckets) * 8 + bits) * len(locales) + codes
+        unique, inverse = np.unique(keys, return_inverse=True)
+
+        texts = []
+        for key in unique.tolist():
+            key, code = divmod(key, len(locales))
+            key, key_bits = divmod(key, 8)
+            topic, bucket = divmod(key, 10)
+            texts.append(self._render(matrix.topics[topic], bucket, key_bits, locales[code]))
+
+        topics = matrix.topics
+        return [
+            (student_id, topics[t], texts[i])
+            for student_id, t, i in zip(matrix.student_ids, focus.tolist(), inverse.tolist())
+        ]
 
     # -------------------------------
-    # Natural Language Explanation
+    # Helpers
     # -------------------------------
 
-    def explain_focus(self, topic):
-        mastery = self.mastery.get(topic, 0)
-        recent = self.history.get(topic, [])
-
-        incorrect = recent.count(False)
-        total = len(recent)
-
-        reasons = []
-
-        if mastery < 50:
-            reasons.append("low overall mastery")
-
-        if total > 0 and incorrect / total > 0.4:
-            reasons.append("frequent recent errors")
+    def _locale(self, locale):
+        return locale if locale in TEMPLATES else self.default_locale
 
-        if self.attempts.get(topic, 0) < 5:
-            reasons.append("limited practice so far")
+    def _render_uncached(self, topic, bucket, bits, locale):
+        low = bucket * 10
+        high = 100 if bucket == 9 else low + 9
 
-        if not reasons:
-            reasons.append("balanced difficulty with room for improvement")
+        return TEMPLATES[locale]["focus"].format(
+            topic=topic, reasons=self._phrases[locale][bits], low=low, high=high
+        )
 
-        return f"{topic} was selected because of " + " and ".join(reasons) + "."
 
+# Shared by every request
+EXPLANATIONS = AIExplanationEngine()
@@ -0,0 +1,249 @@
+# services/cohort_service.py
+
+import time
+
+import numpy as np
+
+from models.student_store import student_key
+from services.ai_explanation import EXPLANATIONS
+
+
+class CohortService:
+    """
+    Builds cohort-level (class, school, district) learning reports for
+    one subject, for teacher dashboards.
+
+    Works on a snapshot of a CohortMatrix: every aggregate is a handful
+    of vectorized passes over students x topics arrays, never a loop
+    over students. Error trends come from the event log's columns:
+    memory-mapped once compacted, decoded once and cached by the log
+    before that (see EventLog.columns).
+    """
+
+    # Tunables (mirroring the per-student thresholds)
+    STRENGTH_THRESHOLD = 75
+    WEAK_THRESHOLD = 50
+    INTERVENTION_MASTERY = 40
+    INTERVENTION_ERROR_RATE = 0.6
+    INTERVENTION_MIN_ATTEMPTS = 5
+
+    # Error trends cover the last TREND_DAYS, in at most MAX_TREND_BUCKETS
+    TREND_DAYS = 90
+    MAX_TREND_BUCKETS = 366
+
+    def __init__(self, matrix, event_log=None, student_ids=None, student_ref=None):
+        """
+        matrix: CohortMatrix of the subject (see StudentStore.cohort)
+        student_ids: optional class roster; the whole subject otherwise
+        student_ref: callable(student_id) -> ID shown in reports
+        (ServiceContainer.student_ref); the student ID itself if None
+        """
+        self.matrix = (
+            matrix.snapshot() if student_ids is None else matrix.select(student_ids)
+        )
+        self.event_log = event_log
+        self.student_ids = student_ids
+        self.student_ref = student_ref or str
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def generate_cohort_report(self, weakest=3, intervention_limit=50):
+        """Complete cohort dashboard report."""
+        report = {
+            "subject": self.matrix.subject,
+            "students": len(self.matrix),
+            "mastery_distribution": self.mastery_distribution(),
+            "weakest_topics": self.weakest_topics(weakest),
+            "needs_intervention": self.needs_intervention(intervention_limit)
+        }
+
+        if self.event_log is not None:
+            report["error_trends"] = self.error_trends()
+
+        return report
+
+    def mastery_distribution(self):
+        """
+        Per topic, over students who attempted it: mean, quartiles,
+        strong / weak counts and a 10-point mastery histogram.
+        """
+        counts = self._mastery_counts()  # topics x 101
+        students = counts.sum(axis=1)
+        cumulative = counts.cumsum(axis=1)
+        levels = np.arange(101)
+
+        mean = (counts * levels).sum(axis=1) / np.maximum(students, 1)
+
+        # Nearest-rank quartiles straight from the cumulative counts
+        quartiles = {
+            name: (cumulative < np.ceil(q * students)[:, None]).sum(axis=1)
+            for name, q in (("p25", 0.25), ("median", 0.5), ("p75", 0.75))
+        }
+
+        histogram = counts[:, :100].reshape(len(counts), 10, 10).sum(axis=2)
+        histogram[:, -1] += counts[:, 100]
+
+        strong = counts[:, self.STRENGTH_THRESHOLD:].sum(axis=1)
+        weak = counts[:, :self.WEAK_THRESHOLD].sum(axis=1)
+
+        distribution = {}
+        for t, topic in enumerate(self.matrix.topics):
+            if not students[t]:
+                distribution[topic] = {"students": 0}
+                continue
+
+            distribution[topic] = {
+                "students": int(students[t]),
+                "mean": round(float(mean[t]), 1),
+                **{name: int(values[t]) for name, values in quartiles.items()},
+                "strong": int(strong[t]),
+                "weak": int(weak[t]),
+                "histogram": histogram[t].tolist()
+            }
+
+        return distribution
+
+    def weakest_topics(self, k=3):
+        """
+        The k attempted topics with the lowest mean mastery (highest
+        error rate as tie-breaker), like the per-student focus topic.
+        """
+        attempted = self.matrix.attempts > 0
+        students = attempted.sum(axis=0)
+        mastery = np.where(attempted, self.matrix.mastery, 0).sum(axis=0, dtype=np.int64)
+        mean = mastery / np.maximum(students, 1)
+
+        attempts = self.matrix.attempts.sum(axis=0, dtype=np.int64)
+        correct = self.matrix.correct_attempts.sum(axis=0, dtype=np.int64)
+        error_rate = 1 - correct / np.maximum(attempts, 1)
+
+        order = np.lexsort((-error_rate, mean))
+        order = order[students[order] > 0][:k]
+
+        return [
+            {
+                "topic": self.matrix.topics[t],
+                "mean_mastery": round(float(mean[t]), 1),
+                "error_rate": round(float(error_rate[t]), 3),
+                "students": int(students[t])
+            }
+            for t in order
+        ]
+
+    def needs_intervention(self, limit=50):
+        """
+        Students struggling on at least one topic: low mastery and a
+        high recent error rate despite enough practice. Most struggling
+        topics first, then lowest mean mastery.
+        """
+        matrix = self.matrix
+        flagged = (
+            (matrix.mastery < self.INTERVENTION_MASTERY)
+            & (matrix.recent_error_rates >= self.INTERVENTION_ERROR_RATE)
+            & (matrix.attempts >= self.INTERVENTION_MIN_ATTEMPTS)
+        )
+        struggling = flagged.sum(axis=1)
+        mean_mastery = matrix.mastery.mean(axis=1)
+
+        rows = np.flatnonzero(struggling)
+        rows = rows[np.lexsort((mean_mastery[rows], -struggling[rows]))]
+
+        return {
+            "count": int(len(rows)),
+            "students": [
+                {
+                    "student_ref": self.student_ref(matrix.student_ids[r]),
+                    "topics": [
+                        matrix.topics[t] for t in np.flatnonzero(flagged[r])
+                    ],
+                    "mean_mastery": round(float(mean_mastery[r]), 1)
+                }
+                for r in rows[:limit]
+            ]
+        }
+
+    def error_trends(self, bucket_seconds=86400, since=None, until=None):
+        """
+        Per-topic error rate per time bucket (days by default) over the
+        cohort's logged attempts: {topic: [{"start", "attempts",
+        "error_rate"}, ...]} for buckets with attempts.
+        since / until: epoch seconds; the last TREND_DAYS up to now by
+        default, and never more than MAX_TREND_BUCKETS buckets.
+        """
+        if self.event_log is None:
+            return {}
+
+        until = time.time() if until is None else until
+        earliest = until - self.MAX_TREND_BUCKETS * bucket_seconds
+        since = max(
+            until - self.TREND_DAYS * 86400 if since is None else since, earliest
+        )
+
+        keys, key_id, columns = self.event_log.columns(since=since)
+
+        # Key table is small: select the cohort's keys there, then rows
+        if self.student_ids is None:
+            selected = np.char.endswith(keys, ":" + self.matrix.subject)
+        else:
+            selected = np.isin(keys, [
+                student_key(s, self.matrix.subject) for s in self.student_ids
+            ])
+        rows = selected[key_id] & (columns["timestamp"] <= until)
+
+        timestamps = columns["timestamp"][rows]
+        topics = columns["topic"][rows].astype(np.int64)
+        correct = columns["correct"][rows]
+
+        n_topics = len(self.matrix.topics)
+        valid = topics < n_topics
+        if not valid.all():
+            timestamps, topics, correct = timestamps[valid], topics[valid], correct[valid]
+
+        if not len(timestamps):
+            return {}
+
+        start = np.floor(timestamps.min() / bucket_seconds) * bucket_seconds
+        buckets = ((timestamps - start) // bucket_seconds).astype(np.int64)
+        n_buckets = int(buckets.max()) + 1
+
+        # Only the (topic, bucket) cells that occur are counted
+        cells, cell_of_row, attempts = np.unique(
+            topics * n_buckets + buckets, return_inverse=True, return_counts=True
+        )
+        errors = np.bincount(cell_of_row, weights=correct == 0, minlength=len(cells))
+
+        trends = {topic: [] for topic in self.matrix.topics}
+        for cell, count, error in zip(cells.tolist(), attempts.tolist(), errors.tolist()):
+            t, b = divmod(cell, n_buckets)
+            trends[self.matrix.topics[t]].append({
+                "start": float(start + b * bucket_seconds),
+                "attempts": count,
+                "error_rate": round(error / count, 3)
+            })
+
+        return trends
+
+    def focus_explanations(self, locale=None, explanations=EXPLANATIONS):
+        """
+        Every student's focus topic and its explanation in one batch
+        (e.g. for weekly parent emails): [(student_id, topic, text), ...].
+        locale: one locale, or {student_id: locale}.
+        """
+        return explanations.explain_cohort(self.matrix, locale)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+
+    def _mastery_counts(self):
+        """topics x 101 counts of students per mastery level (attempted only)."""
+        matrix = self.matrix
+        n_topics = len(matrix.topics)
+
+        attempted = matrix.attempts > 0
+        levels = np.clip(matrix.mastery, 0, 100).astype(np.int64)
+        cells = (np.arange(n_topics) * 101 + levels)[attempted]
+
+        return np.bincount(cells, minlength=n_topics * 101).reshape(n_topics, 101)
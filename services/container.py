@@ -0,0 +1,374 @@
+# services/container.py
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app, g, session
+
+from engine.adaptive_engine import AdaptiveEngine
+from ml.adaptive_ml import AdaptiveML
+from models.mastery_model import mastery_model_from_config
+from models.student_model import StudentModel
+from models.student_store import student_key
+from monitoring.metrics import REGISTRY
+from monitoring.profiler import PROFILER
+from services.cohort_service import CohortService
+from services.practice_service import PracticeService
+from services.sharding import ShardRouter
+from services.submission_service import SubmissionService
+
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownSubjectError(LookupError):
+    """Raised when a request names a subject the question bank lacks."""
+
+
+class ServiceContainer:
+    """
+    Application-level services, built once and shared by every request.
+    Holds:
+    - the question index and student store (students are held per
+      subject; see StudentStore)
+    - AdaptiveEngine / AdaptiveML configured from the tunables file
+    - the PracticeService and SubmissionService wired to them
+    - the metrics and profiler switches ("metrics" / "profiler" tunables)
+    - the mastery model every StudentModel updates with
+      ("mastery_model" tunables; see models.mastery_model)
+    - the ShardRouter when students are sharded ("sharding" tunables;
+      see services.sharding), None otherwise
+    - teacher authorization and opaque student refs for cohort reports
+
+    The tunables file is re-checked at most every reload_interval
+    seconds; when it changes, fresh engines are built and swapped in
+    as a unit, so in-flight requests never see half-applied settings.
+    A file that fails to load (bad JSON or values) is logged and the
+    current settings stay in place until it changes again.
+    Handlers should read container.practice once per request.
+    """
+
+    def __init__(self, question_index, student_store, config_path=None,
+                 reload_interval=2.0, default_subject=None, shard=None,
+                 shard_secret="", teacher_token=None, report_secret=""):
+        """
+        default_subject: subject for requests that do not name one
+        (defaults to the bank's first subject)
+        shard: this process's shard name (unsharded if None)
+        shard_secret: key authenticating requests forwarded between shards
+        teacher_token: bearer token for cohort reports (refused if None)
+        report_secret: key deriving the student refs in cohort reports
+        """
+        self.question_index = question_index
+        self.student_store = student_store
+        self.default_subject = default_subject or question_index.subjects()[0]
+        self.config_path = config_path
+        self.reload_interval = reload_interval
+        self.shard = shard
+        self.shard_secret = shard_secret
+        self.router = None
+
+        self._teacher_token = teacher_token
+        self._report_key = report_secret.encode("utf-8") \
+            if isinstance(report_secret, str) else report_secret
+
+        self._config_mtime = None
+        self._failed_mtime = None  # last file version that failed to load
+        self._last_check = time.monotonic()
+
+        self.load_config()
+
+    # -------------------------
+    # Configuration
+    # -------------------------
+
+    def load_config(self):
+        """
+        (Re)build engines from the tunables file (defaults if absent).
+        Everything is parsed and built before anything is applied, so a
+        bad file raises and leaves the current settings untouched.
+        """
+        config, mtime = {}, None
+
+        if self.config_path and os.path.exists(self.config_path):
+            mtime = os.path.getmtime(self.config_path)
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+
+        metrics_enabled = bool(config.get("metrics", {}).get("enabled", True))
+        mastery_model = mastery_model_from_config(config.get("mastery_model", {}))
+
+        engine = AdaptiveEngine().configure(**config.get("engine", {}))
+        ml = AdaptiveML().configure(**config.get("ml", {}))
+        practice = PracticeService(engine, ml, self.question_index)
+        submission = SubmissionService(engine, self.student_store, practice)
+
+        router = ShardRouter.from_config(
+            config.get("sharding", {}), self.shard, self.shard_secret
+        )
+
+        # Instrumentation can be switched without a restart. The profiler
+        # goes first: it checks its settings before changing anything,
+        # and nothing after it can fail
+        PROFILER.configure(**config.get("profiler", {}))
+        REGISTRY.enabled = metrics_enabled
+
+        StudentModel.mastery_model = mastery_model
+
+        # A single reference swap publishes engine, ML and service together
+        self.practice = practice
+        self.submission = submission
+
+        self._swap_router(router)
+        self._config_mtime = mtime
+
+    @property
+    def engine(self):
+        return self.practice.engine
+
+    @property
+    def ml(self):
+        return self.practice.ml
+
+    def maybe_reload(self):
+        """Reload tunables if the file changed. Cheap enough per request."""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+
+        self._last_check = now
+
+        if not self.config_path or not os.path.exists(self.config_path):
+            return False
+
+        mtime = os.path.getmtime(self.config_path)
+        if mtime == self._config_mtime:
+            return False
+
+        # Never fail the request that noticed the change; retried on the
+        # next check (an editor may still be writing the file)
+        try:
+            self.load_config()
+        except Exception:
+            if mtime != self._failed_mtime:
+                logger.exception(
+                    "tunables %s not applied; keeping the current settings",
+                    self.config_path
+                )
+            self._failed_mtime = mtime
+            return False
+
+        return True
+
+    def _swap_router(self, router):
+        """
+        Swap in the router for a new shard map, first handing off the
+        students this shard no longer owns.
+        """
+        previous = self.router
+
+        # Other tunables changed: keep the router and its connections
+        if router is not None and previous is not None \
+                and router.shards == previous.shards \
+                and router.ring.vnodes == previous.ring.vnodes:
+            return
+
+        self.router = router
+        if previous is not None:
+            previous.close()
+
+        if router is not None:
+            self.student_store.release(router.is_local)
+
+    # -------------------------
+    # Students
+    # -------------------------
+
+    def subject(self, subject=None):
+        """Validated subject name (the default subject if None)."""
+        subject = subject or self.default_subject
+
+        if subject not in self.question_index.subjects():
+            raise UnknownSubjectError(f"unknown subject {subject!r}")
+
+        return subject
+
+    def get_student(self, subject=None):
+        """
+        Returns the StudentModel for one subject of the current browser
+        session. Loads it from the store, or creates one if it does not exist.
+        """
+        return self.student_store.get_or_create(
+            self.session_student_id(), self.subject(subject)
+        )
+
+    def session_student_id(self):
+        """
+        The current request's student: the one a peer shard forwarded
+        the request for, or the browser session's (created if new).
+        """
+        forwarded = g.get("shard_student_id")
+        if forwarded is not None:
+            return forwarded
+
+        if "student_id" not in session:
+            session["student_id"] = str(uuid.uuid4())
+
+        return session["student_id"]
+
+    @contextmanager
+    def locked_student(self, subject=None):
+        """
+        The session's StudentModel for a subject, held under its
+        per-student lock. Concurrent requests for the same student
+        (double clicks, parallel tabs) are serialized; other students
+        never contend.
+        """
+        with self.student_lock(self.session_student_id(), subject) as student:
+            yield student
+
+    @contextmanager
+    def student_lock(self, student_id, subject=None):
+        """
+        A StudentModel by ID and subject, held under its per-student lock.
+        The lock is taken before the lookup, so an eviction can never
+        hand a second request a different copy of the same student.
+        """
+        subject = self.subject(subject)
+
+        with self.student_store.lock_for(student_id):
+            yield self.student_store.get_or_create(student_id, subject)
+
+    # -------------------------
+    # Cohorts
+    # -------------------------
+
+    def is_teacher(self, authorization):
+        """True for an "Authorization: Bearer <teacher_token>" header value."""
+        if not self._teacher_token or not authorization:
+            return False
+
+        scheme, _, token = authorization.partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(
+            token.strip().encode("utf-8"), self._teacher_token.encode("utf-8")
+        )
+
+    def student_ref(self, student_id):
+        """
+        Stable opaque ID for a student in cohort reports. Session
+        student IDs are what sessions and shards trust, so reports never
+        show them; the "cohort:" prefix keeps refs distinct from shard
+        tokens made with the same secret.
+        """
+        return hmac.new(
+            self._report_key, f"cohort:{student_id}".encode("utf-8"), hashlib.sha256
+        ).hexdigest()[:16]
+
+    def cohort_report(self, subject=None, student_ids=None):
+        """
+        Cohort dashboard report for a subject: every stored student, or
+        only student_ids (a class roster). Students appear as student_ref()s.
+        """
+        subject = self.subject(subject)
+        matrix = self.student_store.cohort(subject, self.question_index.topics(subject))
+
+        return CohortService(
+            matrix, self.student_store.event_log, student_ids,
+            student_ref=self.student_ref
+        ).generate_cohort_report()
+
+    # -------------------------
+    # Async Serving
+    # -------------------------
+
+    async def run_locked_async(self, student_id, subject, fn):
+        """
+        Run fn(student) under the student's lock without blocking the
+        event loop. The common case (student resident, lock free) runs
+        inline; loads from the backend and contended locks are handed
+        to a worker thread.
+        """
+        subject = self.subject(subject)
+        store = self.student_store
+        lock = store.lock_for(student_id)
+
+        if student_key(student_id, subject) in store and lock.acquire(blocking=False):
+            try:
+                return fn(store.get_or_create(student_id, subject))
+            finally:
+                lock.release()
+
+        return await asyncio.to_thread(self._run_locked, student_id, subject, fn)
+
+    def _run_locked(self, student_id, subject, fn):
+        with self.student_lock(student_id, subject) as student:
+            return fn(student)
+
+    async def next_question_async(self, student_id, subject, forced_topic=None,
+                                  verbose=True):
+        """Async counterpart of PracticeService.get_next_question."""
+        practice = self.practice
+        store = self.student_store
+
+        def serve(student):
+            response = practice.get_next_question(
+                student, student.subject, forced_topic=forced_topic,
+                verbose=verbose
+            )
+            # Serving updates seen / review state, which must be saved
+            store.mark_dirty(student, flush=False)
+            return response
+
+        response = await self.run_locked_async(student_id, subject, serve)
+
+        if store.flush_due():
+            await asyncio.to_thread(store.flush)
+
+        return response
+
+    async def submit_async(self, student_id, subject, topic, is_correct,
+                           question_id=None, verbose=True):
+        """Async counterpart of SubmissionService.submit."""
+        submission = self.submission
+
+        response = await self.run_locked_async(
+            student_id, subject,
+            lambda student: submission.submit(
+                student, topic, is_correct, question_id=question_id,
+                flush=False, verbose=verbose
+            )
+        )
+
+        if self.student_store.flush_due():
+            await asyncio.to_thread(self.student_store.flush)
+
+        return response
+
+    async def submit_batch_async(self, student_id, subject, attempts):
+        """Async counterpart of SubmissionService.submit_batch."""
+        submission = self.submission
+
+        response = await self.run_locked_async(
+            student_id, subject,
+            lambda student: submission.submit_batch(student, attempts, flush=False)
+        )
+
+        await asyncio.to_thread(self.student_store.flush)
+
+        return response
+
+    async def cohort_report_async(self, subject=None, student_ids=None):
+        """Async counterpart of cohort_report (runs in a worker thread)."""
+        return await asyncio.to_thread(self.cohort_report, subject, student_ids)
+
+
+def get_container():
+    """The ServiceContainer of the running Flask app."""
+    return current_app.extensions["nexora"]
@@ -1,104 +1,370 @@
 # services/practice_service.py
 
+import weakref
+import zlib
+
+import numpy as np
+
+from engine.policy import PolicyTables
+from monitoring.metrics import REGISTRY
+from services.ai_explanation import EXPLANATIONS
+
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "nexora_practice_stage_seconds",
+    "Time spent in each stage of PracticeService.get_next_question",
+    labels=("stage",)
+)
+QUESTIONS_SERVED = REGISTRY.counter(
+    "nexora_questions_served_total",
+    "Questions served by get_next_question",
+    labels=("kind",)
+)
+
+
+class ServingOrder:
+    """
+    A bucket's questions sorted by item difficulty, shared by every
+    student. Students' SeenTracker bitmaps are indexed by position in
+    this order; order_id changes whenever the order does.
+    Holds no reference to the bucket, so it is dropped along with an
+    evicted subject.
+    """
+
+    __slots__ = (
+        "key", "order_id", "rows", "discrimination", "item_difficulty",
+        "mean_discrimination", "positions"
+    )
+
+    def __init__(self, key, bucket, discrimination, item_difficulty):
+        order = np.argsort(item_difficulty, kind="stable")
+
+        self.key = key
+        self.order_id = zlib.crc32(order.astype(np.int32).tobytes())
+        self.rows = order
+        self.discrimination = discrimination[order]
+        self.item_difficulty = item_difficulty[order]
+        self.mean_discrimination = float(self.discrimination.mean())
+        self.positions = {
+            int(qid): p for p, qid in enumerate(np.asarray(bucket.ids)[order])
+        }
+
+    def question(self, bucket, position):
+        return bucket[int(self.rows[position])]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class PrefetchQueue:
+    """
+    Next-question candidates precomputed for a student's current question,
+    one branch per possible outcome: {is_correct: (difficulty, [payload])}.
+    """
+
+    __slots__ = ("subject", "topic", "branches")
+
+    def __init__(self, subject, topic, branches):
+        self.subject = subject
+        self.topic = topic
+        self.branches = branches
+
+
 class PracticeService:
     """
     Orchestrates topic-focused adaptive practice.
+    Stateless across students: one instance is shared by every request.
     Connects:
     - StudentModel (state)
     - AdaptiveEngine (pedagogy)
     - AdaptiveML (optimization)
     """
 
-    def __init__(self, student_model, adaptive_engine, adaptive_ml, question_bank):
+    PREFETCH_SIZE = 3
+
+    def __init__(self, adaptive_engine, adaptive_ml, question_index):
         """
-        question_bank format:
-        {
-          "Mathematics": {
-              "Fractions": [ {question_obj}, ... ],
-              "Decimals":  [ ... ],
-              "Arithmetic": [ ... ]
-          }
-        }
+        question_index: QuestionIndex built once from the question bank,
+        pre-partitioned by (subject, topic, difficulty).
         """
-        self.student = student_model
         self.engine = adaptive_engine
         self.ml = adaptive_ml
-        self.question_bank = question_bank
+        self.question_index = question_index
+
+        # Engine / ML decisions precompiled for this configuration
+        self.policy = PolicyTables(adaptive_engine, adaptive_ml)
+
+        # bucket -> ServingOrder, built on first use
+        self._orders = weakref.WeakKeyDictionary()
 
     # -------------------------
     # Core Practice Flow
     # -------------------------
 
-    def get_next_question(self, subject, forced_topic=None):
+    def get_next_question(self, student, subject, forced_topic=None, verbose=True):
         """
-        Return a single adaptive question.
+        Return a single adaptive question for the given StudentModel.
+        verbose=False leaves out the ai_reasoning block (compact clients).
         """
 
+        clock = STAGE_SECONDS.clock()
+
         # 1️⃣ Select topic (AI or forced)
         topic = self.engine.select_topic(
-            self.student, forced_topic=forced_topic
+            student, forced_topic=forced_topic
         )
+        clock.lap("select_topic")
 
         # 2️⃣ Determine difficulty
-        mastery = self.student.mastery[topic]
-        difficulty = self.engine.select_difficulty(mastery)
+        mastery = student.mastery[topic]
+        difficulty = self.policy.select_difficulty(mastery)
+        clock.lap("select_difficulty")
 
-        # 3️⃣ Fetch topic questions
-        topic_questions = self._filter_questions(
-            subject, topic, difficulty
-        )
+        # 3️⃣ Select a due review or the best unseen question
+        candidates = self._candidates(student, subject, topic, mastery, difficulty, k=1)
+        clock.lap("candidates")
 
-        if not topic_questions:
+        if not candidates:
+            QUESTIONS_SERVED.inc("none")
             return {
                 "error": "No questions available for this topic and difficulty"
             }
 
-        # 4️⃣ Rank questions using ML
-        ranked = self.ml.rank_questions(
-            topic_questions, mastery, difficulty
-        )
-
-        selected = ranked[0]
+        # 4️⃣ Mark it as served
+        selected = candidates[0]
+        QUESTIONS_SERVED.inc("review" if selected.get("review") else "unseen")
+        self._mark_served(student, subject, topic, selected)
+        clock.lap("mark_served")
 
         # 5️⃣ Hint decision
         show_hint = self.engine.should_show_hint(
-            self.student, topic
+            student, topic
         )
+        clock.lap("hint")
 
-        # 6️⃣ Assemble explainable response
-        return {
-            "question": selected["question"]["text"],
-            "topic": topic,
-            "difficulty": difficulty,
-            "predicted_success": selected["predicted_success"],
-            "show_hint": show_hint,
-            "ai_reasoning": {
-                "topic_reasoning": (
-                    "User-selected topic"
-                    if forced_topic
-                    else self.student.get_ai_reasoning_for_focus()
-                ),
-                "difficulty_reasoning": self.engine.get_difficulty_reasoning(mastery),
-                "ml_reasoning": self.ml.explain_prediction(mastery, difficulty),
-                "hint_reasoning": (
-                    self.engine.get_hint_reasoning(self.student, topic)
-                    if show_hint else "No hint needed at this stage"
-                )
-            }
+        # 6️⃣ Prepare the next question for either outcome
+        self.prefetch(student, subject, topic)
+        clock.lap("prefetch")
+
+        # 7️⃣ Assemble explainable response
+        response = {**selected, "show_hint": show_hint}
+        if not verbose:
+            return response
+
+        response["ai_reasoning"] = {
+            "topic_reasoning": (
+                "User-selected topic"
+                if forced_topic
+                else EXPLANATIONS.explain_student_focus(student)
+            ),
+            "difficulty_reasoning": self.policy.get_difficulty_reasoning(mastery),
+            "ml_reasoning": self.policy.explain_prediction(
+                mastery, selected["difficulty"], selected["predicted_success"]
+            ),
+            "hint_reasoning": (
+                self.policy.get_hint_reasoning(student, topic)
+                if show_hint else "No hint needed at this stage"
+            )
         }
+        clock.lap("reasoning")
+
+        return response
+
+    # -------------------------
+    # Prefetching
+    # -------------------------
+
+    def prefetch(self, student, subject, topic, exclude=None):
+        """
+        Precompute the next PREFETCH_SIZE candidates for both outcomes of
+        the question the student is answering now.
+        exclude: that question's ID, when it is not marked seen yet
+        """
+        branches = {}
+
+        for outcome in (True, False):
+            mastery = student.projected_mastery(topic, outcome)
+            difficulty = self.policy.select_difficulty(mastery)
+            branches[outcome] = (
+                difficulty,
+                self._candidates(
+                    student, subject, topic, mastery, difficulty,
+                    clock=student.attempts[topic] + 1, exclude=exclude
+                )
+            )
+
+        student.prefetch = PrefetchQueue(subject, topic, branches)
+
+    def take_prefetched(self, student, topic, is_correct):
+        """
+        After an attempt has been recorded, return the prefetched next
+        questions for the actual outcome. If mastery ended up in a
+        different difficulty band than predicted, the branch is stale
+        and is recomputed.
+
+        Nothing is marked seen here: clients may show these questions or
+        ask /api/practice instead, and a question counts as seen once it
+        is served there or answered (see mark_answered). The branches for
+        answering the first candidate are prepared in turn.
+        """
+        queue = student.prefetch
+
+        if queue is None or queue.topic != topic:
+            return []
+
+        difficulty, candidates = queue.branches[bool(is_correct)]
+        mastery = student.mastery[topic]
+
+        if self.policy.select_difficulty(mastery) != difficulty:
+            difficulty = self.policy.select_difficulty(mastery)
+            candidates = self._candidates(
+                student, queue.subject, topic, mastery, difficulty
+            )
+
+        if candidates:
+            candidates[0].pop("review", None)
+            self.prefetch(
+                student, queue.subject, topic,
+                exclude=candidates[0]["question_id"]
+            )
+        else:
+            student.prefetch = None
+
+        return candidates
+
+    def has_question(self, subject, topic, question_id):
+        """True if question_id is one of the subject / topic's questions."""
+        question = self.question_index.get(question_id, subject)
+        if question is None:
+            return False
+
+        _, order = self._serving_order(subject, topic, question.get("difficulty"))
+        return question_id in order.positions
+
+    def mark_answered(self, student, subject, topic, question_id):
+        """
+        Mark an answered question seen. It may never have been served,
+        e.g. a prefetched next question the client showed.
+        """
+        question = (
+            self.question_index.get(question_id, subject)
+            if question_id is not None else None
+        )
+
+        if question is not None:
+            self._mark_seen(
+                student, subject, topic, question.get("difficulty"), question_id
+            )
 
     # -------------------------
     # Helpers
     # -------------------------
 
-    def _filter_questions(self, subject, topic, difficulty):
+    def _candidates(self, student, subject, topic, mastery, difficulty,
+                    k=None, clock=None, exclude=None):
         """
-        Filter questions by subject, topic, and difficulty.
-        Assumes each question has a 'difficulty' field.
+        Next question payloads for a student at the given mastery, best
+        first: a review that is due at `clock` (topic attempts, default
+        now), then unseen questions nearest the target success rate.
+        exclude: a question ID to leave out
+
+        Nothing is re-ranked: the scan starts at the bisected target
+        position in the bucket's serving order and skips seen questions
+        in the student's bitmap, so the cost does not grow with the
+        bucket.
         """
-        all_questions = self.question_bank.get(subject, {}).get(topic, [])
+        k = k or self.PREFETCH_SIZE
+        payloads = []
+
+        if clock is None:
+            clock = student.attempts[topic]
+
+        review_id = student.seen.peek_review(topic, clock)
+        review = (
+            self.question_index.get(review_id, subject)
+            if review_id is not None and review_id != exclude else None
+        )
+        if review is not None:
+            a, b = self.ml.item_params([review], review.get("difficulty"))
+            payloads.append(
+                self._payload(review, topic, review.get("difficulty"), mastery, a[0], b[0])
+            )
+            payloads[0]["review"] = True
+
+        bucket, order = self._serving_order(subject, topic, difficulty)
+        if not len(order) or len(payloads) >= k:
+            return payloads
 
-        return [
-            q for q in all_questions
-            if q.get("difficulty") == difficulty
-        ]
+        # Item difficulty at which success equals the target rate
+        ability = self.policy.mastery_to_ability(mastery)
+        target_b = ability - self.policy.target_logit / order.mean_discrimination
+        start = int(np.searchsorted(order.item_difficulty, target_b))
+
+        # One spare position for each question that may be skipped
+        skipped = (review_id, exclude)
+        spare = sum(qid is not None for qid in skipped)
+
+        for p in student.seen.next_unseen(
+            order.key, order.order_id, len(order), start,
+            count=k - len(payloads) + spare
+        ):
+            question = order.question(bucket, p)
+            if question["id"] in skipped:
+                continue
+            payloads.append(self._payload(
+                question, topic, difficulty, mastery,
+                order.discrimination[p], order.item_difficulty[p]
+            ))
+
+        return payloads[:k]
+
+    def _payload(self, question, topic, difficulty, mastery, discrimination,
+                 item_difficulty):
+        probability = self.ml.predict_success_items(
+            mastery, discrimination, item_difficulty
+        )
+
+        return {
+            "question": question["text"],
+            "question_id": question["id"],
+            "topic": topic,
+            "difficulty": difficulty,
+            "predicted_success": round(float(probability), 2)
+        }
+
+    def _mark_served(self, student, subject, topic, payload):
+        """Record a served question: reviews are rescheduled, others marked seen."""
+        if payload.pop("review", False):
+            student.seen.due_review(topic, student.attempts[topic])
+            return
+
+        self._mark_seen(
+            student, subject, topic, payload["difficulty"], payload["question_id"]
+        )
+
+    def _mark_seen(self, student, subject, topic, difficulty, question_id):
+        _, order = self._serving_order(subject, topic, difficulty)
+        position = order.positions.get(question_id)
+
+        if position is not None:
+            student.seen.mark_seen(order.key, order.order_id, len(order), position)
+
+    def _serving_order(self, subject, topic, difficulty):
+        """(bucket, ServingOrder) for one partition."""
+        bucket = self._filter_questions(subject, topic, difficulty)
+        order = self._orders.get(bucket)
+
+        if order is None:
+            discrimination, item_difficulty = self.ml.item_params(bucket, difficulty)
+            order = self._orders[bucket] = ServingOrder(
+                f"{topic}|{difficulty}", bucket,
+                discrimination, item_difficulty
+            )
+
+        return bucket, order
+
+    def _filter_questions(self, subject, topic, difficulty):
+        """
+        Fetch the pre-partitioned bucket for subject, topic, and difficulty.
+        """
+        return self.question_index.bucket(subject, topic, difficulty)
@@ -0,0 +1,232 @@
+# services/responses.py
+
+"""
+Response shaping and encoding for the JSON APIs.
+
+- compact mode: clients pass fields=a,b,c (only those top-level keys)
+  or verbose=false (no prose explanations); services skip building
+  what is not returned
+- fast JSON: orjson when installed, the standard library otherwise
+- gzip, negotiated per client from Accept-Encoding
+
+Shared by the Flask routes and the ASGI app.
+"""
+
+import gzip
+import json
+import re
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used
+    orjson = None
+
+
+# Prose keys dropped by verbose=false
+PROSE_FIELDS = ("ai_reasoning", "learning_feedback")
+
+# Always returned, whatever fields= asks for
+ERROR_FIELDS = ("error",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html")
+
+
+# -------------------------
+# Compact Mode
+# -------------------------
+
+class ResponseOptions:
+    """What a client asked to receive: fields=... and verbose=..."""
+
+    __slots__ = ("fields", "verbose")
+
+    def __init__(self, fields=None, verbose=True):
+        self.fields = frozenset(fields) if fields else None
+        self.verbose = verbose
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Parse query arguments (Flask request.args or Starlette
+        query_params). A field list naming a prose field keeps it even
+        with verbose=false.
+        """
+        fields = [f.strip() for f in (args.get("fields") or "").split(",") if f.strip()]
+        verbose = (args.get("verbose") or "true").lower() not in ("false", "0", "no")
+
+        if fields:
+            verbose = any(f in PROSE_FIELDS for f in fields)
+
+        return cls(fields, verbose)
+
+    def shape(self, payload):
+        """Drop the top-level keys the client did not ask for."""
+        if not isinstance(payload, dict):
+            return payload
+
+        if self.fields is not None:
+            return {
+                key: value for key, value in payload.items()
+                if key in self.fields or key in ERROR_FIELDS
+            }
+
+        if not self.verbose:
+            return {
+                key: value for key, value in payload.items()
+                if key not in PROSE_FIELDS
+            }
+
+        return payload
+
+
+# Full responses (the default)
+VERBOSE = ResponseOptions()
+
+
+# -------------------------
+# JSON
+# -------------------------
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj, default=None):
+        """Compact JSON as UTF-8 bytes."""
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj, default=None):
+        """Compact JSON as UTF-8 bytes."""
+        return json.dumps(
+            obj, default=default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    loads = json.loads
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider over dumps() / loads(): compact output and no
+    key sorting, encoded straight to bytes for responses. Types the
+    encoder does not know go through Flask's default handler.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            dumps(obj, default=self.default), mimetype=self.mimetype
+        )
+
+
+# -------------------------
+# Compression
+# -------------------------
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header value allows gzip."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        return quality > 0
+
+    return False
+
+
+def weaken_etag(etag):
+    """
+    Weak form of an ETag header value, for a gzipped body: it is not
+    byte-identical to the plain body the strong tag names.
+    """
+    return etag if etag is None or etag.startswith("W/") else "W/" + etag
+
+
+_ENTITY_TAG = re.compile(r'\s*(?:(?:W/)?"([^"]*)"|(\*))\s*(?:,|$)')
+
+
+def entity_tags(if_none_match):
+    """
+    Opaque tags listed in an If-None-Match header value, weak ones
+    without their W/ prefix ("*" for a wildcard). Parsing stops at the
+    first malformed entry.
+    """
+    tags = []
+    position, value = 0, (if_none_match or "").strip()
+
+    while position < len(value):
+        match = _ENTITY_TAG.match(value, position)
+        if match is None or match.end() == position:
+            break
+        tags.append(match.group(1) if match.group(2) is None else "*")
+        position = match.end()
+
+    return tags
+
+
+def if_none_match_matches(if_none_match, etag):
+    """
+    Whether an If-None-Match header value matches the opaque tag `etag`
+    by weak comparison, as conditional GETs use: a gzipped 200 carried
+    the weak form of the same tag.
+    """
+    tags = entity_tags(if_none_match)
+    return etag in tags or "*" in tags
+
+
+def compress_response(response, accept_encoding, min_bytes, level=5):
+    """
+    Gzip a buffered Flask response in place when the client accepts it
+    and the body is at least min_bytes. Returns the response.
+    A gzipped body's ETag is made weak. 304s vary on Accept-Encoding
+    and, for gzip clients, carry the weak ETag like the 200s they
+    stand for.
+    """
+    if not min_bytes or response.direct_passthrough:
+        return response
+
+    if response.status_code == 304:
+        response.vary.add("Accept-Encoding")
+        if "ETag" in response.headers and accepts_gzip(accept_encoding):
+            response.headers["ETag"] = weaken_etag(response.headers["ETag"])
+        return response
+
+    if response.status_code != 200:
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if "Content-Encoding" in response.headers \
+            or response.mimetype not in COMPRESSIBLE_TYPES \
+            or not accepts_gzip(accept_encoding):
+        return response
+
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=level))
+    response.headers["Content-Encoding"] = "gzip"
+
+    if "ETag" in response.headers:
+        response.headers["ETag"] = weaken_etag(response.headers["ETag"])
+
+    return response
@@ -0,0 +1,281 @@
+# services/sharding.py
+
+"""
+Consistent-hash sharding of students across worker processes and hosts.
+
+Every student is owned by exactly one shard (a worker process), so
+the student's state stays hot in one StudentStore. Any worker can take
+a request: requests for students it owns are served in-process, the
+rest are forwarded to the owner over HTTP (TCP or a local Unix socket)
+with the student ID and an HMAC token in headers.
+
+The shard map comes from the "sharding" tunables and is hot-reloaded
+like the rest of the file; each process learns its own shard name from
+NEXORA_SHARD. Adding a shard moves only the students whose ring
+position it takes over (about 1/N of them). On a map change each
+worker flushes and releases the students it no longer owns, and the
+new owner loads their saved state from the shared backend.
+"""
+
+import bisect
+import hashlib
+import hmac
+import http.client
+import select
+import socket
+import threading
+from urllib.parse import urlsplit
+
+
+# Student-scoped API paths; everything else is served by any worker
+SHARDED_PATHS = ("/api/practice/", "/api/submit", "/api/subject_report/")
+
+# Set on forwarded requests, and on responses (the serving shard)
+STUDENT_HEADER = "X-Nexora-Student"
+TOKEN_HEADER = "X-Nexora-Shard-Token"
+SHARD_HEADER = "X-Nexora-Shard"
+
+# Request headers passed on to the owning shard
+FORWARDED_REQUEST_HEADERS = ("Content-Type", "Accept", "Accept-Encoding", "If-None-Match")
+
+# Methods safe to send twice: a failed forward is retried only for
+# these, since any other request may already have been applied
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+# Response headers not copied back from the owning shard
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection", "keep-alive", "transfer-encoding", "content-length",
+    "set-cookie", "date", "server"
+))
+
+
+class ShardUnavailableError(ConnectionError):
+    """Raised when the owning shard cannot be reached."""
+
+
+def _hash(text):
+    return int.from_bytes(
+        hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+# -------------------------
+# Ring
+# -------------------------
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+    Each shard is placed at `vnodes` points; a student belongs to the
+    first point at or after the hash of its ID. The hash is stable
+    across processes and hosts (not Python's salted hash()).
+    """
+
+    def __init__(self, shards=(), vnodes=128):
+        self.vnodes = vnodes
+        self._points = []  # sorted hashes
+        self._owners = []  # shard per point
+
+        for shard in shards:
+            self.add(shard)
+
+    @property
+    def shards(self):
+        return sorted(set(self._owners))
+
+    def add(self, shard):
+        """Place a shard on the ring (no-op if already there)."""
+        if shard in self._owners:
+            return
+
+        for v in range(self.vnodes):
+            point = _hash(f"{shard}#{v}")
+            i = bisect.bisect_left(self._points, point)
+            self._points.insert(i, point)
+            self._owners.insert(i, shard)
+
+    def remove(self, shard):
+        """Take a shard off the ring; its students go to the next points."""
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != shard]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def owner(self, student_id):
+        if not self._points:
+            raise LookupError("hash ring has no shards")
+
+        i = bisect.bisect_left(self._points, _hash(student_id))
+        return self._owners[i % len(self._points)]
+
+    def __len__(self):
+        return len(set(self._owners))
+
+
+# -------------------------
+# Routing
+# -------------------------
+
+class ShardRouter:
+    """
+    Routes a student's requests to the owning shard.
+    - owner() / is_local() answer from the ring
+    - sign() / verify() authenticate forwarded student IDs, so only
+      other shards (holding the same secret) can act as a student
+    - forward() replays a request on the owning shard over a
+      keep-alive connection per (thread, shard)
+    """
+
+    def __init__(self, shards, local, secret, vnodes=128, timeout=10.0):
+        """
+        shards: {shard name: base URL} ("http://host:port" or
+        "unix:/path/to.sock")
+        local: this process's shard name
+        """
+        if local not in shards:
+            raise ValueError(f"local shard {local!r} is not in the shard map")
+
+        self.shards = dict(shards)
+        self.local = local
+        self.ring = HashRing(self.shards, vnodes=vnodes)
+        self.timeout = timeout
+
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self._connections = threading.local()
+
+    @classmethod
+    def from_config(cls, config, local, secret):
+        """Router from the "sharding" tunables, or None when not sharded."""
+        shards = config.get("shards") or {}
+        if not local or not shards:
+            return None
+
+        return cls(
+            shards, local, secret,
+            vnodes=config.get("vnodes", 128),
+            timeout=config.get("timeout", 10.0)
+        )
+
+    def owner(self, student_id):
+        return self.ring.owner(student_id)
+
+    def is_local(self, student_id):
+        return self.ring.owner(student_id) == self.local
+
+    # -------------------------
+    # Authentication
+    # -------------------------
+
+    def sign(self, student_id):
+        return hmac.new(self._secret, student_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def verify(self, student_id, token):
+        return bool(token) and hmac.compare_digest(self.sign(student_id), token)
+
+    # -------------------------
+    # Forwarding
+    # -------------------------
+
+    def forward(self, shard, student_id, method, path, headers, body=b""):
+        """
+        Send a request to another shard as student_id.
+        headers: the incoming request headers (only FORWARDED_REQUEST_HEADERS
+        are passed on). Returns (status, [(header, value), ...], body).
+        """
+        outgoing = {
+            name: headers[name] for name in FORWARDED_REQUEST_HEADERS
+            if headers.get(name) is not None
+        }
+        outgoing[STUDENT_HEADER] = student_id
+        outgoing[TOKEN_HEADER] = self.sign(student_id)
+
+        # A kept-alive connection the peer has closed is replaced before
+        # sending. A request that fails anyway is retried once if it is
+        # idempotent, or if it failed while being sent on a reused
+        # connection (it never reached the peer); never after a timeout
+        retry = method.upper() in IDEMPOTENT_METHODS
+
+        for attempt in range(2):
+            connection = self._connection(shard)
+            reused = connection.sock is not None
+            sent = False
+
+            try:
+                connection.request(method, path, body=body or None, headers=outgoing)
+                sent = True
+                response = connection.getresponse()
+                payload = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._drop_connection(shard)
+                if attempt or isinstance(e, TimeoutError) \
+                        or not (retry or (reused and not sent)):
+                    raise ShardUnavailableError(f"shard {shard!r} unavailable: {e}") from e
+                continue
+
+            return response.status, [
+                (name, value) for name, value in response.getheaders()
+                if name.lower() not in HOP_BY_HOP_HEADERS
+            ], payload
+
+    def close(self):
+        for connection in getattr(self._connections, "pool", {}).values():
+            connection.close()
+        self._connections.pool = {}
+
+    def _connection(self, shard):
+        pool = getattr(self._connections, "pool", None)
+        if pool is None:
+            pool = self._connections.pool = {}
+
+        connection = pool.get(shard)
+        if connection is not None and _is_dropped(connection):
+            connection.close()
+            connection = None
+
+        if connection is None:
+            connection = pool[shard] = _open_connection(self.shards[shard], self.timeout)
+
+        return connection
+
+    def _drop_connection(self, shard):
+        connection = getattr(self._connections, "pool", {}).pop(shard, None)
+        if connection is not None:
+            connection.close()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket (workers on the same host)."""
+
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def _is_dropped(connection):
+    """
+    True if an idle kept-alive connection was closed by the peer: its
+    socket is readable (EOF) though no request is outstanding.
+    """
+    if connection.sock is None:
+        return False
+
+    try:
+        return bool(select.select([connection.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def _open_connection(url, timeout):
+    if url.startswith("unix:"):
+        return _UnixHTTPConnection(url[len("unix:"):], timeout)
+
+    parts = urlsplit(url)
+    connection_class = (
+        http.client.HTTPSConnection if parts.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    return connection_class(parts.hostname, parts.port, timeout=timeout)
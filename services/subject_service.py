@@ -1,38 +1,56 @@
 # services/subject_service.py
 
+from services.ai_explanation import EXPLANATIONS
+
+
 class SubjectService:
     """
     Builds subject-level learning reports.
     This is the visibility layer for AI reasoning.
     """
 
-    def __init__(self, student_model):
+    def __init__(self, student_model, explanations=EXPLANATIONS, locale=None):
+        """
+        explanations: AIExplanationEngine producing the focus reasoning
+        locale: explanation language (the engine's default if None)
+        """
         self.student = student_model
+        self.explanations = explanations
+        self.locale = locale
 
     # -------------------------
     # Public API
     # -------------------------
 
-    def generate_subject_report(self):
+    def generate_subject_report(self, verbose=True):
         """
         Generate a complete subject dashboard report.
+        Built from the student's cached derived view and the explanation
+        cache, so repeated reports between attempts cost no recomputation.
+        verbose=False leaves out the ai_reasoning text.
         """
 
-        mastery_overview = self.student.get_mastery_overview()
-        strengths = self.student.get_strengths()
-        weak_areas = self.student.get_weak_areas()
-        focus_topic = self.student.get_focus_topic()
-        ai_reasoning = self.student.get_ai_reasoning_for_focus()
+        view = self.student.derived_view()
 
-        return {
+        report = {
             "subject": self.student.subject,
-            "mastery_overview": mastery_overview,
-            "strengths": strengths,
-            "weak_areas": weak_areas,
-            "focus_topic": focus_topic,
-            "ai_reasoning": ai_reasoning
+            "mastery_overview": view.mastery_overview,
+            "strengths": view.strengths,
+            "weak_areas": view.weak_areas,
+            "focus_topic": view.focus_topic
         }
 
+        if verbose:
+            report["ai_reasoning"] = self.explanations.explain_student_focus(
+                self.student, self.locale
+            )
+
+        return report
+
+    def etag(self):
+        """Entity tag for the report; changes whenever the state does."""
+        return f"{self.student.student_id}-{self.student.subject}-{self.student.version}"
+
     # -------------------------
     # Debug / Transparency
     # -------------------------
@@ -44,5 +62,7 @@ class SubjectService:
         return {
             "student_snapshot": self.student.snapshot(),
             "focus_topic": self.student.get_focus_topic(),
-            "focus_reasoning": self.student.get_ai_reasoning_for_focus()
+            "focus_reasoning": self.explanations.explain_student_focus(
+                self.student, self.locale
+            )
         }
@@ -0,0 +1,230 @@
+# services/submission_service.py
+
+import time
+from datetime import datetime, timezone
+
+from models.student_model import check_question_id
+from monitoring.metrics import OPERATION_SECONDS, REGISTRY, timed
+
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "nexora_submit_stage_seconds",
+    "Time spent in each stage of SubmissionService.submit",
+    labels=("stage",)
+)
+
+
+class SubmissionError(ValueError):
+    """Raised when a submission payload cannot be applied."""
+
+
+class SubmissionService:
+    """
+    Applies answer submissions to a StudentModel.
+    Connects:
+    - StudentModel (state update)
+    - AdaptiveEngine (hint decision)
+    - StudentStore (persistence)
+    - PracticeService (prefetched next questions)
+    """
+
+    MAX_BATCH_SIZE = 1000
+
+    # Accepted attempt timestamps: offline answers up to this old, and
+    # client clocks up to this far ahead of the server's
+    MAX_ATTEMPT_AGE = 30 * 24 * 3600
+    MAX_CLOCK_SKEW = 300
+
+    def __init__(self, adaptive_engine, student_store, practice_service=None):
+        self.engine = adaptive_engine
+        self.store = student_store
+        self.practice = practice_service
+
+    # -------------------------
+    # Single Answer
+    # -------------------------
+
+    def submit(self, student, topic, is_correct, question_id=None, flush=True,
+               verbose=True):
+        """
+        Record one answer and explain the outcome.
+        The response carries the next questions prefetched for this
+        outcome, so clients can skip a separate practice request.
+        flush=False leaves the write-behind flush to the caller.
+        verbose=False leaves out the learning_feedback text.
+        """
+        clock = STAGE_SECONDS.clock()
+
+        # Rejected before the student changes
+        question_id = self._check_attempt(student, topic, is_correct, question_id)
+        student.record_attempt(topic, is_correct, question_id=question_id)
+
+        if self.practice:
+            self.practice.mark_answered(student, student.subject, topic, question_id)
+        clock.lap("record")
+
+        # Includes the write-behind flush when one is due
+        self.store.mark_dirty(student, flush=flush)
+        clock.lap("mark_dirty")
+
+        show_hint = self.engine.should_show_hint(student, topic)
+        clock.lap("hint")
+
+        next_questions = (
+            self.practice.take_prefetched(student, topic, is_correct)
+            if self.practice else []
+        )
+        clock.lap("take_prefetched")
+
+        response = {
+            "correct": is_correct,
+            "updated_mastery": student.mastery[topic],
+            "show_hint": show_hint,
+            "next_questions": next_questions
+        }
+
+        if verbose:
+            response["learning_feedback"] = (
+                f"Mastery in {topic} increased due to correct response"
+                if is_correct
+                else f"Mastery in {topic} decreased due to incorrect response"
+            )
+
+        return response
+
+    # -------------------------
+    # Batch
+    # -------------------------
+
+    @timed(OPERATION_SECONDS, "submission.submit_batch")
+    def submit_batch(self, student, attempts, flush=True):
+        """
+        Apply an ordered list of attempts in a single pass.
+        attempts: [{"topic", "correct", "question_id"?, "timestamp"?}, ...]
+
+        The whole batch is validated before anything is applied, and the
+        student is persisted once at the end (by the caller if flush=False).
+        """
+        parsed = self._parse_batch(student, attempts)
+
+        results = []
+        for topic, is_correct, question_id, timestamp in parsed:
+            student.record_attempt(
+                topic, is_correct, question_id=question_id, timestamp=timestamp
+            )
+            if self.practice:
+                self.practice.mark_answered(student, student.subject, topic, question_id)
+            results.append({
+                "topic": topic,
+                "correct": is_correct,
+                "updated_mastery": student.mastery[topic],
+                "show_hint": self.engine.should_show_hint(student, topic)
+            })
+
+        if parsed:
+            self.store.mark_dirty(student, flush=False)
+            if flush:
+                self.store.flush()
+
+        return {
+            "applied": len(results),
+            "mastery": {
+                topic: student.mastery[topic]
+                for topic in dict.fromkeys(r["topic"] for r in results)
+            },
+            "results": results
+        }
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+
+    def _parse_batch(self, student, attempts):
+        if not isinstance(attempts, list):
+            raise SubmissionError("attempts must be a list")
+
+        if len(attempts) > self.MAX_BATCH_SIZE:
+            raise SubmissionError(
+                f"batch too large (max {self.MAX_BATCH_SIZE} attempts)"
+            )
+
+        now = time.time()
+        window = (now - self.MAX_ATTEMPT_AGE, now + self.MAX_CLOCK_SKEW)
+
+        parsed = []
+        for position, attempt in enumerate(attempts):
+            if not isinstance(attempt, dict):
+                raise SubmissionError(f"attempt {position} must be an object")
+
+            topic = attempt.get("topic")
+            try:
+                question_id = self._check_attempt(
+                    student, topic, attempt.get("correct"), attempt.get("question_id")
+                )
+            except SubmissionError as e:
+                raise SubmissionError(f"attempt {position}: {e}") from None
+
+            parsed.append((
+                topic,
+                attempt["correct"],
+                question_id,
+                self._parse_timestamp(position, attempt.get("timestamp"), window)
+            ))
+
+        return parsed
+
+    def _check_attempt(self, student, topic, is_correct, question_id):
+        """
+        Validate one answer for `student`; returns the question ID.
+        The question, when given, must belong to the answered topic.
+        """
+        if topic not in student.mastery:
+            raise SubmissionError(f"unknown topic {topic!r}")
+
+        if not isinstance(is_correct, bool):
+            raise SubmissionError("correct must be a boolean")
+
+        try:
+            question_id = check_question_id(question_id)
+        except ValueError as e:
+            raise SubmissionError(str(e)) from None
+
+        if question_id is not None and self.practice \
+                and not self.practice.has_question(student.subject, topic, question_id):
+            raise SubmissionError(
+                f"unknown question {question_id} for {student.subject} / {topic}"
+            )
+
+        return question_id
+
+    @staticmethod
+    def _parse_timestamp(position, value, window):
+        """
+        Epoch seconds, ISO-8601 string, or None (server time).
+        window: (earliest, latest) accepted epoch seconds.
+        """
+        if value is None:
+            return None
+
+        timestamp = None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                timestamp = float(value)
+            except OverflowError:
+                pass
+
+        elif isinstance(value, str):
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+            else:
+                if parsed.tzinfo is None:
+                    parsed = parsed.replace(tzinfo=timezone.utc)
+                timestamp = parsed.timestamp()
+
+        # Also rejects NaN and infinities
+        if timestamp is None or not window[0] <= timestamp <= window[1]:
+            raise SubmissionError(f"attempt {position}: invalid timestamp {value!r}")
+
+        return timestamp
@@ -1,4 +1,5 @@
 let currentTopic = null;
+let currentQuestionId = null;
 
 document.addEventListener("DOMContentLoaded", loadDashboard);
 
@@ -53,6 +54,7 @@ function startPractice(topic) {
   fetch(`/api/practice/Mathematics/${topic}`)
     .then(res => res.json())
     .then(data => {
+      currentQuestionId = data.question_id;
       document.getElementById("practiceArea").classList.remove("hidden");
       document.getElementById("questionTopic").innerText = data.topic;
       document.getElementById("questionText").innerText = data.question;
@@ -68,7 +70,9 @@ function submitAnswer(correct) {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({
+      subject: "Mathematics",
       topic: currentTopic,
+      question_id: currentQuestionId,
       correct: correct
     })
   })
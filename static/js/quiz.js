@@ -8,6 +8,7 @@ if (!currentTopic) {
 }
 
 let currentQuestion = null;
+let prefetchedQuestion = null;
 
 document.addEventListener("DOMContentLoaded", loadQuestion);
 
@@ -17,15 +18,17 @@ function loadQuestion() {
 
   fetch(`/api/practice/Mathematics/${currentTopic}`)
     .then(res => res.json())
-    .then(data => {
-      currentQuestion = data;
+    .then(renderQuestion);
+}
+
+function renderQuestion(data) {
+  currentQuestion = data;
 
-      document.getElementById("questionText").innerText = data.question;
-      document.getElementById("difficulty").innerText =
-        `Difficulty: ${data.difficulty}`;
-      document.getElementById("prediction").innerText =
-        `Predicted Success: ${Math.round(data.predicted_success * 100)}%`;
-    });
+  document.getElementById("questionText").innerText = data.question;
+  document.getElementById("difficulty").innerText =
+    `Difficulty: ${data.difficulty}`;
+  document.getElementById("prediction").innerText =
+    `Predicted Success: ${Math.round(data.predicted_success * 100)}%`;
 }
 
 function submitAnswer() {
@@ -37,7 +40,9 @@ function submitAnswer() {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({
+      subject: "Mathematics",
       topic: currentTopic,
+      question_id: currentQuestion ? currentQuestion.question_id : null,
       correct: true
     })
   })
@@ -51,11 +56,25 @@ function submitAnswer() {
 
     document.getElementById("progressFill").style.width =
       `${data.updated_mastery}%`;
+
+    // Server prefetched the next question for this outcome
+    prefetchedQuestion =
+      data.next_questions && data.next_questions.length
+        ? data.next_questions[0]
+        : null;
   });
 }
 
 function nextQuestion() {
-  loadQuestion();
+  if (!prefetchedQuestion) {
+    loadQuestion();
+    return;
+  }
+
+  document.getElementById("feedback").innerText = "";
+  document.getElementById("answerInput").value = "";
+  renderQuestion(prefetchedQuestion);
+  prefetchedQuestion = null;
 }
 
 function showHint() {